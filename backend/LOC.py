@@ -1,12 +1,30 @@
-import os
+import random
 from git import Repo
 from collections import defaultdict
-from ignoreFiles import should_ignore, IGNORE_DIRS
+from itertools import groupby
+from gitUtils import changed_files, fetch_history_blobs, blame_runs, line_counts
+from fileClassifier import classify_files
+from ownership import OwnershipReplay
+from sampledLOC import estimate_LOC
+from deadline import completeness
+from instrumentation import span
 from datetime import datetime, timezone, timedelta
 
 
-def calculate_LOC(tempFolder, start_date=None, end_date=None):
+def calculate_LOC(tempFolder, start_date=None, end_date=None, files=None, engine="blame", target_error=0.02,
+                  deadline=None, progress=None, index=None, file_lines=None, file_runs=None):
+    """
+    Each author's share of the surviving lines. With a deadline, files are
+    blamed in a fixed random order until it expires and the shares cover the
+    files done so far; the fraction of lines covered goes into `progress`.
+    The sample engine also puts its per-author "intervals", "confidence",
+    "sampled_lines" and "total_lines" there.
+    The blame and replay engines also fill `file_lines` with {path: {author:
+    lines}} and `file_runs` with {path: [(author, first_line, line_count)]}
+    when they are given.
+    """
     print("Calculating %LOC contributed by each author...")
+    progress = progress if progress is not None else {}
     repo = Repo(tempFolder)
     authorLOC = defaultdict(int)
 
@@ -21,52 +39,79 @@ def calculate_LOC(tempFolder, start_date=None, end_date=None):
         end_dt = datetime.strptime(end_date, "%Y-%m-%d").replace(
             hour=23, minute=59, second=59, tzinfo=timezone.utc)
 
-        sprintFiles = set()
-        seen = set()
-        for ref in repo.references:
-            try:
-                for commit in repo.iter_commits(ref):
-                    if commit.hexsha in seen:
-                        continue
-                    seen.add(commit.hexsha)
-                    if len(commit.parents) > 1:
-                        continue
-                    commit_dt = datetime.fromtimestamp(commit.committed_date, tz=timezone.utc)
-                    if commit_dt < start_dt or commit_dt > end_dt:
-                        continue
-                    for f in commit.stats.files:
-                        sprintFiles.add(f.replace("\\", "/"))
-            except Exception:
-                continue
+        if index is not None:
+            sprintFiles = index.changed_files(start_dt, end_dt)
+        else:
+            sprintFiles = changed_files(repo, start_dt, end_dt)
         print(f"Sprint LOC: {len(sprintFiles)} files changed in date range")
 
-    for root, dirs, files in os.walk(tempFolder):
-        dirs[:] = [d for d in dirs if d not in IGNORE_DIRS]
-        for file in files:
-            absPath = os.path.join(root, file)
-            relPath = os.path.relpath(absPath, tempFolder).replace("\\", "/")
-            if should_ignore(relPath):
-                continue
+    # Tracked, non-ignored files that are not binary, generated or oversized
+    if files is None:
+        files = classify_files(repo).included
+    # In sprint mode, only process files changed during the sprint
+    if sprintFiles is not None:
+        files = [f for f in files if f in sprintFiles]
 
-            # In sprint mode, only process files changed during the sprint
-            if sprintFiles is not None and relPath not in sprintFiles:
-                continue
+    if engine != "replay":
+        # A blobless clone gets the history blame walks in one fetch
+        with span("fetch_blobs"):
+            fetch_history_blobs(repo, files)
 
+    if engine == "sample":
+        # Quick estimate from blamed line ranges, for previews of large repos
+        with span("sample_blame", files=len(files)):
+            estimate = estimate_LOC(repo, files, classify_files(repo).lines, target_error=target_error)
+        print(f"Sampled {estimate['sampled_lines']}/{estimate['total_lines']} lines, "
+              f"{int(estimate['confidence'] * 100)}% intervals: {estimate['intervals']}")
+        progress["completeness"] = 1.0
+        for key in ("intervals", "confidence", "sampled_lines", "total_lines"):
+            progress[key] = estimate[key]
+        return estimate["percentages"]
+
+    if engine == "replay":
+        # One pass over the history gives the same line owners as blaming each file
+        with span("ownership_replay"):
+            replay = OwnershipReplay(repo).run()
+            authorLOC.update(replay.author_lines(paths=files))
+        if file_lines is not None or file_runs is not None:
+            for relPath in files:
+                runs, line = [], 1
+                for author, group in groupby(replay.file_lines(relPath) or ()):
+                    count = len(list(group))
+                    runs.append((author, line, count))
+                    line += count
+                if file_lines is not None:
+                    file_lines[relPath] = line_counts(runs)
+                if file_runs is not None:
+                    file_runs[relPath] = runs
+        files = []
+
+    bounded = deadline is not None and deadline.end is not None
+    lineCounts = classify_files(repo).lines if bounded else {}
+    totalLines = sum(lineCounts.get(f, 0) for f in files)
+    if bounded:
+        files = list(files)
+        random.Random(0).shuffle(files)
+
+    with span("blame_files", files=len(files)):
+        doneLines = 0
+        for relPath in files:
+            if bounded and deadline.expired():
+                break
+            doneLines += lineCounts.get(relPath, 0)
             try:
-                blameOutput = repo.git.blame('--line-porcelain', relPath)
+                runs = blame_runs(repo, relPath)
             except Exception:
                 continue
+            fileLOC = line_counts(runs)
+            for author, lines in fileLOC.items():
+                authorLOC[author] += lines
+            if file_lines is not None:
+                file_lines[relPath] = fileLOC
+            if file_runs is not None:
+                file_runs[relPath] = runs
 
-            current_author = None
-            for line in blameOutput.splitlines():
-                parts = line.split()
-                if parts and len(parts[0]) == 40 and all(c in '0123456789abcdef' for c in parts[0]):
-                    current_author = None
-                elif line.startswith("author "):
-                    current_author = line.replace("author ", "").strip()
-                elif line.startswith("\t") and current_author:
-                    authorLOC[current_author] += 1
-
+    progress["completeness"] = completeness(doneLines, totalLines)
     totalLOC = sum(authorLOC.values()) or 1
     authorPercentage = {author: round((loc / totalLOC) * 100, 2)
                         for author, loc in authorLOC.items()}
@@ -0,0 +1,183 @@
+import os
+import json
+import hashlib
+import argparse
+from datetime import datetime, timezone
+import numpy as np
+from commitStats import parse_date
+
+# Per-day columns, in order
+MEASURES = ["commits", "additions", "deletions", "files"]
+DAY_SECONDS = 86400
+
+
+def _day(ts):
+    return int(ts) // DAY_SECONDS
+
+
+def _date(day):
+    return datetime.fromtimestamp(day * DAY_SECONDS, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def cube_key(repo_url, matcher):
+    """
+    Identifies what a saved cube was counted against: the repository and the
+    ignore rules (and scope), which decide each commit's line and file counts.
+    """
+    rules = [repo_url, matcher.scope or ""] + [sorted(rule) for rule in (
+        matcher.dirs, matcher.extensions, matcher.filenames, matcher.globs, matcher.include_globs)]
+    return hashlib.sha1(json.dumps(rules).encode("utf-8")).hexdigest()
+
+
+class ActivityCube:
+    """
+    Commits, additions, deletions and files touched per author per UTC day,
+    with running totals along the day axis, so the totals of any whole-day
+    window are one subtraction: prefix[:, end + 1] - prefix[:, start].
+    `counts` is authors x days x MEASURES, day 0 being `origin` (days since
+    the epoch). Commits are added by sha, so adding the same history again
+    (a later run over a fresh clone) only counts the new ones.
+    """
+
+    def __init__(self, authors=None, origin=0, counts=None, shas=(), key=None):
+        self.authors = list(authors or [])
+        self._author_index = {author: i for i, author in enumerate(self.authors)}
+        self.origin = int(origin)
+        self.counts = counts if counts is not None else np.zeros((len(self.authors), 0, len(MEASURES)), dtype=np.int64)
+        self.shas = set(shas)
+        self.key = key
+        self.prefix = np.zeros((len(self.authors), self.counts.shape[1] + 1, len(MEASURES)), dtype=np.int64)
+        np.cumsum(self.counts, axis=1, out=self.prefix[:, 1:])
+
+    @property
+    def days(self):
+        return self.counts.shape[1]
+
+    def _grow(self, first, last, authors):
+        """Widen the day axis to cover [first, last] and append new authors."""
+        new = [a for a in dict.fromkeys(authors) if a not in self._author_index]
+        for author in new:
+            self._author_index[author] = len(self.authors)
+            self.authors.append(author)
+        if self.days:
+            first, last = min(first, self.origin), max(last, self.origin + self.days - 1)
+        before = self.origin - first if self.days else 0
+        after = (last - first + 1) - before - self.days
+        if new or before or after:
+            self.counts = np.pad(self.counts, ((0, len(new)), (before, after), (0, 0)))
+            self.prefix = np.pad(self.prefix, ((0, len(new)), (before, after), (0, 0)))
+            # Running totals before the old origin are zero; after the old end
+            # they carry the last total forward
+            if after:
+                self.prefix[:, -after:] = self.prefix[:, -after - 1:-after]
+        self.origin = first
+        return before
+
+    def add(self, records):
+        """
+        Count (sha, author, committed_timestamp, additions, deletions, files)
+        records not seen before. Only the running totals from the earliest
+        day that changed onwards are recomputed. Returns how many were added.
+        """
+        records = [r for r in records if r[0] not in self.shas]
+        if not records:
+            return 0
+        days = np.array([_day(r[2]) for r in records], dtype=np.int64)
+        self._grow(int(days.min()), int(days.max()), [r[1] for r in records])
+        rows = np.array([self._author_index[r[1]] for r in records], dtype=np.int64)
+        cols = days - self.origin
+        values = np.array([(1, r[3], r[4], r[5]) for r in records], dtype=np.int64)
+        np.add.at(self.counts, (rows, cols), values)
+        self.shas.update(r[0] for r in records)
+
+        start = int(cols.min())
+        np.cumsum(self.counts[:, start:], axis=1, out=self.prefix[:, start + 1:])
+        self.prefix[:, start + 1:] += self.prefix[:, start:start + 1]
+        return len(records)
+
+    def _bounds(self, start_date=None, end_date=None):
+        """Column range [lo, hi) of the whole days from start_date to end_date (YYYY-MM-DD), clipped."""
+        start, end = parse_date(start_date), parse_date(end_date)
+        lo = _day(start.timestamp()) - self.origin if start else 0
+        hi = _day(end.timestamp()) - self.origin + 1 if end else self.days
+        # Windows entirely before or after the counted days (or over an empty
+        # cube) clip to an empty range
+        lo, hi = min(max(lo, 0), self.days), min(hi, self.days)
+        return lo, max(lo, hi)
+
+    def window(self, start_date=None, end_date=None):
+        """{author: {measure: total}} over [start_date, end_date], authors with no commits left out."""
+        lo, hi = self._bounds(start_date, end_date)
+        totals = self.prefix[:, hi] - self.prefix[:, lo]
+        return {
+            author: {measure: int(totals[i, j]) for j, measure in enumerate(MEASURES)}
+            for i, author in enumerate(self.authors) if totals[i, 0]
+        }
+
+    def timeline(self, start_date=None, end_date=None, step=1):
+        """
+        Totals per bucket of `step` days from start_date (or the first day)
+        to end_date: {"dates": [bucket start, ...], "authors": {author: {measure: [...]}}}.
+        """
+        lo, hi = self._bounds(start_date, end_date)
+        edges = np.append(np.arange(lo, hi, step), hi)
+        buckets = self.prefix[:, edges[1:]] - self.prefix[:, edges[:-1]]
+        return {
+            "dates": [_date(self.origin + int(d)) for d in edges[:-1]],
+            "authors": {
+                author: {measure: buckets[i, :, j].tolist() for j, measure in enumerate(MEASURES)}
+                for i, author in enumerate(self.authors) if buckets[i, :, 0].any()
+            },
+        }
+
+    def save(self, path):
+        """Daily counts, authors and seen shas (20 bytes each) in one compressed .npz."""
+        shas = np.frombuffer(b"".join(bytes.fromhex(s) for s in sorted(self.shas)), dtype=np.uint8)
+        np.savez_compressed(
+            path,
+            authors=np.array(self.authors, dtype=str),
+            origin=np.int64(self.origin),
+            counts=self.counts.astype(np.int32),
+            shas=shas.reshape(-1, 20),
+            key=np.array(self.key or ""),
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            shas = (row.tobytes().hex() for row in data["shas"])
+            return cls(data["authors"].tolist(), int(data["origin"]), data["counts"].astype(np.int64), shas,
+                       str(data["key"]) or None)
+
+    @classmethod
+    def load_or_new(cls, path, key):
+        """The cube saved at path when it was counted against the same key, otherwise an empty one."""
+        if path and os.path.exists(path):
+            try:
+                cube = cls.load(path)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Ignoring unreadable activity cube {path}: {e}")
+            else:
+                if cube.key == key:
+                    return cube
+        return cls(key=key)
+
+
+def main():
+    p = argparse.ArgumentParser(description="Totals or a timeline from a saved activity cube")
+    p.add_argument("cube", help="<output>.activity.npz written by main.py")
+    p.add_argument("--start-date", dest="start_date", default=None)
+    p.add_argument("--end-date", dest="end_date", default=None)
+    p.add_argument("--timeline", action="store_true", help="per-bucket totals instead of window totals")
+    p.add_argument("--step", type=int, default=1, help="days per timeline bucket")
+    args = p.parse_args()
+    cube = ActivityCube.load(args.cube)
+    if args.timeline:
+        result = cube.timeline(args.start_date, args.end_date, max(args.step, 1))
+    else:
+        result = cube.window(args.start_date, args.end_date)
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
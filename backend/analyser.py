@@ -1,11 +1,20 @@
 import os
 import re
+import codecs
+import random
+from contextlib import nullcontext
+import hashlib
 import lizard
+from lizard_languages import get_reader_for
 from git import Repo
 from collections import defaultdict
-from ignoreFiles import should_ignore, IGNORE_DIRS
-from datetime import datetime, timezone
+from ignoreFiles import should_ignore
 from commitStats import parse_date
+from gitUtils import changed_files, BlobReader, fetch_history_blobs, blame_author_lines
+from fileClassifier import classify_files
+from deadline import Deadline, completeness
+from instrumentation import span
+from cloneIndex import Fingerprinter, winnow, MIN_TOKENS
 
 
 def calculate_hotspots(complexity, callFrequency, maxComplexity, maxFrequency):
@@ -14,7 +23,53 @@ def calculate_hotspots(complexity, callFrequency, maxComplexity, maxFrequency):
     return round(0.5 * normComplexity + 0.5 * normFrequency, 4)
 
 
-def calculate_call_frequency(tempFolder, analyseRepo):
+def function_complexity(func):
+    """The complexity score every function metric uses: CCN/10 + tokens/100."""
+    return (func.cyclomatic_complexity / 10) + (func.token_count / 100)
+
+
+def decode_source(data):
+    """Blob bytes as lizard would read the file: BOM and newlines handled, lenient UTF-8."""
+    if data.startswith(codecs.BOM_UTF8):
+        data = data[len(codecs.BOM_UTF8):]
+    try:
+        text, exact = data.decode("utf-8"), True
+    except UnicodeDecodeError:
+        text, exact = data.decode("utf-8", errors="ignore"), False
+    return text.replace("\r\n", "\n").replace("\r", "\n"), exact
+
+
+def source_files(tempFolder, files, blobs=None, texts=None):
+    # Absolute paths of the files lizard has a reader for, skipping identical
+    # copies as lizard.analyze() does. With blobs (a bare clone) the contents
+    # come from the object database and are kept in texts for lizard.
+    seen = set()
+    result = []
+    for relPath in files:
+        absPath = os.path.join(tempFolder, relPath)
+        if not get_reader_for(absPath):
+            continue
+        if blobs is None:
+            digest = lizard.md5_hash_file(absPath)
+        else:
+            data = blobs.read(relPath)
+            if data is None:
+                continue
+            texts[absPath], exact = decode_source(data)
+            digest = hashlib.md5(texts[absPath].encode("utf-8")).hexdigest() if exact else None
+        if digest and digest in seen:
+            continue
+        seen.add(digest)
+        result.append(absPath)
+    return result
+
+
+def calculate_call_frequency(tempFolder, analyseRepo, files, deadline=None, blobs=None, progress=None):
+    """
+    Calls of every analysed function name across files. Under a deadline the
+    files are scanned in the same fixed random order as the other passes, and
+    the fraction scanned goes into progress["calls"].
+    """
     callCounts = defaultdict(int)
 
     allFunctionNames = set()
@@ -23,40 +78,98 @@ def calculate_call_frequency(tempFolder, analyseRepo):
             if func.name:
                 allFunctionNames.add(func.name)
 
-    for root, dirs, files in os.walk(tempFolder):
-        dirs[:] = [d for d in dirs if d not in IGNORE_DIRS]
-        for filename in files:
-            absPath = os.path.join(root, filename)
-            relPath = os.path.relpath(absPath, tempFolder)
-            if should_ignore(relPath):
-                continue
-            try:
+    bounded = deadline is not None and deadline.end is not None
+    if bounded:
+        files = list(files)
+        random.Random(0).shuffle(files)
+    scanned = 0
+    for relPath in files:
+        if bounded and deadline.expired():
+            break
+        scanned += 1
+        absPath = os.path.join(tempFolder, relPath)
+        try:
+            if blobs is not None:
+                content = blobs.read(relPath).decode("utf-8", errors="ignore")
+            else:
                 with open(absPath, "r", encoding="utf-8", errors="ignore") as f:
                     content = f.read()
-                for funcName in allFunctionNames:
-                    count = len(re.findall(rf'\b{re.escape(funcName)}\s*\(', content))
-                    callCounts[funcName] += count
-            except Exception:
-                continue
+            for funcName in allFunctionNames:
+                count = len(re.findall(rf'\b{re.escape(funcName)}\s*\(', content))
+                callCounts[funcName] += count
+        except Exception:
+            continue
 
+    if progress is not None:
+        progress["calls"] = completeness(scanned, len(files))
     return callCounts
 
 
+def blame_functions(repo, functionsToBlame, callCounts, deadline):
+    """Blame each (relPath, func) until the deadline; returns (allFunctions, hotspotCandidates, blamed)."""
+    # First pass — collect all function data for percentage_of_functions_written
+    # and hotspot analysis
+    hotspotCandidates = []   # only complex functions (hotspot candidates)
+    allFunctions = []        # all functions (for ownership percentages)
+
+    blamed = 0
+    for relPath, func in functionsToBlame:
+        if deadline.expired():
+            break
+        blamed += 1
+        startLine = func.start_line
+        endLine = func.end_line
+
+        try:
+            linesByAuthor = blame_author_lines(repo, relPath, '-w', '-L', f"{startLine},{endLine}")
+        except Exception:
+            continue
+
+        totalFunctionLines = sum(linesByAuthor.values())
+        if totalFunctionLines == 0:
+            continue
+
+        complexity = function_complexity(func)
+        callFrequency = callCounts.get(func.name, 0)
+
+        functionRecord = {
+            "path": relPath,
+            "func": func,
+            "complexity": complexity,
+            "callFrequency": callFrequency,
+            "funcName": func.name,
+            "linesByAuthor": dict(linesByAuthor),
+            "totalLines": totalFunctionLines,
+        }
+
+        allFunctions.append(functionRecord)
+
+        # Only non-trivial functions are hotspot candidates
+        if complexity >= 0.5:
+            hotspotCandidates.append(functionRecord)
+
+    return allFunctions, hotspotCandidates, blamed
+
+
 # Analysing each function in the repo
-def analyse_functions(tempFolder, start_date=None, end_date=None):
+def analyse_functions(tempFolder, start_date=None, end_date=None, files=None, deadline=None, progress=None,
+                      index=None, clones=None):
+    """
+    Per-author complexity, function ownership and hotspot shares. With a
+    deadline, files, call sites and functions are worked through in a fixed
+    random order until it expires, so a partial result is an unbiased sample;
+    the fractions covered are written into `progress` when it is given. With a
+    `clones` list, the winnowed fingerprints of every blamed function of at
+    least MIN_TOKENS tokens are appended to it for the clone index.
+    """
     print("Analysing repository... please wait ...")
-    exclude_pattern = [f"*/{d}/*" for d in IGNORE_DIRS]
-    analyseRepo = list(lizard.analyze([tempFolder], exclude_pattern=exclude_pattern))
     repo = Repo(tempFolder)
-
-    complexityByAuthor = defaultdict(list)
-    functionsOwnedByAuthor = defaultdict(float)
-    totalFunctions = 0
-
-    # filter out ignored dirs/files
-    analyseRepo = [
-        f for f in analyseRepo if not should_ignore(f.filename)
-    ]
+    deadline = deadline or Deadline()
+    progress = progress if progress is not None else {}
+    # Binary, generated, minified and oversized files never reach lizard
+    if files is None:
+        files = classify_files(repo).included
+    analysedFiles = files
 
     # For sprint mode, only analyse files changed in date range
     if start_date or end_date:
@@ -65,89 +178,86 @@ def analyse_functions(tempFolder, start_date=None, end_date=None):
         if end_dt:
             end_dt = end_dt.replace(hour=23, minute=59, second=59)
 
-        changed_files = set()
-        seen_hashes = set()
-        for ref in repo.references:
-            try:
-                for commit in repo.iter_commits(ref):
-                    if commit.hexsha in seen_hashes:
-                        continue
-                    seen_hashes.add(commit.hexsha)
-                    if len(commit.parents) > 1:
-                        continue
-                    commit_dt = datetime.fromtimestamp(commit.committed_date, tz=timezone.utc)
-                    if start_dt and commit_dt < start_dt:
-                        continue
-                    if end_dt and commit_dt > end_dt:
-                        continue
-                    for f in commit.stats.files:
-                        changed_files.add(f.replace("\\", "/"))
-            except Exception:
-                continue
-
+        if index is not None:
+            sprintFiles = index.changed_files(start_dt, end_dt)
+        else:
+            sprintFiles = changed_files(repo, start_dt, end_dt)
+        analysedFiles = [f for f in files if f in sprintFiles]
+
+    # A bare clone is read through one cat-file process instead of the disk
+    with (BlobReader(repo) if repo.bare else nullcontext()) as blobs:
+        texts = {}
+        sourceFiles = source_files(tempFolder, analysedFiles, blobs, texts)
+        if deadline.end is not None:
+            random.Random(0).shuffle(sourceFiles)
+        # Fingerprints come from the tokens lizard reads anyway
+        fingerprinter = Fingerprinter() if clones is not None else None
+        extensions = lizard.get_extensions([]) + ([fingerprinter] if fingerprinter else [])
+        if blobs is None:
+            fileInfos = lizard.analyze_files(sourceFiles, exts=extensions)
+        else:
+            analyzer = lizard.FileAnalyzer(extensions)
+            fileInfos = (analyzer.analyze_source_code(path, texts.pop(path)) for path in sourceFiles)
+        analyseRepo = []
+        with span("lizard", files=len(sourceFiles)):
+            for fileInfo in fileInfos:
+                analyseRepo.append(fileInfo)
+                if deadline.expired():
+                    break
+        progress["files"] = completeness(len(analyseRepo), len(sourceFiles))
+
+        complexityByAuthor = defaultdict(list)
+        functionsOwnedByAuthor = defaultdict(float)
+        totalFunctions = 0
+
+        # filter out ignored dirs/files
         analyseRepo = [
-            f for f in analyseRepo
-            if os.path.relpath(f.filename, tempFolder).replace("\\", "/") in changed_files
+            f for f in analyseRepo if not should_ignore(os.path.relpath(f.filename, tempFolder))
         ]
-        print(f"Sprint: {len(changed_files)} files changed, {len(analyseRepo)} analysable")
-
-    totalCCN = [f.cyclomatic_complexity for file in analyseRepo for f in file.function_list]
-
-    totalCCN = [f.cyclomatic_complexity for file in analyseRepo for f in file.function_list]
-    if not totalCCN:
-        print("No functions found in repository.")
-        return {}
+        if start_date or end_date:
+            print(f"Sprint: {len(sprintFiles)} files changed, {len(analyseRepo)} analysable")
 
-    # Calculate call frequency for all functions
-    callCounts = calculate_call_frequency(tempFolder, analyseRepo)
+        totalCCN = [f.cyclomatic_complexity for file in analyseRepo for f in file.function_list]
+        if not totalCCN:
+            print("No functions found in repository.")
+            progress["functions"] = progress["completeness"] = progress["files"]
+            return {}
 
-    # First pass — collect all function data for percentage_of_functions_written
-    # and hotspot analysis
-    hotspotCandidates = []   # only complex functions (hotspot candidates)
-    allFunctions = []        # all functions (for ownership percentages)
+        # Calculate call frequency for all functions
+        with span("call_frequency"):
+            callCounts = calculate_call_frequency(tempFolder, analyseRepo, files, deadline, blobs, progress)
 
+    functionsToBlame = []
     for file in analyseRepo:
         relPath = os.path.relpath(file.filename, tempFolder)
-        if should_ignore(relPath) or not os.path.exists(file.filename):
+        if should_ignore(relPath) or (blobs is None and not os.path.exists(file.filename)):
             continue
-
-        for func in file.function_list:
-            startLine = func.start_line
-            endLine = func.end_line
-
-            try:
-                blameOutput = repo.git.blame('-w', '-L', f"{startLine},{endLine}", '--line-porcelain', relPath)
-            except Exception:
-                continue
-
-            linesByAuthor = defaultdict(int)
-            currentAuthor = None
-            for line in blameOutput.splitlines():
-                if line.startswith("author "):
-                    currentAuthor = line.replace("author ", "").strip()
-                elif line.startswith("\t") and currentAuthor:
-                    linesByAuthor[currentAuthor] += 1
-
-            totalFunctionLines = sum(linesByAuthor.values())
-            if totalFunctionLines == 0:
+        functionsToBlame.extend((relPath, func) for func in file.function_list)
+    if deadline.end is not None:
+        random.Random(0).shuffle(functionsToBlame)
+
+    with span("fetch_blobs"):
+        fetch_history_blobs(repo, {relPath for relPath, _ in functionsToBlame})
+    with span("blame_functions", functions=len(functionsToBlame)):
+        allFunctions, hotspotCandidates, blamed = blame_functions(repo, functionsToBlame, callCounts, deadline)
+
+    progress["functions"] = completeness(blamed, len(functionsToBlame))
+    progress["completeness"] = round(progress["files"] * progress["calls"] * progress["functions"], 4)
+
+    if fingerprinter is not None:
+        for funcInfo in allFunctions:
+            tokens = fingerprinter.tokens(funcInfo["func"])
+            if len(tokens) < MIN_TOKENS:
                 continue
-
-            complexity = (func.cyclomatic_complexity / 10) + (func.token_count / 100)
-            callFrequency = callCounts.get(func.name, 0)
-
-            functionRecord = {
-                "complexity": complexity,
-                "callFrequency": callFrequency,
-                "funcName": func.name,
-                "linesByAuthor": dict(linesByAuthor),
-                "totalLines": totalFunctionLines,
-            }
-
-            allFunctions.append(functionRecord)
-
-            # Only non-trivial functions are hotspot candidates
-            if complexity >= 0.5:
-                hotspotCandidates.append(functionRecord)
+            linesByAuthor = funcInfo["linesByAuthor"]
+            clones.append({
+                "path": funcInfo["path"],
+                "name": funcInfo["funcName"],
+                "start_line": funcInfo["func"].start_line,
+                "end_line": funcInfo["func"].end_line,
+                "author": max(linesByAuthor, key=linesByAuthor.get),
+                "fingerprints": winnow(tokens),
+            })
 
     if not allFunctions:
         print("No function data collected.")
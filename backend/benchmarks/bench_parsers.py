@@ -0,0 +1,150 @@
+# Benchmark for the document parsers on synthetic corpora (benchmarks/synthetic_docs.py).
+# Usage: python3 benchmarks/bench_parsers.py [--scales small,medium,large] [--repeat 3]
+#                                            [--save-baseline] [--check] [--tolerance 0.25]
+#
+# Cold start (importing the parser module in a fresh interpreter, which is
+# where spaCy and NLTK load their models) is reported separately from the
+# per-document cost, which is timed in-process after the import. Peak memory
+# is the tracemalloc high-water mark of one extra, untimed parse.
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import importlib
+import tempfile
+import tracemalloc
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PARSERS_DIR = os.path.join(BENCH_DIR, "..", "parsers")
+sys.path.insert(0, PARSERS_DIR)
+from synthetic_docs import SCALES, build_corpus
+
+BASELINE_PATH = os.path.join(BENCH_DIR, "baselines", "parsers.json")
+MIN_DELTA_SECONDS = 0.05
+
+# name: (module, function, corpus document, size unit for throughput)
+PARSERS = {
+    "parse_docx_with_metrics": ("parse_docx_with_metrics", "parse_docx_with_metrics", "sprint_report", "pages"),
+    "parse_project_plan_docx": ("parse_project_plan_docx", "parse_project_plan_docx", "project_plan", "pages"),
+    "parse_worklog_docx": ("worklog_parser", "parse_worklog_docx", "worklog_docx", "weeks"),
+    "parse_worklog_pdf": ("worklog_parser", "parse_worklog_pdf", "worklog_pdf", "weeks"),
+    "parse_peer_review": ("parse_peer_review", "parse_peer_review", "peer_review", "students"),
+    "parse_attendance_xlsx": ("attendance", "parse_attendance_xlsx", "attendance", "weeks"),
+}
+
+
+def time_call(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def cold_start(module):
+    """Seconds to import `module` in a new interpreter, or None with the reason it failed."""
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=PARSERS_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        lines = result.stderr.strip().splitlines()
+        return None, lines[-1] if lines else "import failed"
+    return float(result.stdout.strip().splitlines()[-1]), None
+
+
+def peak_memory_mb(func):
+    tracemalloc.start()
+    try:
+        func()
+        return round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 2)
+    finally:
+        tracemalloc.stop()
+
+
+def bench_parser(name, corpora, repeat):
+    module_name, function_name, document, unit = PARSERS[name]
+    seconds, reason = cold_start(module_name)
+    if seconds is None:
+        return {"skipped": reason}
+    parse = getattr(importlib.import_module(module_name), function_name)
+    # The attendance parser writes its JSON as it goes
+    extra = (os.devnull,) if name == "parse_attendance_xlsx" else ()
+
+    result = {"cold_start": round(seconds, 4), "scales": {}}
+    for scale, (paths, shape) in corpora.items():
+        path = paths[document]
+        run = lambda: parse(path, *extra)
+        perDocument = time_call(run, repeat)
+        result["scales"][scale] = {
+            "seconds": round(perDocument, 4),
+            f"{unit}_per_second": round(shape[unit] / perDocument, 1) if perDocument else None,
+            "peak_mb": peak_memory_mb(run),
+            "bytes": os.path.getsize(path),
+        }
+    return result
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, result in results["parsers"].items():
+        base = baseline.get("parsers", {}).get(name, {})
+        pairs = [(f"{name}/cold_start", result.get("cold_start"), base.get("cold_start"))]
+        for scale, timing in result.get("scales", {}).items():
+            before = base.get("scales", {}).get(scale, {}).get("seconds")
+            pairs.append((f"{name}/{scale}", timing["seconds"], before))
+        for label, value, before in pairs:
+            if value and before and value > before * (1 + tolerance) and value - before > MIN_DELTA_SECONDS:
+                regressions.append(f"{label}: {before:.3f}s -> {value:.3f}s ({value / before - 1:+.0%})")
+    return regressions
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--scales", default="small,medium,large", help=f"comma-separated, from {sorted(SCALES)}")
+    p.add_argument("--parsers", default=",".join(PARSERS), help="comma-separated subset to run")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--baseline", default=BASELINE_PATH)
+    p.add_argument("--save-baseline", dest="save_baseline", action="store_true")
+    p.add_argument("--check", action="store_true", help="exit 1 if anything regressed past --tolerance")
+    p.add_argument("--tolerance", type=float, default=0.25)
+    args = p.parse_args()
+
+    results = {"python": platform.python_version(), "platform": platform.platform(), "parsers": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        corpora = {}
+        for scale in args.scales.split(","):
+            shape = SCALES[scale]
+            corpora[scale] = (build_corpus(os.path.join(tmp, scale), **shape), shape)
+
+        for name in args.parsers.split(","):
+            result = results["parsers"][name] = bench_parser(name, corpora, args.repeat)
+            if "skipped" in result:
+                print(f"{name}: skipped ({result['skipped']})")
+                continue
+            timings = ", ".join(f"{scale} {t['seconds'] * 1000:.1f} ms / {t['peak_mb']} MB"
+                                for scale, t in result["scales"].items())
+            print(f"{name}: cold start {result['cold_start']:.2f} s; {timings}")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if not regressions:
+            print(f"No parser more than {args.tolerance:.0%} slower than {args.baseline}")
+        if regressions and args.check:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+# Benchmark for the git analysis pipeline on synthetic repositories, offline.
+# Usage: python3 benchmarks/bench_pipeline.py [--scales small,medium] [--repeat 3]
+#                                             [--save-baseline] [--check] [--tolerance 0.25]
+#                                             [--clone-strategies]
+#
+# Each scale is generated once (benchmarks/synthetic_repo.py) and cloned from
+# a file:// URL the way main.py clones from GitHub. The stages are timed one
+# by one (best of --repeat), then main.py is run end to end and its summary
+# sidecar supplies the per-stage timings of the concurrent pipeline.
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import platform
+import tempfile
+import subprocess
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, BACKEND_DIR)
+from git import Repo
+from synthetic_repo import SCALES, build_repo
+from analyser import analyse_functions
+from LOC import calculate_LOC
+from commitStats import get_commit_stats, build_commits_json
+from metricsSetup import write_json, combine_json
+from fileClassifier import classify_files
+
+# Differences below this are timer noise on the small scales, whatever the ratio
+MIN_DELTA_SECONDS = 0.05
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "pipeline.json")
+
+
+def time_call(func, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def synthetic_repo(cache_dir, shape):
+    """Path of a repository with this shape, generating it on first use."""
+    key = hashlib.sha1(json.dumps(shape, sort_keys=True).encode()).hexdigest()[:12]
+    path = os.path.join(cache_dir, f"repo-{key}")
+    if not os.path.isdir(os.path.join(path, ".git")):
+        shutil.rmtree(path, ignore_errors=True)
+        build_repo(path, **shape)
+    return path
+
+
+def bench_stages(repoPath, repeat, workDir):
+    clonePath = os.path.join(workDir, "clone")
+    seconds = {}
+    seconds["clone"], _ = time_call(lambda: (shutil.rmtree(clonePath, ignore_errors=True),
+                                             Repo.clone_from("file://" + repoPath, clonePath)), 1)
+    seconds["classify_files"], classification = time_call(lambda: classify_files(Repo(clonePath)), 1)
+    files = classification.included
+
+    seconds["get_commit_stats"], commitStats = time_call(lambda: get_commit_stats(clonePath), repeat)
+    seconds["calculate_LOC"], locPercentage = time_call(lambda: calculate_LOC(clonePath, files=files), repeat)
+    seconds["analyse_functions"], results = time_call(lambda: analyse_functions(clonePath, files=files), repeat)
+
+    outputJson = os.path.join(workDir, "output.json")
+    commitsJson = os.path.join(workDir, "commits.json")
+    write_json(outputJson, repoPath, results, locPercentage)
+    with open(commitsJson, "w", encoding="utf-8") as f:
+        json.dump(build_commits_json(commitStats), f)
+    seconds["combine_json"], _ = time_call(lambda: combine_json(
+        outputJson=outputJson, commitsJson=commitsJson,
+        finalStatsJson=os.path.join(workDir, "final.json")), repeat)
+    return {name: round(value, 4) for name, value in seconds.items()}
+
+
+def bench_end_to_end(repoPath, workDir):
+    output = os.path.join(workDir, "e2e", "bench_stats.json")
+    start = time.perf_counter()
+    subprocess.run([sys.executable, os.path.join(BACKEND_DIR, "main.py"), "--repo-url", "file://" + repoPath,
+                    "--output", output], cwd=workDir, check=True, stdout=subprocess.DEVNULL)
+    elapsed = time.perf_counter() - start
+    with open(os.path.splitext(output)[0] + ".summary.json", encoding="utf-8") as f:
+        summary = json.load(f)
+    return {
+        "seconds": round(elapsed, 4),
+        "stages": {name: stage.get("seconds") for name, stage in summary.get("stages", {}).items()},
+    }
+
+
+# (metrics, sprint job) per clone strategy main.py picks on its own
+CLONE_JOBS = {
+    "shallow": ("commits", True),
+    "sparse": ("loc", True),
+    "blobless": ("loc,functions", False),
+}
+
+
+def bench_clone_strategies(repoPath, workDir):
+    """
+    main.py per clone strategy against a bare copy served over file:// (with
+    partial clone allowed, as on GitHub), next to the same job on a full
+    clone; the stats must come out identical.
+    """
+    served = os.path.join(workDir, "served.git")
+    subprocess.run(["git", "clone", "-q", "--bare", repoPath, served], check=True)
+    subprocess.run(["git", "-C", served, "config", "uploadpack.allowFilter", "true"], check=True)
+    # The last tenth of the history as the sprint
+    dates = subprocess.run(["git", "-C", served, "log", "--format=%cs", "main"],
+                           capture_output=True, text=True, check=True).stdout.split()
+    sprint = ["--start-date", dates[len(dates) // 10], "--end-date", dates[0]]
+
+    results = {}
+    for strategy, (metrics, isSprint) in CLONE_JOBS.items():
+        runs = {}
+        for mode in ("full", strategy):
+            output = os.path.join(workDir, f"clone-{strategy}-{mode}", "bench_stats.json")
+            start = time.perf_counter()
+            subprocess.run([sys.executable, os.path.join(BACKEND_DIR, "main.py"), "--repo-url", "file://" + served,
+                            "--output", output, "--metrics", metrics, "--clone-strategy", mode]
+                           + (sprint if isSprint else []), cwd=workDir, check=True, stdout=subprocess.DEVNULL)
+            with open(os.path.splitext(output)[0] + ".summary.json", encoding="utf-8") as f:
+                summary = json.load(f)
+            with open(output, encoding="utf-8") as f:
+                stats = json.load(f)
+            runs[mode] = (round(time.perf_counter() - start, 4), summary["clone"]["bytes_transferred"], stats)
+        results[strategy] = {
+            "metrics": metrics,
+            "seconds": runs[strategy][0],
+            "bytes": runs[strategy][1],
+            "full_seconds": runs["full"][0],
+            "full_bytes": runs["full"][1],
+            "identical": runs[strategy][2] == runs["full"][2],
+        }
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Lines describing every timing that got more than `tolerance` slower than the baseline."""
+    regressions = []
+    for scale, result in results["scales"].items():
+        base = baseline.get("scales", {}).get(scale)
+        if not base:
+            continue
+        pairs = [(f"{scale}/{name}", value, base["stages"].get(name)) for name, value in result["stages"].items()]
+        pairs.append((f"{scale}/end_to_end", result["end_to_end"]["seconds"], base["end_to_end"]["seconds"]))
+        for strategy, timing in result.get("clone_strategies", {}).items():
+            before = base.get("clone_strategies", {}).get(strategy, {}).get("seconds")
+            pairs.append((f"{scale}/clone_{strategy}", timing["seconds"], before))
+        for label, value, before in pairs:
+            if before and value > before * (1 + tolerance) and value - before > MIN_DELTA_SECONDS:
+                regressions.append(f"{label}: {before:.3f}s -> {value:.3f}s ({value / before - 1:+.0%})")
+    return regressions
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--scales", default="small,medium", help=f"comma-separated, from {sorted(SCALES)}")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--cache-dir", dest="cache_dir", default=os.path.join(tempfile.gettempdir(), "bench-repos"))
+    p.add_argument("--baseline", default=BASELINE_PATH)
+    p.add_argument("--save-baseline", dest="save_baseline", action="store_true")
+    p.add_argument("--check", action="store_true", help="exit 1 if anything regressed past --tolerance")
+    p.add_argument("--tolerance", type=float, default=0.25)
+    p.add_argument("--clone-strategies", dest="clone_strategies", action="store_true",
+                   help="also run main.py per clone strategy and compare bytes transferred with a full clone")
+    args = p.parse_args()
+
+    results = {
+        "python": platform.python_version(),
+        "git": subprocess.run(["git", "--version"], capture_output=True, text=True).stdout.strip(),
+        "platform": platform.platform(),
+        "scales": {},
+    }
+    os.makedirs(args.cache_dir, exist_ok=True)
+    for scale in args.scales.split(","):
+        shape = SCALES[scale]
+        repoPath = synthetic_repo(args.cache_dir, shape)
+        with tempfile.TemporaryDirectory() as workDir:
+            stages = bench_stages(repoPath, args.repeat, workDir)
+            endToEnd = bench_end_to_end(repoPath, workDir)
+            cloneStrategies = bench_clone_strategies(repoPath, workDir) if args.clone_strategies else {}
+        results["scales"][scale] = {"shape": shape, "stages": stages, "end_to_end": endToEnd}
+        print(f"{scale}: " + ", ".join(f"{name} {value * 1000:.0f} ms" for name, value in stages.items())
+              + f"; main.py {endToEnd['seconds']:.2f} s")
+        if cloneStrategies:
+            results["scales"][scale]["clone_strategies"] = cloneStrategies
+        for strategy, r in cloneStrategies.items():
+            print(f"  {strategy} ({r['metrics']}): {r['bytes'] / 1024:.0f} KiB in {r['seconds']:.2f} s, "
+                  f"full clone {r['full_bytes'] / 1024:.0f} KiB in {r['full_seconds']:.2f} s"
+                  + ("" if r["identical"] else "; STATS DIFFER"))
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if not regressions:
+            print(f"No stage more than {args.tolerance:.0%} slower than {args.baseline}")
+        if regressions and args.check:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# Benchmark for the worklog paragraph parser on long, multi-semester worklogs.
+# Usage: python3 benchmarks/bench_worklog.py [--weeks 520] [--repeat 5] [--docx]
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "parsers"))
+from worklog_parser import _parse_paragraphs, parse_worklog_docx
+
+
+def build_paragraphs(weeks, seed=0):
+    """Synthetic worklog text laid out the way students fill in the template."""
+    rng = random.Random(seed)
+    paragraphs = []
+    for week in range(1, weeks + 1):
+        paragraphs.append(f"Week {week}")
+        paragraphs.append(f"Date: {rng.randint(1, 28)}/{rng.randint(1, 12)}/2025")
+        paragraphs.append("Key tasks done / things attended")
+        for n in range(rng.randint(2, 6)):
+            paragraphs.append(f"Worked on feature {n} of the backend service and reviewed pull requests")
+        paragraphs.append("Key things learned")
+        for n in range(rng.randint(1, 4)):
+            paragraphs.append(f"Learned how component {n} interacts with the database layer")
+        paragraphs.append("Any literature read")
+        paragraphs.append("Read the framework documentation on request routing")
+        paragraphs.append("Issues / Challenges faced")
+        for n in range(rng.randint(0, 3)):
+            paragraphs.append(f"Blocked on deployment credentials for {n} days")
+        paragraphs.append("Plan for next week")
+        paragraphs.append("Continue integration work")
+        paragraphs.append("TOTAL WEEKLY TIME SPENT")
+        paragraphs.append(str(rng.randint(1, 5)))
+        paragraphs.append(str(rng.randint(6, 20)))
+    return paragraphs
+
+
+def write_docx(paragraphs, path):
+    from docx import Document
+    doc = Document()
+    for text in paragraphs:
+        doc.add_paragraph(text)
+    doc.save(path)
+
+
+def time_call(func, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--weeks", type=int, default=520)
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--docx", action="store_true", help="also time the full DOCX path")
+    args = p.parse_args()
+
+    paragraphs = build_paragraphs(args.weeks)
+    seconds, weeks = time_call(lambda: _parse_paragraphs(paragraphs, {}), args.repeat)
+    print(f"_parse_paragraphs: {len(paragraphs)} paragraphs, {len(weeks)} weeks "
+          f"in {seconds * 1000:.2f} ms ({len(paragraphs) / seconds:,.0f} paragraphs/s)")
+
+    if args.docx:
+        with tempfile.TemporaryDirectory() as tmp:
+            docxPath = os.path.join(tmp, "worklog.docx")
+            write_docx(paragraphs, docxPath)
+            seconds, weeks = time_call(lambda: parse_worklog_docx(docxPath), args.repeat)
+            print(f"parse_worklog_docx: {len(weeks)} weeks in {seconds * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+# Synthetic student documents for benchmarking the parsers: sprint reports and
+# project plans (DOCX), worklogs (DOCX and PDF), peer-review forms (DOCX) and
+# attendance sheets (XLSX), laid out the way the templates handed to students are.
+# Usage: python3 benchmarks/synthetic_docs.py /tmp/corpus [--scale medium] [--seed 0]
+import os
+import random
+import argparse
+from datetime import date, timedelta
+
+from bench_worklog import build_paragraphs
+
+WORDS = (
+    "team sprint backlog feature user story database service endpoint review "
+    "deployment testing integration requirement stakeholder client design "
+    "prototype interface latency schema migration release quality risk "
+    "mitigation estimate velocity retrospective documentation security access "
+    "component module refactor performance monitoring dashboard analysis"
+).split()
+
+SECTION_TITLES = [
+    "Project Overview", "Product Backlog", "Sprint Goals", "Architecture",
+    "Quality Plan", "Risk Management", "Testing Strategy", "Deployment",
+    "Retrospective", "Stakeholder Communication", "Document Management",
+    "Teamwork Roadmap", "Security Considerations", "Future Work",
+]
+CRITERIA = "ABCDEFGHIJ"
+
+# Roughly one A4 page of prose
+PARAGRAPHS_PER_PAGE = 6
+WORDS_PER_PARAGRAPH = 75
+
+SCALES = {
+    "small": {"pages": 5, "students": 4, "tables": 2, "weeks": 12},
+    "medium": {"pages": 30, "students": 6, "tables": 6, "weeks": 52},
+    "large": {"pages": 120, "students": 10, "tables": 20, "weeks": 260},
+}
+
+
+def _sentence(rng, words=15):
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def _paragraph(rng, words=WORDS_PER_PARAGRAPH):
+    sentences = []
+    while words > 0:
+        n = min(words, rng.randint(8, 22))
+        sentences.append(_sentence(rng, n))
+        words -= n
+    return " ".join(sentences)
+
+
+def _students(n):
+    return [f"Student{i:02d} Surname{i:02d}" for i in range(n)]
+
+
+def _section_titles(count):
+    return [SECTION_TITLES[i % len(SECTION_TITLES)] + (f" {i // len(SECTION_TITLES) + 1}" if i >= len(SECTION_TITLES) else "")
+            for i in range(count)]
+
+
+def _add_table(doc, headers, rows, merge_first_column=False):
+    table = doc.add_table(rows=1 + len(rows), cols=len(headers))
+    for cell, text in zip(table.rows[0].cells, headers):
+        cell.text = text
+    for r, values in enumerate(rows, start=1):
+        for cell, text in zip(table.rows[r].cells, values):
+            cell.text = text
+    if merge_first_column:
+        # Vertically merged name cells, as Word produces for multi-row entries
+        for r in range(1, len(rows), 2):
+            if r + 1 <= len(rows):
+                top, bottom = table.cell(r, 0), table.cell(r + 1, 0)
+                text = top.text
+                top.merge(bottom).text = text
+    return table
+
+
+def _add_sections(doc, rng, titles, pages):
+    paragraphs = max(pages * PARAGRAPHS_PER_PAGE, len(titles))
+    for i, title in enumerate(titles):
+        doc.add_heading(title, level=1)
+        if i % 3 == 2:
+            doc.add_heading(f"{i + 1}.1 {rng.choice(WORDS).title()} details", level=2)
+        for _ in range(paragraphs // len(titles)):
+            doc.add_paragraph(_paragraph(rng))
+
+
+def _filler_tables(doc, rng, count, merged):
+    for t in range(count):
+        doc.add_paragraph(f"Table {t + 1}: {rng.choice(WORDS)} summary")
+        rows = [[f"{rng.choice(WORDS)} {r}", _sentence(rng, 6), str(rng.randint(1, 20))] for r in range(8)]
+        _add_table(doc, ["Item", "Notes", "Estimate"], rows, merge_first_column=merged)
+
+
+def sprint_report(path, pages=5, students=4, tables=2, merged_cells=True, seed=0):
+    from docx import Document
+    rng = random.Random(seed)
+    doc = Document()
+    titles = _section_titles(max(pages // 2, 4))
+    names = _students(students)
+    doc.add_heading("Sprint Report", level=0)
+    doc.add_paragraph("Contribution to the report")
+    _add_table(doc, ["Student Name", "Student Id", "Contribution to the report"],
+               [[name, str(100000 + i), ", ".join(rng.sample(titles, min(3, len(titles))))]
+                for i, name in enumerate(names)])
+    _add_sections(doc, rng, titles, pages)
+    _filler_tables(doc, rng, tables, merged_cells)
+    doc.save(path)
+    return path
+
+
+def project_plan(path, pages=5, students=4, tables=2, merged_cells=True, seed=0):
+    from docx import Document
+    rng = random.Random(seed)
+    doc = Document()
+    titles = _section_titles(max(pages // 2, 4))
+    names = _students(students)
+    doc.add_heading("Team and Project Plan", level=0)
+    _add_table(doc, ["Student Name", "Student ID", "Description of contribution in team and project planning"],
+               [[name, str(100000 + i), "\n".join(["Own team profile", "Team role justification"]
+                                                  + rng.sample(titles, min(2, len(titles))))]
+                for i, name in enumerate(names)])
+    doc.add_heading("1. Team Profile", level=1)
+    profile = []
+    for name in names:
+        profile.append([name, _sentence(rng, 8), _sentence(rng, 10)])
+        profile.append([name, _sentence(rng, 8), _sentence(rng, 10)])
+    half = len(profile) // 2
+    _add_table(doc, ["Team member", "Technical skills", "Experience"], profile[:half], merge_first_column=merged_cells)
+    # Word splits long tables at page breaks into a headerless continuation
+    _add_table(doc, profile[half], profile[half + 1:])
+    doc.add_heading("2. Team Roles", level=1)
+    _add_table(doc, ["Student", "Team role", "Justification"],
+               [[name, rng.choice(["Scrum master", "Developer", "Tester", "Designer"]), _sentence(rng, 20)]
+                for name in names])
+    doc.add_heading("3. Risks", level=1)
+    _add_table(doc, ["Risk", "Impact on project", "Mitigation"],
+               [[_sentence(rng, 5), rng.choice(["High", "Medium", "Low"]), _sentence(rng, 12)] for _ in range(6)])
+    _add_sections(doc, rng, titles, pages)
+    _filler_tables(doc, rng, tables, merged_cells)
+    doc.save(path)
+    return path
+
+
+def worklog_docx(path, weeks=12, seed=0):
+    from docx import Document
+    doc = Document()
+    for text in build_paragraphs(weeks, seed):
+        doc.add_paragraph(text)
+    hours = doc.add_table(rows=weeks, cols=2)
+    for week in range(weeks):
+        hours.cell(week, 0).text = f"Week {week + 1}"
+        hours.cell(week, 1).text = str(random.Random(seed + week).randint(6, 20))
+    doc.save(path)
+    return path
+
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(lines, path, lines_per_page=50):
+    """A minimal text-only PDF (Helvetica, one line per text row) with no extra dependencies."""
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    objects = {1: b"<< /Type /Catalog /Pages 2 0 R >>", 3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"}
+    kids = []
+    for n, page in enumerate(pages):
+        page_id, content_id = 4 + 2 * n, 5 + 2 * n
+        rows = [b"BT /F1 10 Tf 50 800 Td 14 TL"]
+        rows += [b"(%s) '" % _pdf_escape(line[:110]).encode("latin-1", errors="replace") for line in page]
+        rows.append(b"ET")
+        stream = b"\n".join(rows)
+        objects[content_id] = b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        objects[page_id] = (b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id)
+        kids.append(b"%d 0 R" % page_id)
+    objects[2] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(pages))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = len(out)
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, objects[number])
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for number in sorted(objects):
+        out += b"%010d 00000 n \n" % offsets[number]
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(out)
+    return path
+
+
+def worklog_pdf(path, weeks=12, seed=0):
+    return write_pdf(build_paragraphs(weeks, seed), path)
+
+
+def peer_review(path, students=4, seed=0):
+    from docx import Document
+    rng = random.Random(seed)
+    names = _students(students)
+    doc = Document()
+    doc.add_heading("Peer Review Form", level=1)
+    doc.add_paragraph(f"Your name: {names[0]}")
+    _add_table(doc, ["No", "Team member names (including yourself)"] + list(CRITERIA),
+               [[str(i + 1), name] + [str(rng.randint(1, 5)) for _ in CRITERIA] for i, name in enumerate(names)])
+    doc.save(path)
+    return path
+
+
+def attendance(path, students=4, weeks=12, teams=1, seed=0):
+    import openpyxl
+    rng = random.Random(seed)
+    wb = openpyxl.Workbook()
+    sheet = wb.active
+    names = _students(students * teams)
+    team_of = {name: f"Team{i // students + 1}" for i, name in enumerate(names)}
+    headers = ["Week", "Date"] + (["Team"] if teams > 1 else []) + names + ["Reasons for Absence"]
+    sheet.append(headers)
+    start = date(2025, 2, 24)
+    for team in sorted(set(team_of.values())):
+        for week in range(1, weeks + 1):
+            row = [week, (start + timedelta(weeks=week - 1)).isoformat()] + ([team] if teams > 1 else [])
+            absent = []
+            for name in names:
+                if team_of[name] != team:
+                    row.append(None)
+                    continue
+                present = rng.random() > 0.1
+                row.append("Present" if present else "Absent")
+                if not present:
+                    absent.append(name)
+            row.append("; ".join(f"{name}: sick" for name in absent) or None)
+            sheet.append(row)
+    wb.save(path)
+    return path
+
+
+def build_corpus(directory, pages=5, students=4, tables=2, weeks=12, merged_cells=True, seed=0):
+    """One document of each kind; returns {kind: path}."""
+    os.makedirs(directory, exist_ok=True)
+
+    def at(name):
+        return os.path.join(directory, name)
+
+    return {
+        "sprint_report": sprint_report(at("sprint_report.docx"), pages, students, tables, merged_cells, seed),
+        "project_plan": project_plan(at("project_plan.docx"), pages, students, tables, merged_cells, seed),
+        "worklog_docx": worklog_docx(at("worklog.docx"), weeks, seed),
+        "worklog_pdf": worklog_pdf(at("worklog.pdf"), weeks, seed),
+        "peer_review": peer_review(at("peer_review.docx"), students, seed),
+        "attendance": attendance(at("attendance.xlsx"), students, weeks, seed=seed),
+    }
+
+
+def main():
+    p = argparse.ArgumentParser(description="Generate synthetic parser inputs")
+    p.add_argument("directory")
+    p.add_argument("--scale", choices=sorted(SCALES), default="small")
+    for key in ("pages", "students", "tables", "weeks"):
+        p.add_argument(f"--{key}", type=int, default=None)
+    p.add_argument("--no-merged-cells", dest="merged_cells", action="store_false")
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    shape = dict(SCALES[args.scale])
+    shape.update({k: getattr(args, k) for k in shape if getattr(args, k) is not None})
+    for kind, path in build_corpus(args.directory, merged_cells=args.merged_cells, seed=args.seed, **shape).items():
+        print(f"{kind}: {path} ({os.path.getsize(path):,} bytes)")
+
+
+if __name__ == "__main__":
+    main()
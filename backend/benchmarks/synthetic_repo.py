@@ -0,0 +1,226 @@
+# Deterministic synthetic git repositories for benchmarking, built offline with
+# one `git fast-import` stream.
+# Usage: python3 benchmarks/synthetic_repo.py /tmp/repo [--scale medium] [--commits N] [--authors N] ...
+import os
+import random
+import argparse
+import subprocess
+
+# Function templates per language; {name} and {n} are filled in. Each has a
+# branch and a loop so lizard reports a non-trivial complexity.
+LANGUAGES = {
+    "py": (
+        "def {name}(items, limit={n}):\n"
+        "    total = 0\n"
+        "    for item in items:\n"
+        "        if item > limit:\n"
+        "            total += item - limit\n"
+        "        else:\n"
+        "            total += {n}\n"
+        "    return total\n"
+    ),
+    "js": (
+        "function {name}(items, limit = {n}) {{\n"
+        "  let total = 0;\n"
+        "  for (const item of items) {{\n"
+        "    if (item > limit) {{\n"
+        "      total += item - limit;\n"
+        "    }} else {{\n"
+        "      total += {n};\n"
+        "    }}\n"
+        "  }}\n"
+        "  return total;\n"
+        "}}\n"
+    ),
+    "java": (
+        "    static int {name}(int[] items, int limit) {{\n"
+        "        int total = 0;\n"
+        "        for (int item : items) {{\n"
+        "            if (item > limit && limit != {n}) {{\n"
+        "                total += item - limit;\n"
+        "            }}\n"
+        "        }}\n"
+        "        return total;\n"
+        "    }}\n"
+    ),
+    "c": (
+        "int {name}(const int *items, int count) {{\n"
+        "    int total = 0;\n"
+        "    for (int i = 0; i < count; i++) {{\n"
+        "        if (items[i] > {n}) {{\n"
+        "            total += items[i];\n"
+        "        }}\n"
+        "    }}\n"
+        "    return total;\n"
+        "}}\n"
+    ),
+}
+
+# Wrappers around the function bodies, where a language needs one
+FILE_TEMPLATES = {"java": "public class {cls} {{\n{body}}}\n"}
+
+SCALES = {
+    "small": {"commits": 200, "authors": 4, "branches": 4, "files": 40, "functions": 6},
+    "medium": {"commits": 1000, "authors": 8, "branches": 12, "files": 250, "functions": 10},
+    "large": {"commits": 4000, "authors": 12, "branches": 40, "files": 1200, "functions": 14},
+}
+
+START_TIMESTAMP = 1735689600  # 2025-01-01T00:00:00Z
+COMMIT_INTERVAL = 3 * 3600
+
+
+class SyntheticFile:
+    def __init__(self, path, language, rng, functions):
+        self.path = path
+        self.language = language
+        self.functions = [self._function(rng) for _ in range(functions)]
+
+    def _function(self, rng):
+        return [f"fn_{rng.getrandbits(40):010x}", rng.randint(1, 99)]
+
+    def mutate(self, rng):
+        """Add, edit or remove a function, as a change in a real commit would."""
+        roll = rng.random()
+        if roll < 0.4 or not self.functions:
+            self.functions.insert(rng.randint(0, len(self.functions)), self._function(rng))
+        elif roll < 0.85:
+            rng.choice(self.functions)[1] = rng.randint(1, 99)
+        elif len(self.functions) > 1:
+            self.functions.pop(rng.randrange(len(self.functions)))
+
+    def copy(self):
+        clone = SyntheticFile.__new__(SyntheticFile)
+        clone.path, clone.language = self.path, self.language
+        clone.functions = [list(f) for f in self.functions]
+        return clone
+
+    def render(self):
+        body = "\n".join(LANGUAGES[self.language].format(name=name, n=n) for name, n in self.functions)
+        wrapper = FILE_TEMPLATES.get(self.language)
+        if wrapper:
+            cls = os.path.splitext(os.path.basename(self.path))[0]
+            body = wrapper.format(cls=cls, body=body)
+        return body.encode("utf-8")
+
+
+def _data(payload):
+    return b"data %d\n%s\n" % (len(payload), payload)
+
+
+def build_repo(path, commits=200, authors=4, branches=4, files=40, functions=6,
+               languages=("py", "js", "java", "c"), seed=0):
+    """
+    Create a repository at `path` with the given shape. The same arguments
+    always give the same commits (and SHAs), so results are comparable
+    across runs and machines.
+    """
+    rng = random.Random(seed)
+    people = [(f"Author{i:02d}", f"author{i:02d}@example.com") for i in range(authors)]
+    directories = ["src", "src/core", "src/api", "lib", "tests"]
+
+    main_files = {}
+    for i in range(files):
+        language = languages[i % len(languages)]
+        name = f"Module{i:04d}" if language == "java" else f"module_{i:04d}"
+        filePath = f"{rng.choice(directories)}/{name}.{language}"
+        main_files[filePath] = SyntheticFile(filePath, language, rng, rng.randint(1, functions * 2 - 1))
+
+    # A quarter of the commits go to feature branches, each merged back
+    # before the next one starts; the rest are on main
+    per_branch = max((commits // 4) // branches, 1) if branches else 0
+    main_commits = max(commits - 1 - branches * (per_branch + 1), 1)
+    branch_starts = sorted(rng.sample(range(main_commits), min(branches, main_commits)))
+
+    stream = []
+    mark = 0
+    timestamp = START_TIMESTAMP
+
+    def commit(ref, changed, parent=None, merge=None, message="change"):
+        nonlocal mark, timestamp
+        mark += 1
+        timestamp += COMMIT_INTERVAL
+        name, email = rng.choice(people)
+        stream.append(b"commit %s\nmark :%d\n" % (ref.encode(), mark))
+        stream.append(b"author %s <%s> %d +0000\n" % (name.encode(), email.encode(), timestamp))
+        stream.append(b"committer %s <%s> %d +0000\n" % (name.encode(), email.encode(), timestamp))
+        stream.append(_data(message.encode()))
+        if parent:
+            stream.append(b"from :%d\n" % parent)
+        if merge:
+            stream.append(b"merge :%d\n" % merge)
+        for f in changed:
+            stream.append(b"M 100644 inline %s\n" % f.path.encode())
+            stream.append(_data(f.render()))
+        return mark
+
+    # Root commit with every file
+    head = commit("refs/heads/main", list(main_files.values()), message="Initial import")
+    made = 1
+    main_made = 0
+
+    def main_commit():
+        changed = rng.sample(list(main_files.values()), min(rng.randint(1, 3), len(main_files)))
+        for f in changed:
+            f.mutate(rng)
+        return commit("refs/heads/main", changed, parent=head)
+
+    for b, start in enumerate(branch_starts):
+        # Main-line commits up to the branch point
+        while main_made < start:
+            head = main_commit()
+            made += 1
+            main_made += 1
+
+        ref = f"refs/heads/feature-{b:03d}"
+        branch_files = {p: f.copy() for p, f in main_files.items()}
+        touched = set()
+        tip = head
+        for _ in range(per_branch):
+            changed = rng.sample(list(branch_files.values()), min(rng.randint(1, 3), len(branch_files)))
+            for f in changed:
+                f.mutate(rng)
+                touched.add(f.path)
+            tip = commit(ref, changed, parent=tip)
+            made += 1
+
+        # A main-line commit in between so the merge is a real merge
+        changed = [f for p, f in main_files.items() if p not in touched][:1]
+        for f in changed:
+            f.mutate(rng)
+        head = commit("refs/heads/main", changed, parent=head)
+        made += 1
+        for p in touched:
+            main_files[p] = branch_files[p]
+        head = commit("refs/heads/main", [main_files[p] for p in sorted(touched)], parent=head,
+                      merge=tip, message=f"Merge feature-{b:03d}")
+
+    while made < commits:
+        head = main_commit()
+        made += 1
+
+    os.makedirs(path, exist_ok=True)
+    subprocess.run(["git", "init", "-q", path], check=True)
+    subprocess.run(["git", "fast-import", "--quiet"], cwd=path, input=b"".join(stream), check=True)
+    subprocess.run(["git", "symbolic-ref", "HEAD", "refs/heads/main"], cwd=path, check=True)
+    subprocess.run(["git", "checkout", "-q", "-f", "main"], cwd=path, check=True)
+    return path
+
+
+def main():
+    p = argparse.ArgumentParser(description="Generate a synthetic git repository")
+    p.add_argument("path")
+    p.add_argument("--scale", choices=sorted(SCALES), default="small")
+    for key in ("commits", "authors", "branches", "files", "functions"):
+        p.add_argument(f"--{key}", type=int, default=None)
+    p.add_argument("--languages", default="py,js,java,c")
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    shape = dict(SCALES[args.scale])
+    shape.update({k: getattr(args, k) for k in shape if getattr(args, k) is not None})
+    build_repo(args.path, languages=tuple(args.languages.split(",")), seed=args.seed, **shape)
+    print(f"Built {args.path}: {shape}")
+
+
+if __name__ == "__main__":
+    main()
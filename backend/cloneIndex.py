@@ -0,0 +1,194 @@
+import os
+import re
+import json
+import sqlite3
+import hashlib
+import argparse
+
+# Winnowing (Schleimer et al., 2003) over normalised lizard tokens: every
+# K-gram is hashed and the smallest hash of each run of WINDOW consecutive
+# K-grams is kept, so any match of at least K + WINDOW - 1 tokens shares a
+# fingerprint while a function keeps only about 2 / (WINDOW + 1) of them.
+K = 10
+WINDOW = 6
+MIN_TOKENS = 40
+MIN_SIMILARITY = 0.7
+# Fingerprints shared by more functions than this are boilerplate; skipping
+# them keeps the pair count linear in the size of the index
+MAX_POSTINGS = 50
+
+IDENTIFIER = re.compile(r"^[A-Za-z_$][\w$]*$")
+NUMBER = re.compile(r"^\.?\d")
+KEYWORDS = frozenset("""
+    if else elif for foreach while do switch case default break continue return yield try catch except finally
+    throw throws raise new delete class struct interface enum def function func fn lambda import from package
+    public private protected static final const let var void int long float double char bool boolean string
+    true false null None True False this self super and or not in is with as async await goto sizeof typeof
+""".split())
+
+
+def normalise_token(token):
+    """Identifiers and literals collapse to a placeholder, so renamed copies still match."""
+    if token in KEYWORDS:
+        return token
+    if IDENTIFIER.match(token):
+        return "$"
+    if NUMBER.match(token):
+        return "0"
+    if token[:1] in "\"'`":
+        return '""'
+    return token
+
+
+class Fingerprinter:
+    """
+    Lizard extension that keeps the normalised tokens of each function as
+    lizard reads them (comments and whitespace already dropped), so the
+    sources are not tokenised a second time.
+    """
+
+    def __init__(self):
+        self._tokens = {}
+
+    def __call__(self, tokens, reader):
+        for token in tokens:
+            function = reader.context.current_function
+            # The function object is kept alive with its tokens, so its id is never reused
+            entry = self._tokens.get(id(function))
+            if entry is None:
+                entry = self._tokens[id(function)] = (function, [])
+            entry[1].append(normalise_token(token))
+            yield token
+
+    def tokens(self, function):
+        entry = self._tokens.get(id(function))
+        return entry[1] if entry is not None else []
+
+
+def _hash(gram):
+    return int.from_bytes(hashlib.blake2b("\x1f".join(gram).encode("utf-8"), digest_size=8).digest(), "big",
+                          signed=True)
+
+
+def winnow(tokens, k=K, window=WINDOW):
+    """The set of fingerprints (signed 64-bit K-gram hashes) winnowing selects from tokens."""
+    hashes = [_hash(tokens[i:i + k]) for i in range(len(tokens) - k + 1)]
+    if len(hashes) <= window:
+        return {min(hashes)} if hashes else set()
+    selected = set()
+    for i in range(len(hashes) - window + 1):
+        selected.add(min(hashes[i:i + window]))
+    return selected
+
+
+class CloneIndex:
+    """
+    Inverted index from fingerprint to function across every analysed repo,
+    in one SQLite file. Adding a team replaces its previous functions, so the
+    index is fed one repo at a time as analyses finish.
+    """
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(path)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS functions (
+                id INTEGER PRIMARY KEY, team TEXT, path TEXT, name TEXT,
+                start_line INTEGER, end_line INTEGER, author TEXT, size INTEGER);
+            CREATE TABLE IF NOT EXISTS fingerprints (hash INTEGER, function INTEGER);
+            CREATE INDEX IF NOT EXISTS fingerprints_hash ON fingerprints (hash);
+            CREATE INDEX IF NOT EXISTS fingerprints_function ON fingerprints (function);
+            CREATE INDEX IF NOT EXISTS functions_team ON functions (team);
+        """)
+
+    def close(self):
+        self.db.close()
+
+    def add_team(self, team, functions):
+        """
+        Replace team's functions: [{"path", "name", "start_line", "end_line",
+        "author", "fingerprints"}], as analyse_functions(clones=...) fills them.
+        """
+        with self.db:
+            self.db.execute("DELETE FROM fingerprints WHERE function IN (SELECT id FROM functions WHERE team = ?)",
+                            (team,))
+            self.db.execute("DELETE FROM functions WHERE team = ?", (team,))
+            for f in functions:
+                if not f["fingerprints"]:
+                    continue
+                cursor = self.db.execute(
+                    "INSERT INTO functions (team, path, name, start_line, end_line, author, size) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (team, f["path"], f["name"], f["start_line"], f["end_line"], f["author"],
+                     len(f["fingerprints"])))
+                self.db.executemany("INSERT INTO fingerprints (hash, function) VALUES (?, ?)",
+                                    ((h, cursor.lastrowid) for h in f["fingerprints"]))
+
+    def report(self, min_similarity=MIN_SIMILARITY, max_postings=MAX_POSTINGS):
+        """
+        Pairs of functions from different teams, or by different authors of
+        one team, sharing at least min_similarity of the smaller function's
+        fingerprints; most similar first.
+        """
+        pairs = self.db.execute("""
+            WITH common AS (
+                SELECT hash FROM fingerprints GROUP BY hash HAVING COUNT(*) BETWEEN 2 AND ?)
+            SELECT a.function, b.function, COUNT(*)
+            FROM fingerprints a JOIN fingerprints b ON a.hash = b.hash AND a.function < b.function
+            WHERE a.hash IN common
+            GROUP BY a.function, b.function
+        """, (max_postings,)).fetchall()
+        functions = {row[0]: row[1:] for row in self.db.execute(
+            "SELECT id, team, path, name, start_line, end_line, author, size FROM functions")}
+
+        clones = []
+        for a, b, shared in pairs:
+            fa, fb = functions[a], functions[b]
+            if fa[0] == fb[0] and fa[5] == fb[5]:
+                continue
+            similarity = shared / min(fa[6], fb[6])
+            if similarity < min_similarity:
+                continue
+            clones.append({
+                "similarity": round(similarity, 3),
+                "kind": "cross_team" if fa[0] != fb[0] else "cross_author",
+                "functions": [
+                    {"team": f[0], "path": f[1], "name": f[2], "lines": [f[3], f[4]], "author": f[5]}
+                    for f in (fa, fb)
+                ],
+            })
+        clones.sort(key=lambda c: (-c["similarity"], c["functions"][0]["team"], c["functions"][0]["path"]))
+        return clones
+
+
+def update_clone_index(index_path, team, functions, report_path=None):
+    """Feed one team's functions into the index at index_path and rewrite the report."""
+    os.makedirs(os.path.dirname(index_path) or ".", exist_ok=True)
+    index = CloneIndex(index_path)
+    try:
+        index.add_team(team, functions)
+        clones = index.report()
+    finally:
+        index.close()
+    if report_path:
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(clones, f, indent=2)
+    crossTeam = sum(1 for c in clones if c["kind"] == "cross_team")
+    print(f"Clone index: {len(functions)} functions from {team}; "
+          f"{crossTeam} cross-team and {len(clones) - crossTeam} cross-author near-duplicates")
+    return clones
+
+
+def main():
+    p = argparse.ArgumentParser(description="Near-duplicate functions across every analysed repo")
+    p.add_argument("index", help="clones.sqlite written by main.py")
+    p.add_argument("--min-similarity", dest="min_similarity", type=float, default=MIN_SIMILARITY)
+    args = p.parse_args()
+    index = CloneIndex(args.index)
+    try:
+        print(json.dumps(index.report(args.min_similarity), indent=2))
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import os
+import re
+import json
+import glob
+import argparse
+import numpy as np
+
+# Per-author fields written by combine_json, in column order
+METRICS = [
+    "average_complexity",
+    "percentage_of_functions_written",
+    "percentage_of_hotspots",
+    "percentage_of_LOC",
+    "commits",
+    "additions",
+    "deletions",
+]
+DERIVED = ["commit_percentage", "edit_percentage"]
+
+TEAM_STATS_PATTERN = re.compile(r"^overall_(.+)_stats\.json$")
+STD_DEV_MULTIPLIER = 2  # same as normalize() in services/scoring.js
+
+
+class CohortFrame:
+    """
+    Every author of every team as flat columns: one row per (team, author),
+    `values` is authors x METRICS, `team` holds each row's team index.
+    """
+
+    def __init__(self, teams, team, authors, values):
+        self.teams = teams
+        self.team = team
+        self.authors = authors
+        self.values = values
+
+    @classmethod
+    def from_team_stats(cls, team_stats):
+        """team_stats: {team_id: {author: {metric: value}}}"""
+        teams = list(team_stats)
+        team_idx, authors, rows = [], [], []
+        for t, team_id in enumerate(teams):
+            for author, stats in (team_stats[team_id] or {}).items():
+                team_idx.append(t)
+                authors.append(author)
+                rows.append([_number(stats.get(metric)) for metric in METRICS])
+        values = np.array(rows, dtype=float).reshape(len(rows), len(METRICS))
+        return cls(teams, np.array(team_idx, dtype=np.intp), authors, values)
+
+    @classmethod
+    def from_analyses_dir(cls, analyses_dir):
+        team_stats = {}
+        for path in sorted(glob.glob(os.path.join(analyses_dir, "overall_*_stats.json"))):
+            match = TEAM_STATS_PATTERN.match(os.path.basename(path))
+            if not match:
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    team_stats[match.group(1)] = json.load(f)
+            except (OSError, ValueError):
+                continue
+        return cls.from_team_stats(team_stats)
+
+    def column(self, metric):
+        return self.values[:, METRICS.index(metric)]
+
+
+def _number(value):
+    try:
+        v = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return v if np.isfinite(v) else 0.0
+
+
+def share_percentages(values, groups=None, n_groups=None):
+    """
+    Each value as a percentage of its group's total (the whole array when
+    groups is None). An all-zero group divides by 1, as combine_json does.
+    """
+    values = np.asarray(values, dtype=float)
+    if groups is None:
+        total = values.sum() or 1.0
+        return (values / total) * 100
+    totals = np.bincount(groups, weights=values, minlength=n_groups)
+    totals[totals == 0] = 1.0
+    return (values / totals[groups]) * 100
+
+
+def group_normalise(values, groups, n_groups):
+    """
+    services/scoring.js normalize() applied within each group, for every
+    column at once: 2 x z-score, then min-max scaled to 0..1.
+    """
+    values = np.atleast_2d(np.asarray(values, dtype=float).T).T
+    counts = np.bincount(groups, minlength=n_groups).astype(float)
+    safe_counts = np.maximum(counts, 1.0)[:, None]
+
+    sums = np.zeros((n_groups, values.shape[1]))
+    np.add.at(sums, groups, values)
+    mean = sums / safe_counts
+    centred = values - mean[groups]
+    sq = np.zeros_like(sums)
+    np.add.at(sq, groups, centred ** 2)
+    std = np.sqrt(sq / safe_counts)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = STD_DEV_MULTIPLIER * centred / std[groups]
+    zmin = np.full_like(sums, np.inf)
+    zmax = np.full_like(sums, -np.inf)
+    np.minimum.at(zmin, groups, z)
+    np.maximum.at(zmax, groups, z)
+    span = (zmax - zmin)[groups]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        scaled = (z - zmin[groups]) / span
+
+    flat = ~np.isfinite(std[groups]) | (std[groups] == 0)
+    # No spread: zeros when the whole group is zero, otherwise 0.5
+    scaled = np.where(flat, np.where(mean[groups] == 0, 0.0, 0.5), scaled)
+    scaled = np.where(~flat & (span == 0), 0.5, scaled)
+    return scaled
+
+
+def percentile_ranks(values):
+    """Mean percentile rank (0-100) of every entry within its column, ties averaged."""
+    values = np.atleast_2d(np.asarray(values, dtype=float).T).T
+    n = values.shape[0]
+    ranks = np.zeros_like(values)
+    if n == 0:
+        return ranks
+    for j in range(values.shape[1]):
+        ordered = np.sort(values[:, j])
+        below = np.searchsorted(ordered, values[:, j], side="left")
+        equal = np.searchsorted(ordered, values[:, j], side="right") - below
+        ranks[:, j] = 100.0 * (below + 0.5 * equal) / n
+    return ranks
+
+
+def score_frame(frame):
+    """
+    One vectorised pass over the whole cohort: commit/edit percentages within
+    each team, normalised scores within each team, and cohort percentiles.
+    Returns (per_team, summary).
+    """
+    n_teams = len(frame.teams)
+    commits = frame.column("commits")
+    edits = frame.column("additions") + frame.column("deletions")
+    commit_pct = share_percentages(commits, frame.team, n_teams)
+    edit_pct = share_percentages(edits, frame.team, n_teams)
+
+    columns = METRICS + DERIVED
+    table = np.column_stack([frame.values, commit_pct, edit_pct]) if len(frame.authors) else np.zeros((0, len(columns)))
+    normalised = group_normalise(table, frame.team, n_teams) if len(frame.authors) else table
+    percentiles = percentile_ranks(table)
+
+    per_team = {team_id: {} for team_id in frame.teams}
+    for i, author in enumerate(frame.authors):
+        entry = {metric: _plain(table[i, j]) for j, metric in enumerate(METRICS)}
+        entry["commit_percentage"] = round(float(commit_pct[i]), 2)
+        entry["edit_percentage"] = round(float(edit_pct[i]), 2)
+        entry["normalised"] = {metric: round(float(normalised[i, j]), 4) for j, metric in enumerate(columns)}
+        entry["cohort_percentile"] = {metric: round(float(percentiles[i, j]), 1) for j, metric in enumerate(columns)}
+        per_team[frame.teams[frame.team[i]]][author] = entry
+
+    summary = {
+        "teams": len(frame.teams),
+        "authors": len(frame.authors),
+        "metrics": {},
+    }
+    if len(frame.authors):
+        quartiles = np.percentile(table, [25, 50, 75], axis=0)
+        for j, metric in enumerate(columns):
+            summary["metrics"][metric] = {
+                "mean": round(float(table[:, j].mean()), 3),
+                "p25": round(float(quartiles[0, j]), 3),
+                "median": round(float(quartiles[1, j]), 3),
+                "p75": round(float(quartiles[2, j]), 3),
+            }
+    return per_team, summary
+
+
+def _plain(v):
+    v = float(v)
+    return int(v) if v.is_integer() else v
+
+
+def score_cohort(analyses_dir, output_dir=None):
+    """Score every overall_<team>_stats.json in analyses_dir and write the results."""
+    output_dir = output_dir or os.path.join(analyses_dir, "cohort")
+    frame = CohortFrame.from_analyses_dir(analyses_dir)
+    per_team, summary = score_frame(frame)
+
+    os.makedirs(output_dir, exist_ok=True)
+    for team_id, authors in per_team.items():
+        with open(os.path.join(output_dir, f"scored_{team_id}_stats.json"), "w", encoding="utf-8") as f:
+            json.dump(authors, f, indent=2)
+    with open(os.path.join(output_dir, "cohort_summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    print(f"Scored {summary['authors']} authors across {summary['teams']} teams -> {output_dir}")
+    return per_team, summary
+
+
+def main():
+    p = argparse.ArgumentParser(description="Score every analysed team in one vectorised pass")
+    p.add_argument("--analyses-dir", required=True, dest="analyses_dir")
+    p.add_argument("--output-dir", dest="output_dir", default=None)
+    args = p.parse_args()
+    score_cohort(args.analyses_dir, args.output_dir)
+
+
+if __name__ == "__main__":
+    main()
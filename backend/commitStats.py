@@ -1,6 +1,8 @@
 import os
 from git import Repo
-from ignoreFiles import should_ignore
+from gitUtils import CommitIndex, shallow_commits
+from ignoreFiles import active_matcher
+from instrumentation import span
 from datetime import datetime, timezone
 
 
@@ -12,34 +14,65 @@ def parse_date(date_str):
     return dt.replace(tzinfo=timezone.utc)
 
 
-def get_commit_stats(tempFolder, start_date=None, end_date=None):
+def date_bounds(start_date=None, end_date=None):
+    """(start, end) epoch seconds of a YYYY-MM-DD window, whole days inclusive; None when open."""
+    start_dt, end_dt = parse_date(start_date), parse_date(end_date)
+    start_ts = int(start_dt.timestamp()) if start_dt else None
+    end_ts = int(end_dt.replace(hour=23, minute=59, second=59).timestamp()) if end_dt else None
+    return start_ts, end_ts
+
+
+def get_commit_stats(tempFolder, start_date=None, end_date=None, index=None, cube=None):
+    """
+    One entry per non-merge commit on any ref within the date range. With a
+    cube (activityCube.ActivityCube), every commit walked is also added to
+    it, whatever the range.
+    """
     print("Reading commit stats from all branches...")
     repo = Repo(tempFolder)
     seen = set()
     commits_list = []  # store individual commits instead of aggregating
 
-    all_commits = []
-    for ref in repo.references:
-        try:
-            for commit in repo.iter_commits(ref):
-                if commit.hexsha in seen:
-                    continue
-                seen.add(commit.hexsha)
-                all_commits.append(commit)
-        except Exception:
-            continue
+    # With a path scope, only the commits that touch it
+    scope = active_matcher().scope
+    walkOptions = {"paths": scope, "full_history": True} if scope else {}
 
-   # Filter by date range if provided
-    if start_date or end_date:
-        start_dt = parse_date(start_date)
-        end_dt = parse_date(end_date)
-        if end_dt:
-            end_dt = end_dt.replace(hour=23, minute=59, second=59)
+    with span("walk_refs"):
+        all_commits = []
+        for ref in repo.references:
+            try:
+                for commit in repo.iter_commits(ref, **walkOptions):
+                    if commit.hexsha in seen:
+                        continue
+                    seen.add(commit.hexsha)
+                    all_commits.append(commit)
+            except Exception:
+                continue
 
+    # Line stats for every commit from one `git log --numstat` instead of a diff per commit
+    if index is None:
+        with span("line_stats"):
+            index = CommitIndex(repo)
+    lineStats = index.line_stats
+
+    if cube is not None:
+        # The cut-off commits of a shallow clone have no parents to diff against
+        boundary = shallow_commits(repo)
+        with span("activity_cube"):
+            added = cube.add(
+                (c.hexsha, c.author.name, c.committed_date, *lineStats.get(c.hexsha, (0, 0)),
+                 index.file_counts.get(c.hexsha, 0))
+                for c in all_commits if len(c.parents) <= 1 and c.hexsha not in boundary
+            )
+        print(f"Activity cube: {added} new commits, {len(cube.authors)} authors over {cube.days} days")
+
+    # Filter by date range if provided
+    if start_date or end_date:
+        start_ts, end_ts = date_bounds(start_date, end_date)
         all_commits = [
             c for c in all_commits
-            if (not start_dt or datetime.fromtimestamp(c.committed_date, tz=timezone.utc) >= start_dt)
-            and (not end_dt or datetime.fromtimestamp(c.committed_date, tz=timezone.utc) <= end_dt)
+            if (start_ts is None or c.committed_date >= start_ts)
+            and (end_ts is None or c.committed_date <= end_ts)
         ]
         print(f"Filtered to {len(all_commits)} commits between {start_date} and {end_date}")
 
@@ -50,17 +83,7 @@ def get_commit_stats(tempFolder, start_date=None, end_date=None):
             continue
 
         author = commit.author.name
-        additions = 0
-        deletions = 0
-
-        try:
-            for filename, file_stats in commit.stats.files.items():
-                if should_ignore(filename):
-                    continue
-                additions += file_stats.get("insertions", 0)
-                deletions += file_stats.get("deletions", 0)
-        except Exception:
-            pass
+        additions, deletions = lineStats.get(commit.hexsha, (0, 0))
 
         commits_list.append({
             "sha": commit.hexsha,
@@ -0,0 +1,188 @@
+import re
+import lizard
+from git import Repo
+from collections import defaultdict
+from lizard_languages import get_reader_for
+from ignoreFiles import should_ignore, pathspec_excludes
+from commitStats import date_bounds
+from gitUtils import BlobReader, fetch_history_blobs, blame_ranges
+from analyser import decode_source, function_complexity
+from deadline import Deadline, completeness
+from instrumentation import span
+
+EMPTY_TREE = "4b825dc642cb6eb9a060e54bf8d69288fbee4904"
+HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+def sprint_boundaries(repo, start_date=None, end_date=None, rev="HEAD"):
+    """
+    (base, end): the last commits on rev before the sprint starts and by its
+    end. base is the empty tree when the history starts inside the sprint,
+    end is None when it starts after it.
+    """
+    start_ts, end_ts = date_bounds(start_date, end_date)
+    end = repo.git.rev_list("-1", f"--before=@{end_ts}", rev) if end_ts is not None else repo.git.rev_parse(rev)
+    base = repo.git.rev_list("-1", f"--before=@{start_ts - 1}", rev) if start_ts is not None else ""
+    return base or EMPTY_TREE, end or None
+
+
+def diff_hunks(repo, base, end):
+    """
+    [(oldPath, newPath, hunks)] of every text file that differs between base
+    and end, renames paired up. Each hunk is (oldStart, oldCount, newStart,
+    newCount) as in the -U0 header; a path is None on the side it is missing.
+    """
+    args = ["-M", "--no-color", "--no-ext-diff", base, end, "--", *pathspec_excludes(dirs_only=True)]
+    # Paths come from -z output, which is neither quoted nor tab-terminated;
+    # the patch has one "diff --git" header per file, in the same order
+    fields = repo.git.diff("-z", "--name-status", *args).split("\0")
+    paths, i = [], 0
+    while i < len(fields) and fields[i]:
+        status = fields[i][0]
+        if status in "RC":
+            paths.append((fields[i + 1], fields[i + 2]))
+            i += 3
+        elif status == "T":
+            # A type change is patched as a deletion then an addition
+            paths += [(fields[i + 1], None), (None, fields[i + 1])]
+            i += 2
+        else:
+            path = fields[i + 1]
+            paths.append((None if status == "A" else path, None if status == "D" else path))
+            i += 2
+
+    files = []
+    for line in repo.git.diff("-U0", *args).splitlines():
+        if line.startswith("diff --git "):
+            files.append([*paths[len(files)], []])
+        elif line.startswith("@@ ") and files:
+            m = HUNK_HEADER.match(line)
+            if m:
+                a, b, c, d = m.groups()
+                files[-1][2].append((int(a), int(b or 1), int(c), int(d or 1)))
+    return [tuple(f) for f in files if f[2]]
+
+
+def _touches(func, ranges):
+    """
+    True when one of ranges, (start, count) pairs from one side of the
+    hunks, falls inside func. A count of 0 is a removal just after start.
+    """
+    for start, count in ranges:
+        if count == 0:
+            if func.start_line <= start < func.end_line:
+                return True
+        elif start <= func.end_line and start + count - 1 >= func.start_line:
+            return True
+    return False
+
+
+def _functions(blobs, path, analyzer):
+    """{long_name: function} of path in blobs' revision ("#n" on repeated names)."""
+    data = blobs.read(path) if path else None
+    if data is None:
+        return {}
+    text, _ = decode_source(data)
+    functions = {}
+    for func in analyzer.analyze_source_code(path, text).function_list:
+        key, n = func.long_name, 1
+        while key in functions:
+            n += 1
+            key = f"{func.long_name}#{n}"
+        functions[key] = func
+    return functions
+
+
+def deletions_by_author(repo, base, end):
+    """{path: {author: lines deleted}} by the non-merge commits in base..end."""
+    revs = [end] if base == EMPTY_TREE else [f"{base}..{end}"]
+    out = repo.git.log("--no-merges", "--no-renames", "-z", "--format=%x01%an", "--numstat", *revs,
+                       "--", *pathspec_excludes(dirs_only=True))
+    deleted = defaultdict(lambda: defaultdict(int))
+    for chunk in out.split("\x01")[1:]:
+        author, _, body = chunk.partition("\0")
+        for entry in body.lstrip("\n").split("\0"):
+            if entry.count("\t") < 2:
+                continue
+            _, removed, path = entry.split("\t", 2)
+            if removed != "-" and int(removed):
+                deleted[path][author] += int(removed)
+    return deleted
+
+
+def complexity_delta(tempFolder, start_date=None, end_date=None, deadline=None, progress=None):
+    """
+    Complexity each author added or removed during the sprint. Only the files
+    that differ between the sprint's first and last snapshot of HEAD are
+    parsed, and only the functions overlapping a changed hunk count: each
+    contributes new minus old complexity, split between the authors of its
+    added lines (blamed at the end of the sprint) or, when lines were only
+    removed, between the authors who deleted lines from the file.
+    """
+    print("Calculating complexity contributed during the sprint...")
+    repo = Repo(tempFolder)
+    deadline = deadline or Deadline()
+    progress = progress if progress is not None else {}
+    base, end = sprint_boundaries(repo, start_date, end_date)
+    if end is None or base == end:
+        print("No commits on HEAD within the sprint")
+        progress["completeness"] = 1.0
+        return {}
+
+    with span("diff_hunks"):
+        files = [(old, new, hunks) for old, new, hunks in diff_hunks(repo, base, end)
+                 if not should_ignore(new or old) and get_reader_for(new or old)]
+    print(f"Sprint complexity: {len(files)} source files changed between {base[:10]} and {end[:10]}")
+    with span("fetch_blobs"):
+        fetch_history_blobs(repo, {path for old, new, _ in files for path in (old, new) if path}, rev=end)
+    deleted = deletions_by_author(repo, base, end)
+
+    analyzer = lizard.FileAnalyzer(lizard.get_extensions([]))
+    delta = defaultdict(float)
+    done = 0
+    with BlobReader(repo, base) as before, BlobReader(repo, end) as after, span("function_delta", files=len(files)):
+        for oldPath, newPath, hunks in files:
+            if deadline.expired():
+                break
+            done += 1
+            oldFunctions = {key: f for key, f in _functions(before, oldPath, analyzer).items()
+                            if _touches(f, [(a, b) for a, b, _, _ in hunks])}
+            newFunctions = {key: f for key, f in _functions(after, newPath, analyzer).items()
+                            if _touches(f, [(c, d) for _, _, c, d in hunks])}
+            if not oldFunctions and not newFunctions:
+                continue
+
+            # Authors of the added lines inside the changed functions, in one blame
+            added = [(c, c + d - 1) for _, _, c, d in hunks if d
+                     and any(f.start_line <= c + d - 1 and c <= f.end_line for f in newFunctions.values())]
+            runs = []
+            if added:
+                options = [arg for first, last in added for arg in ("-L", f"{first},{last}")]
+                try:
+                    runs = list(blame_ranges(repo, newPath, *options, end))
+                except Exception:
+                    runs = []
+            removers = {}
+            for path in {oldPath, newPath} - {None}:
+                for author, lines in deleted.get(path, {}).items():
+                    removers[author] = removers.get(author, 0) + lines
+
+            for key in sorted(oldFunctions.keys() | newFunctions.keys()):
+                old, new = oldFunctions.get(key), newFunctions.get(key)
+                change = (function_complexity(new) if new else 0.0) - (function_complexity(old) if old else 0.0)
+                if not change:
+                    continue
+                weights = defaultdict(int)
+                if new:
+                    for author, first, count in runs:
+                        overlap = min(first + count - 1, new.end_line) - max(first, new.start_line) + 1
+                        if author and overlap > 0:
+                            weights[author] += overlap
+                if not weights:
+                    weights.update(removers)
+                total = sum(weights.values())
+                for author, lines in weights.items():
+                    delta[author] += change * lines / total
+
+    progress["completeness"] = completeness(done, len(files))
+    return {author: {"complexity_contributed": round(value, 3)} for author, value in delta.items()}
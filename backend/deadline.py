@@ -0,0 +1,19 @@
+import time
+
+
+class Deadline:
+    """
+    Wall-clock budget for an analysis run. Stages poll expired() between
+    units of work (a file, a function) and stop early with what they have;
+    without a budget nothing ever expires.
+    """
+
+    def __init__(self, seconds=None):
+        self.end = time.monotonic() + seconds if seconds else None
+
+    def expired(self):
+        return self.end is not None and time.monotonic() >= self.end
+
+
+def completeness(done, total):
+    return round(done / total, 4) if total else 1.0
@@ -0,0 +1,185 @@
+import re
+import json
+import argparse
+from openpyxl import Workbook
+from openpyxl.chart import BarChart, PieChart, Reference
+from openpyxl.utils import get_column_letter
+
+HEADERS = [
+    "Rank", "Name", "Email", "Overall Score (%)",
+    "Code Commits", "Work Hours", "Documents", "Meetings",
+    "Total Lines of Code (normalised)", "Total Edited Code (normalised)", "Total Commits (normalised)",
+    "Total Functions Written (normalised)", "Total Hotspots Contributed (normalised)", "Code Complexity (normalised)",
+    "Average Sentence Length (normalised)", "Sentence Complexity (normalised)",
+    "Word Count (normalised)", "Readability (normalised)",
+    "Total Lines of Code %", "Total Edited Code %", "Total Commits %",
+    "Total Functions Written %", "Total Hotspots Contributed %",
+    "Code Complexity (raw)", "Average Sentence Length (raw)", "Sentence Complexity (raw)",
+    "Word Count (raw)", "Readability Score (raw)", "Attendance %"
+]
+SUMMARY_HEADERS = ["Team", "Rank", "Name", "Email", "Overall Score (%)"]
+
+# 1-based column ranges plotted by the two bar charts
+CODE_METRIC_COLUMNS = range(9, 15)
+DOC_METRIC_COLUMNS = range(15, 19)
+
+
+def report_row(rank, s):
+    """One spreadsheet row for a student entry of aggregateTeamScores().ranking."""
+    b = s.get("breakdown", {})
+    r = s.get("raw", {})
+    return [
+        rank, s.get("name", ""), s.get("email", ""), round(s.get("score", 0), 1),
+        r.get("commits", 0), r.get("hours", 0), r.get("docCount", 0), r.get("meetings", 0),
+        round(b.get("loc", 0) * 100), round(b.get("editedCode", 0) * 100),
+        round(b.get("commits", 0) * 100), round(b.get("functions", 0) * 100),
+        round(b.get("hotspots", 0) * 100), round(b.get("codeComplexity", 0) * 100),
+        round(b.get("avgSentenceLength", 0) * 100), round(b.get("sentenceComplexity", 0) * 100),
+        round(b.get("wordCount", 0) * 100), round(b.get("readability", 0) * 100),
+        round(r.get("loc", 0), 2), round(r.get("editedCode", 0), 2),
+        round(r.get("commits", 0), 2), round(r.get("functions", 0), 2),
+        round(r.get("hotspots", 0), 2), round(r.get("codeComplexity", 0), 3),
+        round(r.get("avgSentenceLength", 0), 2), round(r.get("sentenceComplexity", 0), 3),
+        r.get("wordCount", 0), round(r.get("readability", 0), 2),
+        round(r.get("attendance", 0) * 100, 1),
+    ]
+
+
+def _column_widths(headers, rows):
+    widths = [len(str(h)) for h in headers]
+    for row in rows:
+        for i, value in enumerate(row):
+            if value is not None:
+                widths[i] = max(widths[i], len(str(value)))
+    return [min(w + 2, 40) for w in widths]
+
+
+def _sheet_title(name, used):
+    # Excel sheet titles: max 31 chars, no []:*?/\ and unique per workbook
+    base = re.sub(r"[\[\]:*?/\\]", "_", str(name or "Team")).strip() or "Team"
+    title = base[:31]
+    n = 2
+    while title.lower() in used:
+        suffix = f" ({n})"
+        title = base[:31 - len(suffix)] + suffix
+        n += 1
+    used.add(title.lower())
+    return title
+
+
+def _bar_chart(title):
+    chart = BarChart()
+    chart.type = "col"
+    chart.grouping = "clustered"
+    chart.title = title
+    chart.y_axis.title = "Normalised Score (0-100)"
+    chart.x_axis.title = "Student"
+    chart.style = 10
+    chart.width = 30
+    chart.height = 15
+    chart.x_axis.tickLblPos = "low"
+    chart.x_axis.delete = False
+    chart.y_axis.delete = False
+    chart.x_axis.majorTickMark = "out"
+    chart.y_axis.majorTickMark = "out"
+    return chart
+
+
+def _add_charts(ws, num_students):
+    # Charts only hold cell references, so they are built once per sheet and
+    # serialised when the write-only workbook is saved.
+    names = Reference(ws, min_col=2, min_row=2, max_row=num_students + 1)
+    chart_start_row = num_students + 4
+
+    pie = PieChart()
+    pie.title = "Overall Contribution Score"
+    pie.style = 10
+    pie.width = 25
+    pie.height = 15
+    pie.add_data(Reference(ws, min_col=4, min_row=1, max_row=num_students + 1), titles_from_data=True)
+    pie.set_categories(names)
+    ws.add_chart(pie, f"A{chart_start_row}")
+
+    code = _bar_chart("Code Metrics (Normalised)")
+    for col in CODE_METRIC_COLUMNS:
+        code.add_data(Reference(ws, min_col=col, min_row=1, max_row=num_students + 1), titles_from_data=True)
+    code.set_categories(names)
+    ws.add_chart(code, f"J{chart_start_row}")
+
+    docs = _bar_chart("Documentation Metrics (Normalised)")
+    for col in DOC_METRIC_COLUMNS:
+        docs.add_data(Reference(ws, min_col=col, min_row=1, max_row=num_students + 1), titles_from_data=True)
+    docs.set_categories(names)
+    ws.add_chart(docs, f"P{chart_start_row}")
+
+
+def _write_sheet(wb, title, headers, rows):
+    ws = wb.create_sheet(title)
+    # Write-only sheets need their column widths before the first row is streamed
+    for i, width in enumerate(_column_widths(headers, rows), start=1):
+        ws.column_dimensions[get_column_letter(i)].width = width
+    ws.append(headers)
+    for row in rows:
+        ws.append(row)
+    return ws
+
+
+def write_team_sheet(wb, title, ranking, include_charts=True):
+    rows = [report_row(i, s) for i, s in enumerate(ranking, start=1)]
+    ws = _write_sheet(wb, title, HEADERS, rows)
+    if include_charts and rows:
+        _add_charts(ws, len(rows))
+    return ws
+
+
+def build_report(ranking, out_path, include_charts=True):
+    """Single-team contribution report (one 'Contribution Scores' sheet)."""
+    wb = Workbook(write_only=True)
+    write_team_sheet(wb, "Contribution Scores", ranking, include_charts)
+    wb.save(out_path)
+    return out_path
+
+
+def build_cohort_report(teams, out_path, include_charts=True):
+    """
+    Multi-team workbook: a 'Cohort Summary' sheet followed by one sheet per
+    team. `teams` is a list of {"name": ..., "ranking": [...]}.
+    """
+    wb = Workbook(write_only=True)
+    used = {"cohort summary"}
+
+    summary_rows = []
+    for team in teams:
+        for i, s in enumerate(team.get("ranking") or [], start=1):
+            summary_rows.append([team.get("name", ""), i, s.get("name", ""), s.get("email", ""),
+                                 round(s.get("score", 0), 1)])
+    _write_sheet(wb, "Cohort Summary", SUMMARY_HEADERS, summary_rows)
+
+    for team in teams:
+        write_team_sheet(wb, _sheet_title(team.get("name"), used), team.get("ranking") or [], include_charts)
+
+    wb.save(out_path)
+    return out_path
+
+
+def main():
+    p = argparse.ArgumentParser(description="Write the contribution report workbook")
+    p.add_argument("--input", required=True,
+                   help="ranking list for one team, or {\"teams\": [{name, ranking}]} for a cohort")
+    p.add_argument("--output", required=True)
+    p.add_argument("--no-charts", dest="charts", action="store_false")
+    args = p.parse_args()
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    if isinstance(data, dict) and "teams" in data:
+        build_cohort_report(data["teams"], args.output, include_charts=args.charts)
+        print(f"Cohort report for {len(data['teams'])} teams written to {args.output}")
+    else:
+        build_report(data, args.output, include_charts=args.charts)
+        print(f"Report for {len(data)} students written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
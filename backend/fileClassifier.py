@@ -0,0 +1,175 @@
+import os
+import subprocess
+from collections import Counter
+from gitUtils import tracked_files, sparse_paths
+from ignoreFiles import pathspec_excludes
+from instrumentation import count_git
+
+# `git hash-object -t tree /dev/null`: diffing HEAD against it gives every
+# file's line count, and "-" for the files git considers binary
+EMPTY_TREE = "4b825dc642cb6eb9a060e54bf8d69288fbee4904"
+
+DEFAULT_MAX_FILE_LINES = 10000
+DEFAULT_MAX_FILE_BYTES = 512 * 1024
+
+# Text formats that are data rather than authored code
+DATA_EXTENSIONS = {".svg", ".csv", ".tsv", ".map"}
+MINIFIED_SUFFIXES = (".min.js", ".min.css", ".bundle.js", "-bundle.js")
+# Average line length above which a file is treated as minified, once it is
+# big enough for the average to mean something
+MINIFIED_AVG_LINE_BYTES = 500
+MINIFIED_MIN_BYTES = 4096
+
+LINGUIST_ATTRIBUTES = ("linguist-generated", "linguist-vendored")
+
+# Paths per `git diff` when line counts are limited to a sparse checkout
+PATHSPEC_CHUNK = 1000
+
+
+class FileClassification:
+    """
+    Every tracked, non-ignored file at HEAD with its size, line count and blob
+    id, split into `included` paths and `excluded` {path: reason}.
+    """
+
+    def __init__(self, sizes, lines, object_ids, excluded):
+        self.sizes = sizes
+        self.lines = lines
+        self.object_ids = object_ids
+        self.excluded = excluded
+        self.included = [path for path in sizes if path not in excluded]
+
+    def summary(self):
+        return {
+            "files": len(self.sizes),
+            "included": len(self.included),
+            "excluded": dict(Counter(self.excluded.values())),
+        }
+
+
+def _tree_entries(repo, rev, paths=None):
+    """
+    {path: (size, object_id)} for the blobs of rev, via one ls-tree. With
+    paths, only those are sized, so a blobless clone fetches nothing else.
+    """
+    # ls-tree takes no pathspec magic; callers filter against tracked_files()
+    sized = paths is None
+    out = repo.git.ls_tree("-r", "-z", "--full-tree", *(["-l"] if sized else []), rev)
+    entries = {}
+    for record in out.split("\0"):
+        if not record:
+            continue
+        meta, _, path = record.partition("\t")
+        mode, kind, object_id = meta.split()[:3]
+        # Submodules and symlinks have no lines of their own
+        if kind != "blob" or mode == "120000" or (not sized and path not in paths):
+            continue
+        entries[path] = (int(meta.split()[3]) if sized else None, object_id)
+    if not sized and entries:
+        result = subprocess.run(
+            ["git", "cat-file", "--batch-check=%(objectname) %(objectsize)"], cwd=repo.git_dir,
+            input="".join(f"{oid}\n" for _, oid in entries.values()).encode(),
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+        count_git(len(result.stdout))
+        sizes = dict(line.split() for line in result.stdout.decode().splitlines())
+        entries = {path: (int(sizes.get(oid, 0)), oid) for path, (_, oid) in entries.items()}
+    return entries
+
+
+def _line_counts(repo, rev, paths=None):
+    """
+    {path: lines}, None for binary files, via one numstat against the empty
+    tree. With paths, only those are diffed (in chunks, to keep argv short).
+    """
+    if paths is None:
+        chunks = [list(pathspec_excludes())]
+    else:
+        paths = [f":(literal){path}" for path in paths]
+        chunks = [paths[i:i + PATHSPEC_CHUNK] for i in range(0, len(paths), PATHSPEC_CHUNK)]
+    counts = {}
+    for pathspecs in chunks:
+        out = repo.git.diff("--numstat", "-z", "--no-renames", EMPTY_TREE, rev, "--", *pathspecs)
+        for record in out.split("\0"):
+            if not record:
+                continue
+            added, _, path = record.split("\t", 2)
+            counts[path] = None if added == "-" else int(added)
+    return counts
+
+
+def _linguist_flags(repo, paths):
+    """{path: "generated" | "vendored"} from .gitattributes linguist overrides."""
+    if not paths:
+        return {}
+    # A bare clone has no worktree .gitattributes; --cached reads them from
+    # the index prepare_bare() built
+    cached = ["--cached"] if repo.bare else []
+    result = subprocess.run(
+        ["git", "check-attr", "-z", "--stdin", *cached, *LINGUIST_ATTRIBUTES],
+        cwd=repo.working_dir, input="".join(f"{path}\0" for path in paths).encode("utf-8"),
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+    )
+    count_git(len(result.stdout))
+    if result.returncode != 0:
+        return {}
+    fields = result.stdout.decode("utf-8", errors="replace").split("\0")
+    flags = {}
+    for i in range(0, len(fields) - 2, 3):
+        path, attribute, value = fields[i:i + 3]
+        if value in ("set", "true"):
+            flags.setdefault(path, attribute.replace("linguist-", ""))
+    return flags
+
+
+def _is_minified(path, size, lines):
+    if path.lower().endswith(MINIFIED_SUFFIXES):
+        return True
+    return size >= MINIFIED_MIN_BYTES and size / max(lines, 1) > MINIFIED_AVG_LINE_BYTES
+
+
+_cache = {}
+
+
+def classify_files(repo, max_lines=DEFAULT_MAX_FILE_LINES, max_bytes=DEFAULT_MAX_FILE_BYTES, rev="HEAD"):
+    """
+    Decide once per repository which files blame and lizard should look at.
+    Excluded reasons: binary, generated, vendored, minified, data, oversized.
+    Results are cached per (repository, commit, caps).
+    """
+    head = repo.git.rev_parse(rev)
+    key = (repo.working_dir, head, max_lines, max_bytes)
+    if key in _cache:
+        return _cache[key]
+
+    allowed = set(tracked_files(repo))
+    checkedOut = sparse_paths(repo)
+    if checkedOut is not None:
+        # A sparse (blobless) clone only has the blobs of what it checked out
+        allowed &= checkedOut
+    entries = {path: e for path, e in _tree_entries(repo, head, None if checkedOut is None else allowed).items()
+               if path in allowed}
+    counts = _line_counts(repo, head, None if checkedOut is None else sorted(entries))
+    linguist = _linguist_flags(repo, list(entries))
+
+    sizes, lines, object_ids, excluded = {}, {}, {}, {}
+    for path, (size, object_id) in entries.items():
+        n_lines = counts.get(path, 0)
+        sizes[path] = size
+        lines[path] = n_lines or 0
+        object_ids[path] = object_id
+        if n_lines is None:
+            excluded[path] = "binary"
+        elif path in linguist:
+            excluded[path] = linguist[path]
+        elif os.path.splitext(path)[1].lower() in DATA_EXTENSIONS:
+            excluded[path] = "data"
+        elif _is_minified(path, size, n_lines):
+            excluded[path] = "minified"
+        elif (max_bytes and size > max_bytes) or (max_lines and n_lines > max_lines):
+            excluded[path] = "oversized"
+
+    classification = _cache[key] = FileClassification(sizes, lines, object_ids, excluded)
+    summary = classification.summary()
+    print(f"Classified {summary['files']} files: {summary['included']} included, excluded {summary['excluded']}")
+    return classification
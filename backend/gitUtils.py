@@ -0,0 +1,312 @@
+import os
+import re
+import bisect
+import threading
+import subprocess
+from collections import defaultdict
+from git import GitCommandError
+from ignoreFiles import should_ignore, pathspec_excludes
+from instrumentation import count_git
+
+
+def tracked_files(repo):
+    """Paths of HEAD's tracked files (repo-relative, "/"-separated) that are not ignored."""
+    out = repo.git.ls_files("-z", "--", *pathspec_excludes())
+    return [path for path in out.split("\0") if path and not should_ignore(path)]
+
+
+def log_records(repo, *args):
+    """
+    One `git log --all` pass over every non-merge commit, yielding
+    (sha, committed_timestamp, entries) where entries are the raw -z records
+    of whatever diff option is passed in args (--numstat, --name-only).
+    Ignored directories are excluded by pathspec so git never diffs them;
+    the per-file rules are left to should_ignore(), as git matches every
+    pathspec against every changed path of every commit.
+    """
+    out = repo.git.log(
+        "--all", "--no-merges", "--no-renames", "--full-history", "-z",
+        "--format=%x01%H %ct", *args, "--", *pathspec_excludes(dirs_only=True),
+    )
+    for chunk in out.split("\x01")[1:]:
+        header, _, body = chunk.partition("\0")
+        sha, _, committed = header.partition(" ")
+        entries = [e for e in body.lstrip("\n").split("\0") if e]
+        yield sha, int(committed), entries
+
+
+class CommitIndex:
+    """
+    Per-commit line stats and touched paths from a single `git log --numstat`
+    pass, built once per run and shared by the stages that need history.
+    `touched` is kept in commit time order, so a date window is two bisects.
+    """
+
+    def __init__(self, repo):
+        self.line_stats = {}
+        self.file_counts = {}
+        self.touched = []
+        for sha, committed, entries in log_records(repo, "--numstat"):
+            additions = deletions = 0
+            paths = []
+            for entry in entries:
+                added, deleted, path = entry.split("\t", 2)
+                if should_ignore(path):
+                    continue
+                additions += int(added) if added != "-" else 0
+                deletions += int(deleted) if deleted != "-" else 0
+                paths.append(path)
+            self.line_stats[sha] = (additions, deletions)
+            self.file_counts[sha] = len(paths)
+            self.touched.append((committed, paths))
+        self.touched.sort(key=lambda entry: entry[0])
+        self._times = [committed for committed, _ in self.touched]
+
+    def changed_files(self, start_dt=None, end_dt=None):
+        """Same as changed_files(), without another walk of the history."""
+        lo = bisect.bisect_left(self._times, start_dt.timestamp()) if start_dt else 0
+        hi = bisect.bisect_right(self._times, end_dt.timestamp()) if end_dt else len(self._times)
+        files = set()
+        for _, paths in self.touched[lo:hi]:
+            files.update(paths)
+        return files
+
+
+def commit_line_stats(repo):
+    """{sha: (additions, deletions)} over non-ignored files, binary files counting 0."""
+    return CommitIndex(repo).line_stats
+
+
+def changed_files(repo, start_dt=None, end_dt=None):
+    """Non-ignored paths touched by non-merge commits committed within [start_dt, end_dt]."""
+    start_ts = start_dt.timestamp() if start_dt else None
+    end_ts = end_dt.timestamp() if end_dt else None
+    files = set()
+    for _, committed, entries in log_records(repo, "--name-only"):
+        if start_ts is not None and committed < start_ts:
+            continue
+        if end_ts is not None and committed > end_ts:
+            continue
+        files.update(path for path in entries if not should_ignore(path))
+    return files
+
+
+def blame_ranges(repo, path, *options):
+    """
+    Yield (author, first_line, line_count) for each run of lines of path,
+    read as a stream from `git blame --incremental`. Git sends a commit's
+    headers only the first time it appears, so authors are cached per
+    commit and the cost follows the number of hunks, not lines. Raises
+    GitCommandError if blame fails.
+    """
+    args = ["git", "blame", "--incremental", *options, "--", path]
+    process = subprocess.Popen(args, cwd=repo.working_dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    authors = {}
+    header = None
+    received = 0
+    try:
+        for line in process.stdout:
+            received += len(line)
+            if header is None:
+                # "<sha> <orig line> <final line> <count>" opens each entry
+                sha, _, finalLine, count = line.split()[:4]
+                header = (sha, int(finalLine), int(count))
+            elif line.startswith(b"author "):
+                authors[header[0]] = line[7:].decode("utf-8", errors="replace").strip()
+            elif line.startswith(b"filename "):
+                # ...and the filename closes it
+                sha, finalLine, count = header
+                yield authors.get(sha, ""), finalLine, count
+                header = None
+        stderr = process.stderr.read()
+        if process.wait() != 0:
+            raise GitCommandError(args, process.returncode, stderr)
+    finally:
+        count_git(received)
+        if process.poll() is None:
+            # The caller stopped early
+            process.kill()
+            process.wait()
+
+
+def blame_runs(repo, path, *options):
+    """blame_ranges() of path in line order, neighbouring runs of the same author merged."""
+    runs = []
+    # Runs arrive in the order blame settles them; one entry per hunk to sort
+    for author, first, count in sorted(blame_ranges(repo, path, *options), key=lambda run: run[1]):
+        if runs and runs[-1][0] == author and runs[-1][1] + runs[-1][2] == first:
+            runs[-1] = (author, runs[-1][1], runs[-1][2] + count)
+        else:
+            runs.append((author, first, count))
+    return runs
+
+
+def line_counts(runs):
+    """{author: lines} of (author, first_line, line_count) runs, authors in order of their first line."""
+    counts = defaultdict(int)
+    for author, _, count in runs:
+        if author:
+            counts[author] += count
+    return dict(counts)
+
+
+def blame_author_lines(repo, path, *options):
+    """{author: lines} of path from blame_ranges(), authors in order of their first line."""
+    return line_counts(blame_runs(repo, path, *options))
+
+
+def prepare_bare(repo, rev="HEAD"):
+    """
+    Give a bare clone an index of rev without checking anything out, so
+    ls-files and `check-attr --cached` (for .gitattributes) work on it.
+    """
+    repo.git.read_tree(rev)
+
+
+class BlobReader:
+    """
+    File contents at rev from one long-lived `git cat-file --batch`, so a
+    bare clone can be analysed without writing any file to disk.
+    """
+
+    def __init__(self, repo, rev="HEAD"):
+        self.rev = rev
+        self._lock = threading.Lock()
+        self._process = subprocess.Popen(
+            ["git", "cat-file", "--batch"], cwd=repo.git_dir,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+        count_git()
+
+    def read(self, path):
+        """Bytes of path at rev, or None when it is missing or not a file."""
+        with self._lock:
+            self._process.stdin.write(f"{self.rev}:{path}\n".encode("utf-8"))
+            self._process.stdin.flush()
+            header = self._process.stdout.readline().split()
+            if len(header) != 3:
+                # "<spec> missing" (or "ambiguous"): no content follows
+                return None
+            data = self._process.stdout.read(int(header[2]))
+            self._process.stdout.read(1)
+            return data if header[1] == b"blob" else None
+
+    def close(self):
+        if self._process.poll() is None:
+            self._process.stdin.close()
+            self._process.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def is_partial_clone(repo):
+    """True for a clone made with --filter, whose missing blobs git fetches on demand."""
+    return bool(repo.config_reader().get_value('remote "origin"', "promisor", False))
+
+
+def shallow_commits(repo):
+    """Shas at the cut-off of a shallow clone, which look like root commits adding the whole tree."""
+    path = os.path.join(repo.git_dir, "shallow")
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="ascii") as f:
+        return set(f.read().split())
+
+
+def pack_bytes(repo):
+    """Bytes of pack data in the clone, which is what was transferred when every fetch keeps its pack."""
+    packDir = os.path.join(repo.git_dir, "objects", "pack")
+    if not os.path.isdir(packDir):
+        return 0
+    return sum(os.path.getsize(os.path.join(packDir, name)) for name in os.listdir(packDir) if name.endswith(".pack"))
+
+
+def fetch_blobs(repo, object_ids):
+    """Fetch object_ids from the promisor remote in one request; returns how many were asked for."""
+    object_ids = sorted(set(object_ids))
+    if not object_ids:
+        return 0
+    result = subprocess.run(
+        ["git", "-c", "fetch.negotiationAlgorithm=noop", "fetch", "origin", "--no-tags", "--no-write-fetch-head",
+         "--recurse-submodules=no", "--filter=blob:none", "--stdin"],
+        cwd=repo.git_dir, input="".join(f"{oid}\n" for oid in object_ids).encode(),
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    count_git()
+    if result.returncode != 0:
+        # Not fatal: git still fetches whatever is missing one blob at a time
+        print(f"Warning: blob prefetch failed: {result.stderr.decode(errors='replace').strip()}")
+    return len(object_ids)
+
+
+_prefetch_lock = threading.Lock()
+
+
+def fetch_history_blobs(repo, paths, rev="HEAD"):
+    """
+    In a blobless clone, fetch every version of paths in rev's history in
+    one request, rather than letting blame fetch them a blob at a time.
+    Files renamed into paths bring their older names along. A no-op on a
+    full clone.
+    """
+    if not is_partial_clone(repo):
+        return 0
+    wanted = set(paths)
+    # Stages prefetch side by side; the second one finds the first's blobs present
+    with _prefetch_lock:
+        out = repo.git.log(rev, "-m", "--raw", "-z", "--no-abbrev", "--no-renames", "--format=%x01",
+                           "--", *pathspec_excludes(dirs_only=True))
+        objectIds = set()
+        for commit in out.split("\x01")[1:]:
+            fields = commit.strip("\n\0").split("\0")
+            changes = list(zip(fields[0::2], fields[1::2]))
+            added = any(meta.endswith("A") and path in wanted for meta, path in changes)
+            for meta, path in changes:
+                status = meta.split()[-1]
+                if added and status == "D":
+                    wanted.add(path)
+                if path in wanted:
+                    objectIds.update(oid for oid in meta.split()[2:4] if oid.strip("0"))
+        # --missing=print lists what the clone lacks without fetching it
+        missing = {line[1:] for line in repo.git.rev_list("--objects", "--missing=print", rev).splitlines()
+                   if line.startswith("?")}
+        return fetch_blobs(repo, objectIds & missing)
+
+
+def _sparse_pattern(path):
+    # Anchored, with gitignore's special characters escaped
+    return "/" + re.sub(r"([\\*?\[\]!#])", r"\\\1", path)
+
+
+def sparse_checkout(repo, paths, dirs=(), always=()):
+    """
+    Check out only paths, the directories in dirs (and the always patterns,
+    e.g. .gitattributes) into a clone made with --no-checkout. In a
+    blobless clone only their blobs are fetched.
+    """
+    patterns = ([_sparse_pattern(path) for path in sorted(paths)] + [_sparse_pattern(d) + "/" for d in dirs]
+                + list(always))
+    result = subprocess.run(
+        ["git", "sparse-checkout", "set", "--no-cone", "--stdin"], cwd=repo.working_dir,
+        input="".join(f"{pattern}\n" for pattern in patterns).encode("utf-8"),
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    count_git()
+    if result.returncode != 0:
+        raise RuntimeError(f"sparse checkout failed: {result.stderr.decode(errors='replace').strip()}")
+    # --no-checkout left no index behind for `set` to update
+    repo.git.checkout("-q", "HEAD")
+
+
+def sparse_paths(repo):
+    """Paths a sparse checkout has on disk, or None when the whole tree is checked out."""
+    # git keeps this in the worktree config, which GitPython's reader skips
+    if repo.bare or repo.git.config("--bool", "--default", "false", "core.sparseCheckout") != "true":
+        return None
+    out = repo.git.ls_files("-t", "-z")
+    # "S " marks skip-worktree entries, the ones left out of the checkout
+    return {record[2:] for record in out.split("\0") if record and not record.startswith("S ")}
@@ -1,4 +1,7 @@
 import os
+import re
+import json
+import fnmatch
 
 IGNORE_DIRS = {
     ".git", "__pycache__", "venv", ".venv", "env",
@@ -15,7 +18,7 @@ IGNORE_FILENAMES = {
     "package-lock.json", "yarn.lock", "pnpm-lock.yaml",
     "package.json", ".gitignore", ".env", "package-lock 2.json",
     "cacert.pem","global-bundle.pem", ".DS_Store",
-    ".env.local", ".env.production", ".env.development",  
+    ".env.local", ".env.production", ".env.development",
     "webpack.config.js", "babel.config.js",
     "jest.config.js", "eslint.config.js", ".eslintrc",
     ".prettierrc", ".prettierignore",
@@ -24,15 +27,203 @@ IGNORE_FILENAMES = {
     ".gitattributes",
 }
 
+# Project-level overrides, read from the analysed repository's root (or a
+# path given with --ignore-config). Every key is optional:
+#   {"ignore_dirs": [...], "ignore_extensions": [...], "ignore_filenames": [...],
+#    "ignore_globs": ["docs/generated/*"],
+#    "include_dirs": [...], "include_extensions": [...], "include_filenames": [...],
+#    "include_globs": ["config/*.json"]}
+CONFIG_FILENAME = ".contribution-ignore.json"
+
+# Bound on the per-path memo; directory prefixes are far fewer and kept whole
+PATH_CACHE_SIZE = 1 << 16
+
+
+def _glob_regex(globs):
+    if not globs:
+        return None
+    return re.compile("|".join(f"(?:{fnmatch.translate(g)})" for g in globs))
+
+
+class IgnoreMatcher:
+    """
+    The ignore rules compiled once. Each distinct directory prefix is checked
+    a single time and remembered, so a file only costs a dict lookup for its
+    directory plus a filename/extension set lookup, and repeated paths (the
+    same file in every commit) are answered from a memo.
+    """
+
+    def __init__(self, dirs=IGNORE_DIRS, extensions=IGNORE_EXTENSIONS, filenames=IGNORE_FILENAMES,
+                 globs=(), include_globs=(), scope=None):
+        self.dirs = frozenset(dirs)
+        self.extensions = frozenset(e.lower() for e in extensions)
+        self.filenames = frozenset(filenames)
+        self.globs = tuple(globs)
+        self.include_globs = tuple(include_globs)
+        self._glob = _glob_regex(self.globs)
+        self._include = _glob_regex(self.include_globs)
+        # Sub-directory the analysis is limited to; everything outside it is
+        # ignored, and the directories on the way to it never are
+        self.scope = scope
+        self._dir_cache = {"": False}
+        parts = scope.split("/") if scope else []
+        for i in range(len(parts)):
+            self._dir_cache["/".join(parts[:i + 1])] = False
+        self._path_cache = {}
+
+    def _dir_ignored(self, directory):
+        ignored = self._dir_cache.get(directory)
+        if ignored is None:
+            parent, _, name = directory.rpartition("/")
+            ignored = name in self.dirs or self._dir_ignored(parent)
+            self._dir_cache[directory] = ignored
+        return ignored
+
+    def _check(self, path):
+        path = path.replace("\\", "/")
+        while path.startswith("./"):
+            path = path[2:]
+        if self.scope and not path.startswith(self.scope + "/"):
+            return True
+        if self._include is not None and self._include.match(path):
+            return False
+        directory, _, filename = path.rpartition("/")
+        if filename in self.dirs or filename in self.filenames:
+            return True
+        if self._dir_ignored(directory):
+            return True
+        # splitext semantics: leading dots (".env") are not an extension
+        stem = filename.lstrip(".")
+        dot = stem.rfind(".")
+        if dot != -1 and stem[dot:].lower() in self.extensions:
+            return True
+        if self._glob is not None and self._glob.match(path):
+            return True
+        return False
+
+    def matches(self, path):
+        ignored = self._path_cache.get(path)
+        if ignored is None:
+            if len(self._path_cache) >= PATH_CACHE_SIZE:
+                self._path_cache.clear()
+            ignored = self._path_cache[path] = self._check(path)
+        return ignored
+
+    def pathspecs(self, dirs_only=False):
+        """
+        The same rules as git pathspec excludes, for `git log/ls-files/blame -- <pathspecs>`.
+        They only pre-filter: should_ignore() stays authoritative, and rules an
+        include_glob could re-admit are left to it. dirs_only keeps just the
+        directory rules, for history walks where every extra spec is matched
+        against every changed path of every commit. A scope comes first, as
+        the one positive pathspec.
+        """
+        specs = self.scope_pathspecs()
+        if self.include_globs:
+            return specs if dirs_only else specs + [f":(exclude,glob){g}" for g in self.globs]
+        onScopePath = set(self.scope.split("/")) if self.scope else set()
+        for d in sorted(self.dirs - onScopePath):
+            specs.append(f":(exclude,glob)**/{d}")
+            specs.append(f":(exclude,glob)**/{d}/**")
+        if dirs_only:
+            return specs
+        for name in sorted(self.filenames):
+            specs.append(f":(exclude,glob)**/{name}")
+        for ext in sorted(self.extensions):
+            specs.append(f":(exclude,glob,icase)**/*{ext}")
+        specs.extend(f":(exclude,glob){g}" for g in self.globs)
+        return specs
+
+    def scope_pathspecs(self):
+        return [f":(literal){self.scope}"] if self.scope else []
+
+    @classmethod
+    def with_overrides(cls, config, scope=None):
+        """Defaults plus a parsed CONFIG_FILENAME dict."""
+        def items(key):
+            return set(config.get(key) or [])
+
+        extensions = {e.lower() if e.startswith(".") else f".{e.lower()}"
+                      for e in IGNORE_EXTENSIONS | items("ignore_extensions")}
+        extensions -= {e.lower() if e.startswith(".") else f".{e.lower()}" for e in items("include_extensions")}
+        return cls(
+            dirs=(IGNORE_DIRS | items("ignore_dirs")) - items("include_dirs"),
+            extensions=extensions,
+            filenames=(IGNORE_FILENAMES | items("ignore_filenames")) - items("include_filenames"),
+            globs=sorted(items("ignore_globs")),
+            include_globs=sorted(items("include_globs")),
+            scope=scope,
+        )
+
+
+DEFAULT_MATCHER = IgnoreMatcher()
+_active = DEFAULT_MATCHER
+
+
+def normalise_scope(path):
+    """A repo-relative sub-directory as "a/b", or None for the whole repository."""
+    if not path:
+        return None
+    parts = [part for part in path.replace("\\", "/").split("/") if part and part != "."]
+    if ".." in parts:
+        raise ValueError(f"Path scope must stay inside the repository: {path}")
+    return "/".join(parts) or None
+
+
+def load_matcher(repo_root=None, config_path=None, repo_config=None, scope=None):
+    """
+    Matcher for one analysis: the defaults, overridden by CONFIG_FILENAME in
+    repo_root and then by config_path. Without any config or scope the
+    shared default matcher (and its warm caches) is returned. repo_config is
+    the content of CONFIG_FILENAME when the repository has no worktree to
+    read it from; scope limits the analysis to one sub-directory.
+    """
+    config = {}
+    if repo_config:
+        try:
+            for key, values in json.loads(repo_config).items():
+                config.setdefault(key, []).extend(values if isinstance(values, list) else [values])
+        except ValueError as e:
+            print(f"Warning: could not read ignore config {CONFIG_FILENAME}: {e}")
+    paths = []
+    if repo_root:
+        paths.append(os.path.join(repo_root, CONFIG_FILENAME))
+    if config_path:
+        paths.append(config_path)
+    for path in paths:
+        if not os.path.isfile(path):
+            continue
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: could not read ignore config {path}: {e}")
+            continue
+        for key, values in data.items():
+            config.setdefault(key, []).extend(values if isinstance(values, list) else [values])
+    return IgnoreMatcher.with_overrides(config, scope) if config or scope else DEFAULT_MATCHER
+
+
+def use_matcher(matcher):
+    """Make `matcher` the one should_ignore() and pathspec_excludes() use."""
+    global _active
+    _active = matcher or DEFAULT_MATCHER
+    return _active
+
+
+def active_matcher():
+    return _active
+
+
 def should_ignore(path: str) -> bool:
     #Return true if the path should be skipped
-    parts = set(os.path.normpath(path).split(os.sep))
-    if parts & IGNORE_DIRS:
-        return True
-    filename = os.path.basename(path)
-    if filename in IGNORE_FILENAMES:
-        return True
-    ext = os.path.splitext(path)[1].lower()
-    if ext in IGNORE_EXTENSIONS:
-        return True
-    return False
\ No newline at end of file
+    return _active.matches(path)
+
+
+def pathspec_excludes(dirs_only=False):
+    return _active.pathspecs(dirs_only)
+
+
+def scope_pathspecs():
+    """The active scope as a pathspec list, empty when the whole repository is analysed."""
+    return _active.scope_pathspecs()
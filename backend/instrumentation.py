@@ -0,0 +1,167 @@
+import os
+import sys
+import time
+import json
+import runpy
+import cProfile
+import argparse
+import threading
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import git.cmd
+
+# Per-stage wall time, CPU time, memory and git traffic for the analysis
+# pipeline and the parsers, written as a Chrome trace-event file (open it in
+# chrome://tracing or https://ui.perfetto.dev). Nothing is recorded until
+# start() is called, so library callers pay nothing.
+
+_local = threading.local()
+_active = None
+_original_execute = git.cmd.Git.execute
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _output_bytes(output):
+    if isinstance(output, tuple):
+        return sum(_output_bytes(part) for part in output[1:])
+    if isinstance(output, (str, bytes)):
+        return len(output)
+    return 0
+
+
+def _traced_execute(self, command, *args, **kwargs):
+    output = _original_execute(self, command, *args, **kwargs)
+    count_git(_output_bytes(output))
+    return output
+
+
+def count_git(nbytes=0):
+    """Charge one git subprocess reading nbytes to every open span on this thread."""
+    for record in getattr(_local, "stack", ()):
+        record["git_calls"] += 1
+        record["git_bytes"] += nbytes
+
+
+class Tracer:
+    def __init__(self, profile_dir=None):
+        self.profile_dir = profile_dir
+        self.started = time.perf_counter()
+        self.events = []
+        self.threads = {}
+        self._lock = threading.Lock()
+
+    def _tid(self):
+        thread = threading.current_thread()
+        with self._lock:
+            return self.threads.setdefault(thread.ident, (len(self.threads) + 1, thread.name))[0]
+
+    @contextmanager
+    def span(self, name, profile=False, **args):
+        record = {"git_calls": 0, "git_bytes": 0}
+        stack = _local.__dict__.setdefault("stack", [])
+        stack.append(record)
+        profiler = None
+        if profile and self.profile_dir:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Only one profiler may run at a time on some Python versions,
+                # so a stage running alongside a profiled one gets no dump
+                print(f"Warning: not profiling {name}: another stage is already being profiled")
+                profiler = None
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield record
+        finally:
+            record["wall_seconds"] = round(time.perf_counter() - wall, 3)
+            record["cpu_seconds"] = round(time.thread_time() - cpu, 3)
+            # High-water marks of the whole process so far, not of this span:
+            # stages running alongside it count too
+            record["process_peak_rss_mb"] = _peak_rss_mb()
+            if tracemalloc.is_tracing():
+                record["process_python_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)
+            stack.pop()
+            if profiler is not None:
+                profiler.disable()
+                os.makedirs(self.profile_dir, exist_ok=True)
+                profiler.dump_stats(os.path.join(self.profile_dir, f"{name}.prof"))
+            event = {
+                "name": name, "cat": "stage", "ph": "X", "pid": os.getpid(), "tid": self._tid(),
+                "ts": round((wall - self.started) * 1e6), "dur": round(record["wall_seconds"] * 1e6),
+                "args": {**args, **record},
+            }
+            with self._lock:
+                self.events.append(event)
+
+    def write(self, path):
+        names = [
+            {"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": thread_name}}
+            for tid, thread_name in self.threads.values()
+        ]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": names + self.events, "displayTimeUnit": "ms"}, f)
+        print(f"Wrote trace of {len(self.events)} spans to {path}")
+
+
+def start(profile_dir=None, trace_memory=False):
+    """Begin recording; spans opened anywhere in the process go to the returned Tracer."""
+    global _active
+    _active = Tracer(profile_dir)
+    git.cmd.Git.execute = _traced_execute
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    return _active
+
+
+def stop():
+    global _active
+    git.cmd.Git.execute = _original_execute
+    tracer, _active = _active, None
+    return tracer
+
+
+def span(name, profile=False, **args):
+    """A timed region, or a no-op when tracing is off."""
+    if _active is None:
+        return nullcontext({})
+    return _active.span(name, profile=profile, **args)
+
+
+def main():
+    # Trace a standalone script, e.g. a parser:
+    #   python instrumentation.py --trace t.json parsers/worklog_parser.py a.docx --output a.json
+    p = argparse.ArgumentParser(description="Run a Python script under the tracer")
+    p.add_argument("--trace", required=True, help="trace-event JSON to write")
+    p.add_argument("--profile-dir", dest="profile_dir", default=None, help="also dump a cProfile of the run here")
+    p.add_argument("--trace-memory", dest="trace_memory", action="store_true")
+    p.add_argument("script")
+    p.add_argument("script_args", nargs=argparse.REMAINDER)
+    args = p.parse_args()
+
+    tracer = start(args.profile_dir, args.trace_memory)
+    sys.argv = [args.script] + args.script_args
+    sys.path.insert(0, os.path.dirname(os.path.abspath(args.script)))
+    try:
+        with tracer.span(os.path.splitext(os.path.basename(args.script))[0], profile=True):
+            runpy.run_path(args.script, run_name="__main__")
+    finally:
+        stop()
+        tracer.write(args.trace)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,11 +6,26 @@ import glob
 import stat
 import re
 import json
-from git import Repo
+import time
+from datetime import timedelta
+from git import Repo, Git
 from analyser import analyse_functions
 from LOC import calculate_LOC
 from metricsSetup import write_json, combine_json
-from commitStats import get_commit_stats, build_commits_json
+from cohortScoring import score_cohort, TEAM_STATS_PATTERN
+from cloneIndex import update_clone_index
+from ignoreFiles import load_matcher, use_matcher, active_matcher, normalise_scope, CONFIG_FILENAME
+from fileClassifier import classify_files, DEFAULT_MAX_FILE_LINES, DEFAULT_MAX_FILE_BYTES
+from commitStats import get_commit_stats, build_commits_json, parse_date
+from complexityDelta import complexity_delta
+from activityCube import ActivityCube, cube_key
+from ownershipMatrix import OwnershipMatrix
+from ownershipIndex import write_ownership_index
+from deadline import Deadline
+from gitUtils import (CommitIndex, BlobReader, prepare_bare, changed_files, sparse_checkout, fetch_blobs,
+                      pack_bytes)
+from pipeline import Pipeline
+import instrumentation
 
 def cleanup_old_temps(directory):
     for item in glob.glob(os.path.join(directory, "tmp*")):
@@ -25,10 +40,192 @@ def force_remove(directory):
     shutil.rmtree(directory, onerror=handle_readonly)
 
 def parse_repo_url(repoURL):
+    """(clone URL, branch, path) from a GitHub URL, which may end in /tree/<branch>/<path>."""
     match = re.match(r'(https://github\.com/[^/]+/[^/]+)(?:/tree/(.+))?', repoURL)
-    if match:
-        return match.group(1), match.group(2) or None
-    return repoURL, None
+    if not match:
+        return repoURL, None, None
+    cleanURL, treeRef = match.group(1), (match.group(2) or "").strip("/")
+    if not treeRef:
+        return cleanURL, None, None
+    # Branch names may contain "/" too: the longest branch or tag on the
+    # remote that prefixes the rest wins, and what follows it is the path
+    try:
+        refs = Git().ls_remote("--heads", "--tags", cleanURL).splitlines()
+        names = {line.split("\t")[1].split("/", 2)[2].removesuffix("^{}") for line in refs}
+    except Exception:
+        names = set()
+    for name in sorted(names, key=len, reverse=True):
+        if treeRef == name or treeRef.startswith(name + "/"):
+            return cleanURL, name, treeRef[len(name) + 1:] or None
+    branch, _, path = treeRef.partition("/")
+    return cleanURL, branch, path or None
+
+METRICS = ("commits", "loc", "functions", "delta")
+CLONE_STRATEGIES = ("full", "shallow", "blobless", "sparse")
+
+def choose_clone_strategy(metrics, start_date=None, loc_engine="blame"):
+    """
+    The cheapest clone that still gives the requested metrics exactly:
+    - commit stats alone for a sprint: history back to the sprint start (shallow)
+    - commit stats with anything else: everything, as line stats diff every blob
+    - blame or complexity delta for a sprint without complexity: only the touched paths (sparse, blobless)
+    - other blame jobs: commits and trees, with the blamed files' blobs fetched in one go (blobless)
+    """
+    metrics = set(metrics)
+    if "commits" in metrics:
+        return "shallow" if metrics == {"commits"} and start_date else "full"
+    if loc_engine == "replay":
+        # Replaying the history diffs every file, ignored or not
+        return "full"
+    # Call frequency scans every file, so complexity needs the whole tree
+    if start_date and "functions" not in metrics:
+        return "sparse"
+    return "blobless"
+
+def _shallow_clone(url, tempFolder, branch, since, options):
+    # Old branch tips would drag their whole history into a multi-branch
+    # shallow clone, so the other branches are fetched one by one and the
+    # ones with nothing since the cut-off are left out
+    repo = Repo.clone_from(url, tempFolder, shallow_since=since, single_branch=True,
+                           **({"branch": branch} if branch else {}), **options)
+    repo.git.config("transfer.unpackLimit", "1")
+    fetched = []
+    for line in repo.git.ls_remote("--heads", "origin").splitlines():
+        ref = line.split("\t", 1)[1]
+        refspec = f"+{ref}:refs/remotes/origin/{ref[len('refs/heads/'):]}"
+        try:
+            repo.git.fetch("origin", f"--shallow-since={since}", refspec)
+            fetched.append(refspec)
+        except Exception:
+            continue
+    # One more generation, so commits at the cut-off diff against their parents
+    repo.git.fetch("origin", "--deepen=1", *fetched)
+    return repo
+
+def clone_repo(cleanURL, tempFolder, branch=None, bare=False, strategy="full", since=None, scope=None):
+    """
+    Clone with one of CLONE_STRATEGIES (since: the --shallow-since date);
+    returns the strategy used. Sparse clones and clones scoped to a
+    sub-directory are left without a checkout, for sparse_checkout().
+    """
+    print(f"Creating temporary folder ... Cloning Repository ({strategy}) - this could take a while ...")
+    if strategy != "full" and os.path.isdir(cleanURL):
+        # Local clones ignore --filter and --shallow-since; a file:// URL goes through the transport
+        cleanURL = "file://" + os.path.abspath(cleanURL)
+    options = {"bare": True} if bare else {}
+    if (strategy == "sparse" or scope) and not bare:
+        options["no_checkout"] = True
+    if strategy == "shallow":
+        try:
+            repo = _shallow_clone(cleanURL, tempFolder, branch, since, options)
+        except Exception as e:
+            # e.g. nothing on the default branch since the cut-off
+            print(f"Shallow clone failed, cloning in full instead: {e}")
+            force_remove(tempFolder)
+            return clone_repo(cleanURL, tempFolder, branch, bare=bare, strategy="full", scope=scope)
+    else:
+        if strategy in ("blobless", "sparse"):
+            options["filter"] = "blob:none"
+        if branch:
+            options["branch"] = branch
+        repo = Repo.clone_from(cleanURL, tempFolder, **options)
+        # Every later fetch keeps its pack, so pack_bytes() adds up the transfer
+        repo.git.config("transfer.unpackLimit", "1")
+    if bare:
+        if strategy == "blobless":
+            # What a checkout would have fetched, in one request
+            tree = repo.git.ls_tree("-r", "HEAD", "--", *([scope] if scope else []))
+            fetch_blobs(repo, [line.split()[2] for line in tree.splitlines() if line.split()[1] == "blob"])
+        # No checkout: files are read from the object database
+        prepare_bare(repo)
+    print(f"Repository cloned to: {tempFolder}")
+    return strategy
+
+def build_pipeline(args, tempFolder, deadline, progress, fileLines=None, fileRuns=None, clones=None):
+    """
+    clone -> files, index -> commits, loc, functions (and delta for a
+    sprint), for the requested metrics. The commit index (one git log over
+    all branches) and the classified file list are computed once and shared;
+    the metrics run side by side, each against the full time budget.
+    """
+    metrics = args.metrics
+    strategy = args.clone_strategy
+
+    def clone():
+        cleanURL, branch, urlPath = parse_repo_url(args.repo_url)
+        branch = args.branch or branch
+        scope = normalise_scope(args.path or urlPath)
+        since = None
+        if strategy == "shallow":
+            # A day early, so no commit in range sits on the shallow boundary
+            since = (parse_date(args.start_date) - timedelta(days=1)).strftime("%Y-%m-%d 00:00:00 +0000")
+        # The summary reports the strategy actually used
+        args.clone_strategy = clone_repo(cleanURL, tempFolder, branch, bare=args.bare, strategy=strategy,
+                                         since=since, scope=scope)
+        repo = Repo(tempFolder)
+        if scope and not repo.git.ls_tree("HEAD", "--", scope):
+            raise ValueError(f"Path {scope} not found in the repository")
+        sparse = not args.bare and (strategy == "sparse" or scope)
+        repoConfig = None
+        if args.bare or sparse:
+            # Nothing checked out to read it from (yet)
+            with BlobReader(repo) as blobs:
+                repoConfig = (blobs.read(CONFIG_FILENAME) or b"").decode("utf-8", errors="replace")
+        use_matcher(load_matcher(tempFolder, args.ignore_config, repo_config=repoConfig, scope=scope))
+        if scope:
+            print(f"Analysis limited to {scope}/")
+        if sparse:
+            always = [".gitattributes", "/" + CONFIG_FILENAME]
+            if strategy == "sparse":
+                # Already limited to the scope by the matcher
+                end_dt = parse_date(args.end_date)
+                touched = changed_files(repo, parse_date(args.start_date),
+                                        end_dt.replace(hour=23, minute=59, second=59) if end_dt else None)
+                print(f"Sparse checkout of {len(touched)} files changed in date range")
+                sparse_checkout(repo, touched, always=always)
+            else:
+                sparse_checkout(repo, (), dirs=[scope], always=always)
+        return tempFolder
+
+    # Per-author daily activity, kept next to the output and topped up with
+    # the commits each later run finds
+    cubePath = os.path.splitext(args.output)[0] + ".activity.npz" if args.output else None
+
+    def commits(clone, index):
+        cube = ActivityCube.load_or_new(cubePath, cube_key(args.repo_url, active_matcher()))
+        stats = get_commit_stats(clone, start_date=args.start_date, end_date=args.end_date, index=index, cube=cube)
+        if cubePath:
+            os.makedirs(os.path.dirname(cubePath) or ".", exist_ok=True)
+            cube.save(cubePath)
+        return stats
+
+    pipeline = Pipeline()
+    pipeline.add("clone", clone)
+    if "loc" in metrics or "functions" in metrics:
+        pipeline.add("files", lambda clone: classify_files(Repo(clone), max_lines=args.max_file_lines,
+                                                            max_bytes=args.max_file_bytes).included, deps=["clone"])
+    # Without commit stats the sprint file lists come from a cheaper --name-only walk
+    shared = ["clone", "files"]
+    if "commits" in metrics:
+        pipeline.add("index", lambda clone: CommitIndex(Repo(clone)), deps=["clone"])
+        pipeline.add("commits", commits, deps=["clone", "index"])
+        shared.append("index")
+    if "loc" in metrics:
+        pipeline.add("loc", lambda clone, files, index=None: calculate_LOC(
+            clone, start_date=args.start_date, end_date=args.end_date, files=files, engine=args.loc_engine,
+            target_error=args.loc_target_error, deadline=deadline, progress=progress["loc"], index=index,
+            file_lines=fileLines, file_runs=fileRuns),
+            deps=shared)
+    if "functions" in metrics:
+        pipeline.add("functions", lambda clone, files, index=None: analyse_functions(
+            clone, start_date=args.start_date, end_date=args.end_date, files=files, deadline=deadline,
+            progress=progress["functions"], index=index, clones=clones), deps=shared)
+    if "delta" in metrics and (args.start_date or args.end_date):
+        # Complexity added or removed between the sprint's boundary commits
+        pipeline.add("delta", lambda clone: complexity_delta(
+            clone, start_date=args.start_date, end_date=args.end_date, deadline=deadline,
+            progress=progress["delta"]), deps=["clone"])
+    return pipeline
 
 def main():
     p = argparse.ArgumentParser()
@@ -36,37 +233,97 @@ def main():
     p.add_argument("--start-date", dest="start_date", default=None)
     p.add_argument("--end-date", dest="end_date", default=None)
     p.add_argument("--output", dest="output", default=None)
+    p.add_argument("--ignore-config", dest="ignore_config", default=None,
+                   help="JSON file of ignore overrides, applied after the repository's own .contribution-ignore.json")
+    p.add_argument("--loc-engine", dest="loc_engine", choices=["blame", "replay", "sample"], default="blame",
+                   help="blame every file, replay the history once (same result, faster on long histories), "
+                        "or estimate from a sample of line ranges")
+    p.add_argument("--loc-target-error", dest="loc_target_error", type=float, default=0.02,
+                   help="with --loc-engine sample: widest acceptable confidence interval half-width (fraction)")
+    p.add_argument("--max-file-lines", dest="max_file_lines", type=int, default=DEFAULT_MAX_FILE_LINES,
+                   help="skip files longer than this in blame and complexity analysis (0 = no cap)")
+    p.add_argument("--max-file-bytes", dest="max_file_bytes", type=int, default=DEFAULT_MAX_FILE_BYTES,
+                   help="skip files larger than this in blame and complexity analysis (0 = no cap)")
+    p.add_argument("--time-budget", dest="time_budget", type=float, default=None,
+                   help="seconds to spend on analysis; blame-based metrics stop early with partial results")
+    p.add_argument("--branch", default=None,
+                   help="analyse this branch instead of the one in the URL (the URL's path still applies)")
+    p.add_argument("--path", default=None,
+                   help="only analyse this sub-directory (also taken from a /tree/<branch>/<path> URL)")
+    p.add_argument("--metrics", type=lambda value: [m for m in value.split(",") if m], default=list(METRICS),
+                   help=f"comma-separated subset of {','.join(METRICS)} to compute")
+    p.add_argument("--clone-strategy", dest="clone_strategy", choices=("auto",) + CLONE_STRATEGIES, default="auto",
+                   help="auto picks the cheapest clone for --metrics: shallow for sprint commit stats, "
+                        "sparse for sprint blame, blobless for other blame jobs, otherwise full")
+    p.add_argument("--ownership-index", dest="ownership_index", action="store_true",
+                   help="also write each file's line owners to <output>.ownership.idx for per-file views")
+    p.add_argument("--bare", action="store_true",
+                   help="clone without a worktree and read files straight from the object database")
+    p.add_argument("--profile", action="store_true",
+                   help="dump a cProfile of each stage into <output>.profiles/")
+    p.add_argument("--trace-memory", dest="trace_memory", action="store_true",
+                   help="record the Python heap peak per stage (tracemalloc; slows the run)")
     args = p.parse_args()
     repoURL = args.repo_url
+    unknown = set(args.metrics) - set(METRICS)
+    if unknown:
+        p.error(f"unknown metrics: {', '.join(sorted(unknown))}")
+    if args.clone_strategy == "auto":
+        args.clone_strategy = choose_clone_strategy(args.metrics, args.start_date, args.loc_engine)
+    if args.clone_strategy in ("shallow", "sparse") and not args.start_date:
+        p.error(f"--clone-strategy {args.clone_strategy} needs --start-date")
+    if args.bare and args.clone_strategy == "sparse":
+        # Nothing to check out sparsely without a worktree
+        args.clone_strategy = "blobless"
  
     currentDirectory = os.getcwd()
     tempFolder = tempfile.mkdtemp()
+    startedAt = time.monotonic()
+    # Per-stage timings and git traffic, written next to the output as a trace
+    outputStem = os.path.splitext(args.output)[0] if args.output else None
+    tracer = instrumentation.start(
+        profile_dir=outputStem + ".profiles" if args.profile and outputStem else None,
+        trace_memory=args.trace_memory,
+    )
+    deadline = Deadline(args.time_budget)
+    progress = {"loc": {}, "functions": {}, "delta": {}}
+    fileLines = {}
+    fileRuns = {} if args.ownership_index else None
+    # A team's overall analysis also feeds the cohort-wide clone index
+    teamMatch = TEAM_STATS_PATTERN.match(os.path.basename(args.output or ""))
+    clones = [] if teamMatch else None
+    pipeline = build_pipeline(args, tempFolder, deadline, progress, fileLines, fileRuns, clones)
  
+    transferred = None
     try:
-        print("Creating temporary folder ... Cloning Repository - this could take a while ...")
-        cleanURL, branch = parse_repo_url(repoURL)
-        if branch:
-            Repo.clone_from(cleanURL, tempFolder, branch=branch)
-        else:
-            Repo.clone_from(cleanURL, tempFolder)
-        print(f"Repository cloned to: {tempFolder}")
- 
-        results = analyse_functions(tempFolder, start_date=args.start_date, end_date=args.end_date)
-        locPercentage = calculate_LOC(tempFolder, start_date=args.start_date, end_date=args.end_date)
-        commitStats = get_commit_stats(tempFolder, start_date=args.start_date, end_date=args.end_date)
- 
-    except Exception as e:
-        print(f"Error during analysis: {e}")
-        results, locPercentage, commitStats = {}, {}, {}
+        pipeline.run()
+        if "clone" in pipeline.results:
+            # After the stages, so blobs fetched on demand are counted too
+            transferred = pack_bytes(Repo(tempFolder))
     finally:
         force_remove(tempFolder)
+    errors = pipeline.errors
+    commitStats = pipeline.results.get("commits") or []
+    locPercentage = pipeline.results.get("loc") or {}
+    results = pipeline.results.get("functions") or {}
+    for author, delta in (pipeline.results.get("delta") or {}).items():
+        results.setdefault(author, {}).update(delta)
+ 
+    completeness = {
+        "commits": 0.0 if "commits" in errors else 1.0,
+        "loc": 0.0 if "loc" in errors else progress["loc"].get("completeness", 0.0),
+        "functions": 0.0 if "functions" in errors else progress["functions"].get("completeness", 0.0),
+    }
+    if "delta" in pipeline.stages:
+        completeness["delta"] = 0.0 if "delta" in errors else progress["delta"].get("completeness", 0.0)
+    completeness = {metric: value for metric, value in completeness.items() if metric in args.metrics}
  
     dataDir = os.path.join(currentDirectory, "data")
     os.makedirs(dataDir, exist_ok=True)
  
     # Write output.json (complexity + LOC)
     outputJson = os.path.join(dataDir, "output.json")
-    write_json(outputJson, repoURL, results, locPercentage)
+    write_json(outputJson, repoURL, results, locPercentage, progress["loc"].get("intervals"))
  
     # Write commits.json from git log
     commitsJson = os.path.join(dataDir, "commits.json")
@@ -102,6 +359,53 @@ def main():
         commitsJson=commitsJson,
         finalStatsJson=finalStatsJson,
     )
+
+    # Per-file line owners from the same blame, for later ownership queries
+    if fileLines:
+        matrix = OwnershipMatrix.from_file_lines(fileLines)
+        matrix.save(os.path.splitext(finalStatsJson)[0] + ".ownership.npz")
+        count, removed = matrix.bus_factor()
+        print(f"Ownership of {len(matrix.paths)} files saved; bus factor {count} ({', '.join(removed)})")
+    if fileRuns:
+        indexPath = os.path.splitext(finalStatsJson)[0] + ".ownership.idx"
+        print(f"Line owners of {write_ownership_index(indexPath, fileRuns)} files written to {indexPath}")
+
+    # Refresh the cohort-wide scores so dashboards can read them precomputed
+    if os.path.basename(finalStatsJson).startswith("overall_"):
+        try:
+            score_cohort(os.path.dirname(finalStatsJson))
+        except Exception as e:
+            print(f"Cohort scoring skipped: {e}")
+        if teamMatch and "functions" in pipeline.results:
+            cohortDir = os.path.join(os.path.dirname(finalStatsJson), "cohort")
+            try:
+                update_clone_index(os.path.join(cohortDir, "clones.sqlite"), teamMatch.group(1), clones,
+                                   report_path=os.path.join(cohortDir, "clones.json"))
+            except Exception as e:
+                print(f"Clone index skipped: {e}")
+
+    # Sidecar describing how much of the analysis the stats cover
+    summaryJson = os.path.splitext(finalStatsJson)[0] + ".summary.json"
+    summary = {
+        "repo": repoURL,
+        "time_budget": args.time_budget,
+        "elapsed_seconds": round(time.monotonic() - startedAt, 2),
+        "complete": not errors and all(v == 1.0 for v in completeness.values()),
+        "completeness": completeness,
+        "errors": errors,
+        "clone": {"strategy": args.clone_strategy, "bytes_transferred": transferred},
+        "stages": pipeline.timings,
+    }
+    if "intervals" in progress["loc"]:
+        summary["loc_estimate"] = {key: progress["loc"][key]
+                                   for key in ("confidence", "sampled_lines", "total_lines")}
+    with open(summaryJson, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    print(f"Completeness: {completeness}")
+    if transferred is not None:
+        print(f"Clone ({args.clone_strategy}) transferred {transferred / 2 ** 20:.1f} MiB")
+    instrumentation.stop()
+    tracer.write(os.path.splitext(finalStatsJson)[0] + ".trace.json")
  
  
 if __name__ == "__main__":
@@ -1,13 +1,17 @@
 import os
 import json
 from collections import defaultdict 
+from cohortScoring import share_percentages
 
-def write_json(jsonPath, repoURL, results, locPercentage):
+def write_json(jsonPath, repoURL, results, locPercentage, locIntervals=None):
     write = {
         "repo": repoURL,
         "authors": results,
         "%LOC": locPercentage
     }
+    # Confidence intervals of a sampled %LOC estimate
+    if locIntervals:
+        write["%LOC_interval"] = locIntervals
     os.makedirs(os.path.dirname(jsonPath), exist_ok=True)
     with open(jsonPath, "w", encoding="utf-8") as f:
         json.dump(write, f, indent=2)
@@ -26,6 +30,8 @@ def combine_json(outputJson, commitsJson, finalStatsJson):
     locMap = (outputData or {}).get("%LOC", {})
     for author, loc in locMap.items():
         merged[author]["percentage_of_LOC"] = loc
+    for author, interval in (outputData or {}).get("%LOC_interval", {}).items():
+        merged[author]["percentage_of_LOC_interval"] = interval
     for a in list(merged.keys()):
         merged[a].setdefault("percentage_of_LOC", 0.0)
 
@@ -40,13 +46,14 @@ def combine_json(outputJson, commitsJson, finalStatsJson):
     for a, stats in commitJSONstat.items():
         merged[a].update(stats)
 
-    totalCommits = sum(v["commits"] for v in commitJSONstat.values()) or 1
-    totalEdits = sum(v["additions"] + v["deletions"] for v in commitJSONstat.values()) or 1
-    for a, data in merged.items():
-        commits = int(data.get("commits", 0))
-        edits = int(data.get("additions", 0)) + int(data.get("deletions", 0))
-        data["commit_percentage"] = round((commits / totalCommits) * 100, 2)
-        data["edit_percentage"] = round((edits / totalEdits) * 100, 2)
+    # Shares of the team totals, using the same helper as the cohort engine
+    commits = [int(data.get("commits", 0)) for data in merged.values()]
+    edits = [int(data.get("additions", 0)) + int(data.get("deletions", 0)) for data in merged.values()]
+    commitPct = share_percentages(commits)
+    editPct = share_percentages(edits)
+    for i, data in enumerate(merged.values()):
+        data["commit_percentage"] = round(float(commitPct[i]), 2)
+        data["edit_percentage"] = round(float(editPct[i]), 2)
 
     os.makedirs(os.path.dirname(finalStatsJson), exist_ok=True)
     with open(finalStatsJson, "w", encoding="utf-8") as f:
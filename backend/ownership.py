@@ -0,0 +1,384 @@
+import re
+import codecs
+import argparse
+import subprocess
+from collections import defaultdict
+from git import Repo
+from ignoreFiles import should_ignore, scope_pathspecs
+from instrumentation import count_git
+from gitUtils import blame_author_lines
+
+# Line ownership by replaying history once instead of blaming every file.
+#
+# Commits are read parents-first from a single `git log --reverse -p -U0`.
+# Each commit's state maps path -> list of author ids, one per line, and is
+# derived from its parent's state by applying the zero-context hunks: lines
+# inside a hunk belong to the commit's author, everything else is carried
+# over. Merges get no patch in that stream; they are diffed against each
+# parent separately and, like blame, each line is inherited from the first
+# parent that has it unchanged, falling back to the merge's author.
+#
+# States are only kept while a commit still has unprocessed children, and a
+# commit's last child takes its parent's state over instead of copying it.
+
+LOG_FORMAT = "%x01%H%x00%P%x00%aN"
+DIFF_OPTIONS = ("-U0", "-M", "--diff-algorithm=myers", "--no-color", "--no-ext-diff")
+
+_HUNK = re.compile(rb"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+def _git(repo, *args):
+    count_git()
+    return subprocess.Popen(
+        ["git", "-c", "core.quotepath=false", *args],
+        cwd=repo.working_dir, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+    )
+
+
+def _path(raw, prefix=b""):
+    raw = raw.rstrip(b"\n").rstrip(b"\t")
+    if raw.startswith(b'"') and raw.endswith(b'"'):
+        # C-style quoting for names with control characters or quotes
+        raw = codecs.escape_decode(raw[1:-1])[0]
+    if prefix and raw.startswith(prefix):
+        raw = raw[len(prefix):]
+    return raw.decode("utf-8", errors="surrogateescape")
+
+
+def _header_path(rest):
+    # "a/<path> b/<path>" when old and new path are the same
+    half = (len(rest) - 5) // 2
+    if half > 0 and rest[half + 3:half + 5] == b"b/":
+        return _path(rest[:half + 2], b"a/")
+    return None
+
+
+class FilePatch:
+    __slots__ = ("old_path", "new_path", "hunks", "binary")
+
+    def __init__(self):
+        self.old_path = None
+        self.new_path = None
+        self.hunks = []
+        self.binary = False
+
+
+def _parse_patches(lines):
+    """
+    Parse `git log/diff -p -U0` output. Yields ("commit", sha, parents, author)
+    for every LOG_FORMAT header and ("file", FilePatch) for every file section.
+    """
+    patch = None
+    header_path = None
+    created = deleted = False
+    pending = 0   # body lines left in the current hunk
+
+    def finish():
+        if patch is None:
+            return None
+        if patch.old_path is None and not created:
+            patch.old_path = header_path
+        if patch.new_path is None and not deleted:
+            patch.new_path = header_path
+        return patch
+
+    for line in lines:
+        if pending:
+            if line.startswith(b"\\"):
+                continue
+            pending -= 1
+            continue
+        if line.startswith(b"\\"):
+            continue
+        if line.startswith(b"\x01"):
+            done = finish()
+            if done:
+                yield ("file", done)
+            patch = None
+            sha, parents, author = line[1:].rstrip(b"\n").split(b"\0")
+            yield ("commit", sha.decode(), parents.decode().split(), author.decode("utf-8", errors="replace"))
+        elif line.startswith(b"diff --git "):
+            done = finish()
+            if done:
+                yield ("file", done)
+            patch = FilePatch()
+            header_path = _header_path(line[11:].rstrip(b"\n"))
+            created = deleted = False
+        elif patch is None:
+            continue
+        elif line.startswith(b"@@ "):
+            match = _HUNK.match(line)
+            old_start, old_len, _, new_len = match.groups()
+            old_len = 1 if old_len is None else int(old_len)
+            new_len = 1 if new_len is None else int(new_len)
+            patch.hunks.append((int(old_start), old_len, new_len))
+            pending = old_len + new_len
+        elif line.startswith(b"--- "):
+            created = line.startswith(b"--- /dev/null")
+            if not created:
+                patch.old_path = _path(line[4:], b"a/")
+        elif line.startswith(b"+++ "):
+            deleted = line.startswith(b"+++ /dev/null")
+            if not deleted:
+                patch.new_path = _path(line[4:], b"b/")
+        elif line.startswith(b"rename from "):
+            patch.old_path = _path(line[12:])
+        elif line.startswith(b"rename to "):
+            patch.new_path = _path(line[10:])
+        elif line.startswith(b"new file mode"):
+            created = True
+        elif line.startswith(b"deleted file mode"):
+            deleted = True
+        elif line.startswith(b"Binary files "):
+            patch.binary = True
+
+    done = finish()
+    if done:
+        yield ("file", done)
+
+
+def _carry(old_lines, hunks, fill):
+    """Apply zero-context hunks to old_lines, new lines taking `fill`."""
+    out = []
+    pos = 0
+    for old_start, old_len, new_len in hunks:
+        # With a zero-length side, the start is the line *before* the change
+        start = old_start if old_len == 0 else old_start - 1
+        out.extend(old_lines[pos:start])
+        out.extend([fill] * new_len)
+        pos = start + old_len
+    out.extend(old_lines[pos:])
+    return out
+
+
+def _apply(state, patches, author):
+    """New state for a single-parent commit; `state` may be modified in place."""
+    moved = {}
+    for patch in patches:
+        if patch.old_path is not None and patch.old_path != patch.new_path:
+            moved[patch.old_path] = state.pop(patch.old_path, [])
+    for patch in patches:
+        if patch.new_path is None:
+            continue
+        if patch.old_path is None:
+            old = []
+        elif patch.old_path != patch.new_path:
+            old = moved.get(patch.old_path, [])
+        else:
+            old = state.get(patch.new_path, [])
+        if patch.binary or old is None:
+            state[patch.new_path] = None
+        elif patch.hunks:
+            state[patch.new_path] = _carry(old, patch.hunks, author)
+        else:
+            state[patch.new_path] = old
+    return state
+
+
+def _parent_lines(state, by_new, path):
+    """
+    (lines, identical) for `path` of a merge as seen from one parent: that
+    parent's authors at the merge's line positions (None where the merge
+    changed the line), and whether the parent has the file unchanged.
+    """
+    patch = by_new.get(path)
+    if patch is None:
+        return state.get(path), True
+    if patch.old_path is None or patch.binary:
+        return None, False
+    source = state.get(patch.old_path)
+    if source is None or not patch.hunks:
+        return source, source is not None
+    index = _carry(list(range(len(source))), patch.hunks, None)
+    return [source[i] if i is not None else None for i in index], False
+
+
+def _merge(parent_states, parent_patches, author):
+    """
+    State of a merge, following blame: a file identical to one of the
+    parents' copies takes that parent's authors wholesale; otherwise each line
+    is inherited from the first parent that has it unchanged, and lines no
+    parent has belong to the merge.
+    """
+    # The first parent's view fixes the merge's set of paths
+    result = _apply(dict(parent_states[0]), parent_patches[0], None)
+    parents = [
+        (state, {p.new_path: p for p in patches if p.new_path is not None})
+        for state, patches in zip(parent_states, parent_patches)
+    ]
+
+    for path, lines in result.items():
+        if lines is None:
+            continue
+        views = [_parent_lines(state, by_new, path) for state, by_new in parents]
+        whole = next((source for source, identical in views if identical), None)
+        if whole is not None:
+            result[path] = list(whole)
+            continue
+        for source, _ in views[1:]:
+            if None not in lines:
+                break
+            if source and len(source) == len(lines):
+                lines = [own if own is not None else theirs for own, theirs in zip(lines, source)]
+        result[path] = [author if a is None else a for a in lines]
+    return result
+
+
+def _children(repo, rev):
+    counts = defaultdict(int)
+    out = repo.git.rev_list("--parents", rev)
+    for line in out.splitlines():
+        for parent in line.split()[1:]:
+            counts[parent] += 1
+    return counts
+
+
+def _diff_patches(repo, parent, sha):
+    proc = _git(repo, "diff", *DIFF_OPTIONS, parent, sha, "--", *scope_pathspecs())
+    patches = [event[1] for event in _parse_patches(proc.stdout) if event[0] == "file"]
+    proc.wait()
+    return patches
+
+
+class OwnershipReplay:
+    """
+    Replays the history of `rev` once. `states` holds the final line-author
+    state of rev and of every commit in `snapshots`, as {path: [author, ...]}
+    (None for binary files).
+    """
+
+    def __init__(self, repo, rev="HEAD", snapshots=()):
+        self.repo = repo
+        self.head = repo.git.rev_parse(rev)
+        self.snapshots = {repo.git.rev_parse(s) for s in snapshots}
+        self.states = {}
+
+    def run(self):
+        remaining = _children(self.repo, self.head)
+        live = {}
+        keep = self.snapshots | {self.head}
+
+        def take(parent, copy=True):
+            # The last child inherits the parent's state, earlier ones copy it
+            remaining[parent] -= 1
+            if remaining[parent] <= 0 and parent not in keep:
+                return live.pop(parent, {})
+            return dict(live.get(parent, {})) if copy else None
+
+        def finish(sha, state):
+            live[sha] = state
+            if sha in keep:
+                self.states[sha] = state
+
+        # A path scope limits the patches, not the commits: --full-history
+        # --sparse keeps every commit and its real parents in the stream
+        scope = scope_pathspecs()
+        proc = _git(self.repo, "log", "--reverse", "--topo-order", "-p", *DIFF_OPTIONS,
+                    f"--format={LOG_FORMAT}", *(["--full-history", "--sparse"] if scope else []),
+                    self.head, "--", *scope)
+        current = None   # (sha, parents, author, patches)
+
+        def complete(commit):
+            sha, parents, author, patches = commit
+            if len(parents) <= 1:
+                state = take(parents[0]) if parents else {}
+                finish(sha, _apply(state, patches, author))
+            else:
+                states = [live.get(p, {}) for p in parents]
+                merged = _merge(states, [_diff_patches(self.repo, p, sha) for p in parents], author)
+                for p in parents:
+                    take(p, copy=False)
+                finish(sha, merged)
+
+        for event in _parse_patches(proc.stdout):
+            if event[0] == "commit":
+                if current:
+                    complete(current)
+                current = (event[1], event[2], event[3], [])
+            elif current:
+                current[3].append(event[1])
+        if current:
+            complete(current)
+        proc.wait()
+        return self
+
+    def author_lines(self, sha=None, paths=None):
+        """{author: lines} at sha (default rev) over `paths`, or every non-ignored path."""
+        state = self.states.get(sha or self.head, {})
+        counts = defaultdict(int)
+        for path in (paths if paths is not None else state):
+            lines = state.get(path)
+            if not lines or (paths is None and should_ignore(path)):
+                continue
+            for author in lines:
+                counts[author] += 1
+        return dict(counts)
+
+    def file_lines(self, path, sha=None):
+        return self.states.get(sha or self.head, {}).get(path)
+
+
+def snapshots_at(repo, end_dates, rev="HEAD"):
+    """
+    {end_date: sha} of the last commit on rev's first-parent line committed
+    on or before each end date (YYYY-MM-DD, inclusive), e.g. sprint ends.
+    """
+    commits = {}
+    for end_date in end_dates:
+        sha = repo.git.rev_list("-1", "--first-parent", f"--before={end_date} 23:59:59 +0000", rev)
+        if sha:
+            commits[end_date] = sha
+    return commits
+
+
+def sprint_ownership(repo, end_dates, paths=None, rev="HEAD"):
+    """{end_date: {author: lines}} for every sprint end, from a single replay."""
+    commits = snapshots_at(repo, end_dates, rev)
+    replay = OwnershipReplay(repo, rev, snapshots=commits.values()).run()
+    return {end_date: replay.author_lines(sha, paths) for end_date, sha in commits.items()}
+
+
+def verify_against_blame(repo, paths=None, rev="HEAD"):
+    """
+    Compare the replayed ownership with `git blame` file by file. Returns
+    {path: (replay_counts, blame_counts)} for every file that differs.
+    """
+    replay = OwnershipReplay(repo, rev).run()
+    state = replay.states.get(replay.head, {})
+    if paths is None:
+        paths = [p for p, lines in state.items() if lines is not None and not should_ignore(p)]
+    mismatches = {}
+    for path in paths:
+        lines = state.get(path) or []
+        ours = defaultdict(int)
+        for author in lines:
+            ours[author] += 1
+        theirs = blame_author_lines(repo, path)
+        if dict(ours) != theirs:
+            mismatches[path] = (dict(ours), theirs)
+    return mismatches
+
+
+def main():
+    p = argparse.ArgumentParser(description="Line ownership from one replay of the history")
+    p.add_argument("repo_path")
+    p.add_argument("--rev", default="HEAD")
+    p.add_argument("--verify", action="store_true", help="check every file against git blame")
+    args = p.parse_args()
+
+    repo = Repo(args.repo_path)
+    if args.verify:
+        mismatches = verify_against_blame(repo, rev=args.rev)
+        for path, (ours, theirs) in mismatches.items():
+            print(f"MISMATCH {path}: replay={ours} blame={theirs}")
+        print(f"{len(mismatches)} files differ from git blame")
+        raise SystemExit(1 if mismatches else 0)
+
+    counts = OwnershipReplay(repo, args.rev).run().author_lines()
+    total = sum(counts.values()) or 1
+    for author, lines in sorted(counts.items(), key=lambda kv: -kv[1]):
+        print(f"{author}: {lines} lines ({round(lines / total * 100, 2)}%)")
+
+
+if __name__ == "__main__":
+    main()
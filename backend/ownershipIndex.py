@@ -0,0 +1,89 @@
+import gzip
+import json
+import struct
+import argparse
+
+# Layout: MAGIC, then the offset and length of the table (two little-endian
+# uint64), then one gzip member per file, then the table as a gzip member:
+#   {"authors": [...], "files": {path: [offset, length]}}
+# Each file's member is {"lines": {author: lines}, "runs": [[author index,
+# first line, line count], ...]} with consecutive lines of one author as one
+# run, so a reader needs the header, the table and that one member.
+MAGIC = b"OWNIDX1\n"
+HEADER = struct.Struct("<8sQQ")
+
+
+def write_ownership_index(path, file_runs):
+    """Write {path: [(author, first_line, line_count)]} (from calculate_LOC) to path."""
+    authors = sorted({author for runs in file_runs.values() for author, _, _ in runs if author})
+    authorIndex = {author: i for i, author in enumerate(authors)}
+    table = {}
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, 0, 0))
+        for relPath in sorted(file_runs):
+            runs = [(author, first, count) for author, first, count in file_runs[relPath] if author]
+            lines = {}
+            for author, _, count in runs:
+                lines[author] = lines.get(author, 0) + count
+            record = {
+                "lines": lines,
+                "runs": [[authorIndex[author], first, count] for author, first, count in runs],
+            }
+            data = gzip.compress(json.dumps(record, separators=(",", ":")).encode("utf-8"), mtime=0)
+            table[relPath] = [f.tell(), len(data)]
+            f.write(data)
+        tableOffset = f.tell()
+        data = gzip.compress(json.dumps({"authors": authors, "files": table}, separators=(",", ":")).encode("utf-8"),
+                             mtime=0)
+        f.write(data)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, tableOffset, len(data)))
+    return len(table)
+
+
+def _read_at(f, offset, length):
+    f.seek(offset)
+    return json.loads(gzip.decompress(f.read(length)))
+
+
+def read_table(path):
+    """{"authors": [...], "files": {path: [offset, length]}} of an ownership index."""
+    with open(path, "rb") as f:
+        magic, offset, length = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an ownership index")
+        return _read_at(f, offset, length)
+
+
+def read_file_ownership(path, relPath, table=None):
+    """
+    {"lines": {author: lines}, "runs": [[author, first, count], ...]} of one
+    file, or None when it is not in the index. Pass the table from
+    read_table() to look up several files without re-reading it.
+    """
+    table = table or read_table(path)
+    entry = table["files"].get(relPath)
+    if entry is None:
+        return None
+    with open(path, "rb") as f:
+        record = _read_at(f, *entry)
+    record["runs"] = [[table["authors"][a], first, count] for a, first, count in record["runs"]]
+    return record
+
+
+def main():
+    p = argparse.ArgumentParser(description="Read one file's line owners from an ownership index")
+    p.add_argument("index", help="<output>.ownership.idx written by main.py --ownership-index")
+    p.add_argument("path", nargs="?", default=None, help="repository-relative file (default: list the files)")
+    args = p.parse_args()
+    if args.path is None:
+        print("\n".join(read_table(args.index)["files"]))
+        return
+    record = read_file_ownership(args.index, args.path)
+    if record is None:
+        raise SystemExit(f"{args.path} is not in {args.index}")
+    print(json.dumps(record, indent=2))
+
+
+if __name__ == "__main__":
+    main()
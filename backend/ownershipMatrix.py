@@ -0,0 +1,156 @@
+import json
+import bisect
+import argparse
+import numpy as np
+
+# An author knows a file when they own at least this share of its lines (or the most)
+OWNER_SHARE = 0.25
+# The bus factor is reached once more than this share of the files has no one left who knows it
+ORPHAN_SHARE = 0.5
+
+
+class OwnershipMatrix:
+    """
+    Surviving lines per (file, author) from the %LOC blame, as compressed
+    sparse rows: the authors of file i are indices[indptr[i]:indptr[i + 1]]
+    with their line counts in data. Paths are sorted, so every directory is a
+    contiguous block of rows and is found with two bisects.
+    """
+
+    def __init__(self, paths, authors, indptr, indices, data):
+        self.paths = list(paths)
+        self.authors = list(authors)
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+
+    @classmethod
+    def from_file_lines(cls, file_lines):
+        """file_lines: {path: {author: lines}}"""
+        paths = sorted(path for path, counts in file_lines.items() if counts)
+        authors = sorted({author for path in paths for author in file_lines[path]})
+        author_index = {author: i for i, author in enumerate(authors)}
+        indptr, indices, data = [0], [], []
+        for path in paths:
+            for author, lines in sorted(file_lines[path].items(), key=lambda kv: author_index[kv[0]]):
+                indices.append(author_index[author])
+                data.append(lines)
+            indptr.append(len(indices))
+        return cls(paths, authors, np.array(indptr, dtype=np.int64), np.array(indices, dtype=np.int32),
+                   np.array(data, dtype=np.int64))
+
+    def save(self, path):
+        np.savez_compressed(
+            path,
+            paths=np.array(self.paths, dtype=str),
+            authors=np.array(self.authors, dtype=str),
+            indptr=self.indptr,
+            indices=self.indices,
+            data=self.data.astype(np.int32),
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as m:
+            return cls(m["paths"].tolist(), m["authors"].tolist(), m["indptr"], m["indices"],
+                       m["data"].astype(np.int64))
+
+    def rows(self, prefix=""):
+        """Row range [lo, hi) of the file `prefix`, or of every file under the directory `prefix`."""
+        prefix = prefix.strip("/")
+        if not prefix:
+            return 0, len(self.paths)
+        lo = bisect.bisect_left(self.paths, prefix)
+        if lo < len(self.paths) and self.paths[lo] == prefix:
+            return lo, lo + 1
+        lo = bisect.bisect_left(self.paths, prefix + "/")
+        # "0" sorts right after "/", so this is the end of the directory
+        return lo, bisect.bisect_left(self.paths, prefix + "0")
+
+    def _totals(self, lo, hi):
+        start, end = self.indptr[lo], self.indptr[hi]
+        return np.bincount(self.indices[start:end], weights=self.data[start:end], minlength=len(self.authors))
+
+    def author_lines(self, prefix=""):
+        """{author: lines} under prefix, most lines first."""
+        totals = self._totals(*self.rows(prefix))
+        order = np.argsort(-totals, kind="stable")
+        return {self.authors[i]: int(totals[i]) for i in order if totals[i]}
+
+    def top_owners(self, prefix="", k=3):
+        """The k authors with the most lines under prefix, as (author, lines, share %)."""
+        counts = self.author_lines(prefix)
+        total = sum(counts.values()) or 1
+        return [(author, lines, round(lines / total * 100, 2)) for author, lines in list(counts.items())[:k]]
+
+    def rollup(self, depth=1):
+        """{directory: {author: lines}} for the directories `depth` levels down ("" for files above them)."""
+        groups = {}
+        group = np.empty(len(self.paths), dtype=np.intp)
+        for i, path in enumerate(self.paths):
+            key = "/".join(path.split("/")[:-1][:depth])
+            group[i] = groups.setdefault(key, len(groups))
+        totals = np.zeros((len(groups), len(self.authors)), dtype=np.int64)
+        np.add.at(totals, (np.repeat(group, np.diff(self.indptr)), self.indices), self.data)
+        return {
+            key: {self.authors[a]: int(totals[g, a]) for a in np.argsort(-totals[g], kind="stable") if totals[g, a]}
+            for key, g in sorted(groups.items())
+        }
+
+    def bus_factor(self, prefix="", owner_share=OWNER_SHARE, orphan_share=ORPHAN_SHARE):
+        """
+        Greedy truck factor under prefix: keep removing the author who knows
+        the most files still known by someone, until more than orphan_share
+        of the files are known by no one left. Returns (count, authors removed).
+        """
+        lo, hi = self.rows(prefix)
+        if lo == hi:
+            return 0, []
+        start, end = self.indptr[lo], self.indptr[hi]
+        row = np.repeat(np.arange(hi - lo), np.diff(self.indptr[lo:hi + 1]))
+        author = self.indices[start:end]
+        lines = self.data[start:end]
+        fileTotal = np.bincount(row, weights=lines, minlength=hi - lo)
+        fileMax = np.zeros(hi - lo, dtype=np.int64)
+        np.maximum.at(fileMax, row, lines)
+        knows = (lines >= owner_share * fileTotal[row]) | (lines == fileMax[row])
+        row, author = row[knows], author[knows]
+
+        alive = np.ones(len(self.authors), dtype=bool)
+        removed = []
+        while alive.any():
+            left = alive[author]
+            known = np.bincount(row[left], minlength=hi - lo)
+            if (known == 0).sum() > orphan_share * (hi - lo):
+                break
+            coverage = np.bincount(author[left], minlength=len(self.authors))
+            top = int(np.argmax(coverage))
+            alive[top] = False
+            removed.append(self.authors[top])
+        return len(removed), removed
+
+
+def main():
+    p = argparse.ArgumentParser(description="Ownership queries on a saved author x file matrix")
+    p.add_argument("matrix", help="<output>.ownership.npz written by main.py")
+    p.add_argument("--path", default="", help="file or directory to query (default: the whole repository)")
+    p.add_argument("--top", type=int, default=3, help="how many owners to list")
+    p.add_argument("--depth", type=int, default=None, help="roll up per directory this many levels down instead")
+    args = p.parse_args()
+    matrix = OwnershipMatrix.load(args.matrix)
+    if args.depth is not None:
+        print(json.dumps(matrix.rollup(args.depth), indent=2))
+        return
+    count, removed = matrix.bus_factor(args.path)
+    lo, hi = matrix.rows(args.path)
+    print(json.dumps({
+        "path": args.path.strip("/"),
+        "files": hi - lo,
+        "top_owners": matrix.top_owners(args.path, args.top),
+        "bus_factor": count,
+        "bus_factor_authors": removed,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
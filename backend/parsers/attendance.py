@@ -1,72 +1,226 @@
 import json
 import re
-import sys
+import argparse
+from array import array
+from pathlib import Path
 import openpyxl
 from datetime import date, datetime
 
-def parse_attendance_xlsx(excel_file, json_file):
-    wb = openpyxl.load_workbook(excel_file)
-    sheet = wb.active
+NON_MEMBER_COLUMNS = ("Week", "Date", "Reasons for Absence")
+# A column with one of these headers splits a single sheet into several teams
+TEAM_COLUMNS = ("Team", "Team Name", "Team ID")
+
+_REASON_SPLIT = re.compile(r"[;,]")
+_REASON_ENTRY = re.compile(r"\s*([\w\s\(\)]+?)\s*-\s*(.+)")
+
+
+def _format_date(raw_date):
+    if isinstance(raw_date, (datetime, date)):
+        return raw_date.strftime("%Y-%m-%d")
+    return str(raw_date).strip()
+
+
+def _parse_reasons(reasons_text):
+    reasons = {}
+    for entry in _REASON_SPLIT.split(reasons_text):
+        match = _REASON_ENTRY.match(entry.strip())
+        if match:
+            name, reason = match.groups()
+            reasons[name.strip()] = reason.strip()
+    return reasons
+
+
+class TeamAttendance:
+    """
+    Running attendance for one team. Members are interned to indexes so the
+    attended/total counts live in two flat integer arrays rather than a dict
+    per member per row.
+    """
+    __slots__ = ("member_index", "attended", "total", "weeks")
+
+    def __init__(self):
+        self.member_index = {}
+        self.attended = array("I")
+        self.total = array("I")
+        self.weeks = []
+
+    def member(self, name):
+        idx = self.member_index.get(name)
+        if idx is None:
+            idx = self.member_index[name] = len(self.attended)
+            self.attended.append(0)
+            self.total.append(0)
+        return idx
+
+    def summary(self):
+        return {
+            member: round(self.attended[idx] / self.total[idx], 2) if self.total[idx] else 0.0
+            for member, idx in self.member_index.items()
+        }
+
+    def to_json(self):
+        return {
+            "WeeklyAttendance": self.weeks,
+            "AttendanceSummary": self.summary()
+        }
+
+
+def _read_sheet(sheet, default_team, teams):
+    """
+    Stream one worksheet into the per-team accumulators in `teams`.
 
-    headers = [cell.value for cell in sheet[1]]
-    team_members = [name for name in headers if name not in ("Week", "Date", "Reasons for Absence")]
+    Without a team column every member column counts for every row, matching
+    the single-team sheets the lecturers hand out. With a team column a member
+    only counts towards the row's team when their cell is filled in, because a
+    master sheet leaves other teams' columns blank.
 
-    data = []
-    attendance_count = {member: {"attended": 0, "total": 0} for member in team_members}
+    Returns the number of rows read, or None when the sheet has no Week and
+    Date header row and so is not an attendance sheet.
+    """
+    rows = sheet.iter_rows(values_only=True)
+    header_row = next(rows, None)
+    if not header_row:
+        return None
+    headers = [str(h).strip() if h is not None else None for h in header_row]
+    if "Week" not in headers or "Date" not in headers:
+        return None
 
-    for row in sheet.iter_rows(min_row=2, values_only=True):
-        if not row[0]:
+    week_col = headers.index("Week")
+    date_col = headers.index("Date")
+    reasons_col = headers.index("Reasons for Absence") if "Reasons for Absence" in headers else None
+    team_col = next((headers.index(h) for h in TEAM_COLUMNS if h in headers), None)
+    member_cols = [
+        (col, name) for col, name in enumerate(headers)
+        if name and name not in NON_MEMBER_COLUMNS and col != team_col
+    ]
+
+    # Column -> member index, resolved once per team rather than once per row
+    column_maps = {}
+
+    def columns_for(team_key):
+        mapping = column_maps.get(team_key)
+        if mapping is None:
+            team = teams.get(team_key)
+            if team is None:
+                team = teams[team_key] = TeamAttendance()
+            mapping = column_maps[team_key] = (team, [(col, name, team.member(name) if team_col is None else None)
+                                                      for col, name in member_cols])
+        return mapping
+
+    width = len(headers)
+    count = 0
+    for row in rows:
+        if not row or not row[0]:
             continue
-        row_dict = dict(zip(headers, row))
+        if len(row) < width:
+            row = tuple(row) + (None,) * (width - len(row))
 
-        raw_date = row_dict["Date"]
-        if isinstance(raw_date, (datetime, date)):
-            date_str = raw_date.strftime("%Y-%m-%d")
-        else:
-            date_str = str(raw_date).strip()
+        team_key = default_team
+        if team_col is not None:
+            team_key = str(row[team_col] or "").strip()
+            if not team_key:
+                continue
+        team, columns = columns_for(team_key)
 
-        week_num = int(row_dict["Week"])
         week_info = {
-            "Week": week_num,
-            "Date": date_str,
+            "Week": int(row[week_col]),
+            "Date": _format_date(row[date_col]),
             "Absentees": [],
             "Reasons": {}
         }
 
-        for member in team_members:
-            status = str(row_dict[member]).strip().lower() if row_dict[member] else ""
-            attendance_count[member]["total"] += 1
+        for col, name, idx in columns:
+            value = row[col]
+            if idx is None:
+                if value is None or str(value).strip() == "":
+                    continue
+                idx = team.member(name)
+            status = str(value).strip().lower() if value else ""
+            team.total[idx] += 1
             if status == "present":
-                attendance_count[member]["attended"] += 1
+                team.attended[idx] += 1
             elif status == "absent":
-                week_info["Absentees"].append(member)
+                week_info["Absentees"].append(name)
+
+        if reasons_col is not None:
+            reasons_text = str(row[reasons_col] or "").strip()
+            if reasons_text:
+                week_info["Reasons"] = _parse_reasons(reasons_text)
 
-        reasons_text = str(row_dict.get("Reasons for Absence") or "").strip()
-        if reasons_text:
-            for entry in re.split(r"[;,]", reasons_text):
-                match = re.match(r"\s*([\w\s\(\)]+?)\s*-\s*(.+)", entry.strip())
-                if match:
-                    name, reason = match.groups()
-                    week_info["Reasons"][name.strip()] = reason.strip()
+        team.weeks.append(week_info)
+        count += 1
+    return count
 
-        data.append(week_info)
 
-    attendance_summary = {
-        member: round(rec["attended"] / rec["total"], 2) if rec["total"] else 0.0
-        for member, rec in attendance_count.items()
-    }
+def read_attendance_workbooks(excel_files, all_sheets=True):
+    """
+    Stream any number of attendance workbooks in read-only, values-only mode.
 
-    output = {
-        "WeeklyAttendance": data,
-        "AttendanceSummary": attendance_summary
-    }
+    Returns {team: TeamAttendance}. Rows are keyed by the sheet's team column
+    when it has one, otherwise by sheet title - or by the file name when the
+    workbook only has a single sheet, so per-team uploads don't all collapse
+    into "Sheet1". A team that appears in several sheets or files is merged.
+    Sheets without the Week/Date headers are skipped, but a ValueError is
+    raised when no sheet of any workbook has them.
+    """
+    if isinstance(excel_files, (str, Path)):
+        excel_files = [excel_files]
+
+    teams = {}
+    parsed = False
+    for excel_file in excel_files:
+        wb = openpyxl.load_workbook(excel_file, read_only=True, data_only=True)
+        try:
+            sheets = wb.worksheets if all_sheets else [wb.active]
+            for sheet in sheets:
+                default_team = Path(excel_file).stem if len(wb.sheetnames) == 1 else sheet.title
+                if _read_sheet(sheet, default_team, teams) is not None:
+                    parsed = True
+        finally:
+            wb.close()
+    if not parsed:
+        raise ValueError("No attendance sheet found: expected a header row with 'Week' and 'Date' columns")
+    return teams
+
+
+def parse_attendance_xlsx(excel_file, json_file):
+    # Single-team upload: only the active sheet, written in the original shape
+    teams = read_attendance_workbooks([excel_file], all_sheets=False)
+    if len(teams) > 1:
+        raise ValueError(f"{excel_file} has rows for {len(teams)} teams ({', '.join(sorted(teams))}); "
+                         "parse it with --cohort to keep one summary per team")
+    team = next(iter(teams.values()), TeamAttendance())
+    output = team.to_json()
 
     with open(json_file, "w", encoding="utf-8") as out:
         json.dump(output, out, indent=2, ensure_ascii=False)
+    return output
+
+
+def parse_attendance_cohort(excel_files, json_file):
+    # Every sheet of every workbook, one WeeklyAttendance/AttendanceSummary per team
+    teams = read_attendance_workbooks(excel_files, all_sheets=True)
+    output = {key: team.to_json() for key, team in teams.items()}
+
+    with open(json_file, "w", encoding="utf-8") as out:
+        json.dump(output, out, indent=2, ensure_ascii=False)
+    return output
+
 
 if __name__ == "__main__":
     # Usage: python3 attendance.py <input.xlsx> <output.json>
-    in_path = sys.argv[1]
-    out_path = sys.argv[2]
-    parse_attendance_xlsx(in_path, out_path)
-    print(f"Saved attendance data to {out_path}")
+    #        python3 attendance.py --cohort <output.json> <input.xlsx> [<input.xlsx> ...]
+    ap = argparse.ArgumentParser()
+    ap.add_argument("paths", nargs="+")
+    ap.add_argument("--cohort", metavar="OUTPUT", default=None)
+    args = ap.parse_args()
+
+    if args.cohort:
+        result = parse_attendance_cohort(args.paths, args.cohort)
+        print(f"Saved attendance data for {len(result)} teams to {args.cohort}")
+    else:
+        if len(args.paths) != 2:
+            ap.error("expected <input.xlsx> <output.json>")
+        in_path, out_path = args.paths
+        parse_attendance_xlsx(in_path, out_path)
+        print(f"Saved attendance data to {out_path}")
@@ -0,0 +1,156 @@
+# Compact on-disk format for the document parsers' JSON output.
+#
+# The full format repeats the same prose several times: every section's text,
+# each student's raw_text (the sections they claimed, concatenated) and the
+# table rows. The compact format stores each distinct string once in a "texts"
+# pool and refers to it by index; students keep a "parts" list of text ids
+# instead of raw_text, and tables store rows as id lists against a shared
+# column list. Output is minified and optionally gzipped. read_parsed_json()
+# (and utils/parsedJson.js on the Node side) expand it back to the full schema.
+import os
+import gzip
+import json
+
+COMPACT_FORMAT = "compact-v1"
+GZIP_MAGIC = b"\x1f\x8b"
+
+# Deployment-wide default for the parser CLIs: "full", "compact" or "compact+gzip"
+FORMAT_ENV = "PARSED_JSON_FORMAT"
+
+
+def default_output_options():
+    """(compact, gzip) as configured by PARSED_JSON_FORMAT."""
+    value = (os.environ.get(FORMAT_ENV) or "full").strip().lower()
+    return value.startswith("compact"), value.endswith("gzip")
+
+
+class _TextPool:
+    def __init__(self):
+        self.texts = []
+        self._ids = {}
+
+    def add(self, text):
+        idx = self._ids.get(text)
+        if idx is None:
+            idx = self._ids[text] = len(self.texts)
+            self.texts.append(text)
+        return idx
+
+
+def compact_result(result, student_parts):
+    """
+    Convert a full parser result to the compact format. `student_parts` maps
+    each student to the list of text fragments that make up their raw_text,
+    in order (the parsers collect it while attributing sections).
+    """
+    pool = _TextPool()
+    compact = {"format": COMPACT_FORMAT}
+
+    for key, value in result.items():
+        if key == "sections":
+            compact["sections"] = {title: pool.add(text) for title, text in value.items()}
+        elif key == "students":
+            compact["students"] = {
+                name: {
+                    "sections_written": details.get("sections_written", []),
+                    "parts": [pool.add(text) for text in student_parts.get(name, [])],
+                    "metrics": details.get("metrics", {}),
+                }
+                for name, details in value.items()
+            }
+        elif key == "tables":
+            compact["tables"] = {}
+            for table_key, table in value.items():
+                columns = []
+                column_ids = {}
+                for row in table.get("rows", []):
+                    for column in row:
+                        if column not in column_ids:
+                            column_ids[column] = len(columns)
+                            columns.append(column)
+                rows = []
+                for row in table.get("rows", []):
+                    encoded = [-1] * len(columns)
+                    for column, cell in row.items():
+                        encoded[column_ids[column]] = pool.add(cell)
+                    rows.append(encoded)
+                compact["tables"][table_key] = {
+                    "include_in_metrics": table.get("include_in_metrics"),
+                    "columns": columns,
+                    "rows": rows,
+                }
+        else:
+            compact[key] = value
+
+    compact["texts"] = pool.texts
+    return compact
+
+
+def expand_result(data, include_raw_text=True):
+    """Inverse of compact_result(); full-format input is returned unchanged."""
+    if not isinstance(data, dict) or data.get("format") != COMPACT_FORMAT:
+        return data
+
+    texts = data.get("texts", [])
+    result = {}
+    for key, value in data.items():
+        if key in ("format", "texts"):
+            continue
+        if key == "sections":
+            result["sections"] = {title: texts[idx] for title, idx in value.items()}
+        elif key == "students":
+            students = {}
+            for name, details in value.items():
+                student = {"sections_written": details.get("sections_written", [])}
+                if include_raw_text:
+                    student["raw_text"] = "\n\n".join(texts[idx] for idx in details.get("parts", [])).strip()
+                student["metrics"] = details.get("metrics", {})
+                students[name] = student
+            result["students"] = students
+        elif key == "tables":
+            result["tables"] = {
+                table_key: {
+                    "include_in_metrics": table.get("include_in_metrics"),
+                    "rows": [
+                        {column: texts[idx] for column, idx in zip(table.get("columns", []), row) if idx >= 0}
+                        for row in table.get("rows", [])
+                    ],
+                }
+                for table_key, table in value.items()
+            }
+        else:
+            result[key] = value
+    return result
+
+
+def write_parsed_json(result, path, student_parts=None, compact=None, gzip_output=None):
+    """
+    Write a parser result. compact/gzip_output default to PARSED_JSON_FORMAT;
+    a ".gz" output path always gzips. The full format is written exactly as
+    before (indent=2).
+    """
+    env_compact, env_gzip = default_output_options()
+    compact = env_compact if compact is None else compact
+    gzip_output = (env_gzip or str(path).endswith(".gz")) if gzip_output is None else gzip_output
+
+    if compact:
+        payload = json.dumps(compact_result(result, student_parts or {}),
+                             ensure_ascii=False, separators=(",", ":"))
+    else:
+        payload = json.dumps(result, indent=2, ensure_ascii=False)
+
+    data = payload.encode("utf-8")
+    if gzip_output:
+        # mtime=0 keeps the bytes stable for identical results
+        data = gzip.compress(data, mtime=0)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def read_parsed_json(path, include_raw_text=True):
+    """Read full, compact or gzipped parser output back into the full schema."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:2] == GZIP_MAGIC:
+        data = gzip.decompress(data)
+    return expand_result(json.loads(data.decode("utf-8")), include_raw_text=include_raw_text)
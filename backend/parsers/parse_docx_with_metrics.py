@@ -10,6 +10,7 @@ from docx.oxml.text.paragraph import CT_P
 from docx.oxml.table import CT_Tbl
 import textstat
 import spacy
+from compact_output import write_parsed_json
 from nltk.tokenize import sent_tokenize, word_tokenize
 from nltk import download as nltk_download
 
@@ -249,7 +250,9 @@ def fuzzy_find_section(sec, extracted_sections):
         return matches[0]
     return None
 
-def build_student_metrics(authorship_map, extracted_sections):
+def build_student_metrics(authorship_map, extracted_sections, student_parts=None):
+    # student_parts (optional) receives each student's raw_text fragments, in
+    # order, so the compact output can reference sections instead of copying them
     students = {}
     for student, claimed_sections in authorship_map.items():
         collected_texts = []
@@ -257,6 +260,8 @@ def build_student_metrics(authorship_map, extracted_sections):
             matched_key = fuzzy_find_section(sec, extracted_sections)
             if matched_key:
                 collected_texts.append(extracted_sections[matched_key])
+        if student_parts is not None:
+            student_parts[student] = collected_texts
 
         full_text = "\n\n".join(collected_texts).strip()
         students[student] = {
@@ -268,13 +273,15 @@ def build_student_metrics(authorship_map, extracted_sections):
 
 # ---------------- Public API ----------------
 
-def parse_docx_with_metrics(docx_path, output_json_path=None):
+def parse_docx_with_metrics(docx_path, output_json_path=None, compact=None, student_parts=None):
     """Main parser entry point (importable)"""
     doc = Document(docx_path)
 
+    if student_parts is None:
+        student_parts = {}
     authorship_map    = parse_contribution_table(doc)
     extracted_sections = extract_sections(doc)
-    students          = build_student_metrics(authorship_map, extracted_sections)
+    students          = build_student_metrics(authorship_map, extracted_sections, student_parts)
 
     result = {
         "source_file": Path(docx_path).name,
@@ -284,8 +291,7 @@ def parse_docx_with_metrics(docx_path, output_json_path=None):
     }
 
     if output_json_path:
-        with open(output_json_path, "w", encoding="utf-8") as f:
-            json.dump(result, f, indent=2, ensure_ascii=False)
+        write_parsed_json(result, output_json_path, student_parts, compact=compact)
 
     return result
 
@@ -312,9 +318,13 @@ def main():
     parser.add_argument("docx_path")
     parser.add_argument("--output", default=None)
     parser.add_argument("--students-json", default=None)
+    parser.add_argument("--compact", action="store_true", default=None,
+                        help="write the compact format (see compact_output.py)")
+    parser.add_argument("--gzip", dest="gzip_output", action="store_true", default=None)
     args = parser.parse_args()
 
-    result = parse_docx_with_metrics(args.docx_path, args.output)
+    student_parts = {}
+    result = parse_docx_with_metrics(args.docx_path, student_parts=student_parts)
 
     if args.students_json:
         try:
@@ -324,9 +334,10 @@ def main():
             roster = None
         if roster:
             result = _filter_to_roster(result, roster)
-            if args.output:
-                with open(args.output, "w", encoding="utf-8") as f:
-                    json.dump(result, f, indent=2, ensure_ascii=False)
+
+    if args.output:
+        write_parsed_json(result, args.output, student_parts,
+                          compact=args.compact, gzip_output=args.gzip_output)
 
 if __name__ == "__main__":
     main()
@@ -3,6 +3,8 @@ import json
 import re
 from docx import Document
 
+CRITERIA = "ABCDEFGHIJ"
+
  
 def clean_name(name):
     return (name or "").strip().lower()
@@ -20,9 +22,13 @@ def names_match(a, b):
     b_first = b.split()[0] if b.split() else b
     return a_first == b_first or a == b
  
-def parse_peer_review(docx_path):
+def read_peer_review_form(docx_path):
+    """
+    Read the reviewer's name and the raw A-J scoring rows from one form.
+    Returns (reviewer_name, rows, found_table) where rows is a list of
+    (student_name, [cell text for A..J, "" when the column is missing]).
+    """
     doc = Document(docx_path)
-    results = {}
     reviewer_name = None
  
     for para in doc.paragraphs:
@@ -47,20 +53,16 @@ def parse_peer_review(docx_path):
     for table in doc.tables:
         headers = [c.text.strip().upper() for c in table.rows[0].cells]
         # check if headers contain A through J
-        if all(letter in headers for letter in ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J']):
+        if all(letter in headers for letter in CRITERIA):
             scoring_table = table
             break
  
     if not scoring_table:
-        print(f"Warning: Could not find scoring table in {docx_path}")
-        return {"reviewer": reviewer_name, "scores": {}}
+        return reviewer_name, [], False
  
     # Get column indices for A-J
     headers = [c.text.strip().upper() for c in scoring_table.rows[0].cells]
-    score_cols = {}
-    for letter in 'ABCDEFGHIJ':
-        if letter in headers:
-            score_cols[letter] = headers.index(letter)
+    score_cols = [headers.index(letter) if letter in headers else None for letter in CRITERIA]
  
     name_col = None
     for i, h in enumerate(headers):
@@ -70,8 +72,7 @@ def parse_peer_review(docx_path):
     if name_col is None:
         name_col = 1
  
-    reviewer_clean = clean_name(reviewer_name)
- 
+    rows = []
     for row in scoring_table.rows[1:]:
         cells = [c.text.strip() for c in row.cells]
         if not cells or not cells[name_col]:
@@ -81,6 +82,24 @@ def parse_peer_review(docx_path):
         if not student_name or student_name == "0":
             continue
  
+        rows.append((student_name, [
+            cells[col_idx] if col_idx is not None and col_idx < len(cells) else ""
+            for col_idx in score_cols
+        ]))
+ 
+    return reviewer_name, rows, True
+ 
+def parse_peer_review(docx_path):
+    reviewer_name, rows, found_table = read_peer_review_form(docx_path)
+    results = {}
+ 
+    if not found_table:
+        print(f"Warning: Could not find scoring table in {docx_path}")
+        return {"reviewer": reviewer_name, "scores": {}}
+ 
+    reviewer_clean = clean_name(reviewer_name)
+ 
+    for student_name, score_cells in rows:
         student_clean = clean_name(student_name)
  
         # skip self-assessment
@@ -90,9 +109,9 @@ def parse_peer_review(docx_path):
         # sum A-J scores
         total = 0
         valid = False
-        for letter, col_idx in score_cols.items():
-            if col_idx < len(cells) and is_number(cells[col_idx]):
-                val = float(cells[col_idx])
+        for cell in score_cells:
+            if is_number(cell):
+                val = float(cell)
                 if val > 0:
                     valid = True
                 total += val
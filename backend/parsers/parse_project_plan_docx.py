@@ -12,6 +12,8 @@ from nltk.tokenize import sent_tokenize, word_tokenize
 from nltk import download as nltk_download
 from difflib import get_close_matches
 import argparse
+from compact_output import write_parsed_json
+from text_reuse_index import check_text_reuse
 
 nltk_download("punkt",     quiet=True)
 nltk_download("punkt_tab", quiet=True)
@@ -386,11 +388,12 @@ def _extract_tables(doc):
 
 # STUDENT ATTRIBUTION
 
-def _build_student_records(contributions, per_student_profile, per_student_role, sections):
+def _build_student_records(contributions, per_student_profile, per_student_role, sections, student_parts=None):
     """
     For each student row in the contributions table, match their claimed
     sections/tables to extracted text and compute metrics.
     Returns {student_name: {sections_written, raw_text, metrics}}.
+    student_parts (optional) receives the text fragments behind each raw_text.
     """
     students = {}
 
@@ -441,6 +444,8 @@ def _build_student_records(contributions, per_student_profile, per_student_role,
                     section_text_parts.append(sections[matched])
 
         combined_text    = "\n\n".join(section_text_parts).strip()
+        if student_parts is not None:
+            student_parts[name] = section_text_parts
         students[name]   = {
             "sections_written": matched_sections,
             "raw_text":         combined_text,
@@ -451,8 +456,10 @@ def _build_student_records(contributions, per_student_profile, per_student_role,
 
 
 # MAIN PARSER
-def parse_project_plan_docx(docx_path, output_json_path=None):
+def parse_project_plan_docx(docx_path, output_json_path=None, compact=None, student_parts=None):
     doc = Document(docx_path)
+    if student_parts is None:
+        student_parts = {}
 
     tables, per_student_profile, per_student_role = _extract_tables(doc)
 
@@ -461,7 +468,7 @@ def parse_project_plan_docx(docx_path, output_json_path=None):
 
     contributions = tables.get("TeamContributions", {}).get("rows", [])
     students      = _build_student_records(
-        contributions, per_student_profile, per_student_role, sections
+        contributions, per_student_profile, per_student_role, sections, student_parts
     )
 
     result = {
@@ -472,8 +479,7 @@ def parse_project_plan_docx(docx_path, output_json_path=None):
     }
 
     if output_json_path:
-        with open(output_json_path, "w", encoding="utf-8") as f:
-            json.dump(result, f, indent=2, ensure_ascii=False)
+        write_parsed_json(result, output_json_path, student_parts, compact=compact)
 
     return result
 
@@ -495,10 +501,14 @@ if __name__ == "__main__":
     ap.add_argument("input_path")
     ap.add_argument("output_path", nargs="?")
     ap.add_argument("--students-json", default=None)
+    ap.add_argument("--compact", action="store_true", default=None)
+    ap.add_argument("--gzip", dest="gzip_output", action="store_true", default=None)
+    ap.add_argument("--team-id", default=None)
     args = ap.parse_args()
 
-    out_path = args.output_path or str(Path(args.input_path).with_suffix(".json"))
-    res      = parse_project_plan_docx(args.input_path, out_path)
+    out_path      = args.output_path or str(Path(args.input_path).with_suffix(".json"))
+    student_parts = {}
+    res           = parse_project_plan_docx(args.input_path, student_parts=student_parts)
 
     print(f"\nSections found: {list(res.get('tables', {}).keys())}")
     print(f"Students attributed: {list(res.get('students', {}).keys())}")
@@ -515,7 +525,7 @@ if __name__ == "__main__":
             roster = None
         if roster:
             res = _filter_students_to_roster(res, roster)
-            with open(out_path, "w", encoding="utf-8") as f:
-                json.dump(res, f, indent=2, ensure_ascii=False)
 
+    check_text_reuse(res, args.team_id)
+    write_parsed_json(res, out_path, student_parts, compact=args.compact, gzip_output=args.gzip_output)
     print(f"\nProject Plan parsed --> {out_path}")
@@ -7,6 +7,8 @@ import argparse
 
 # Import the base parser
 from parse_docx_with_metrics import parse_docx_with_metrics
+from compact_output import write_parsed_json
+from text_reuse_index import check_text_reuse
 
 # For direct script execution (backward compatibility)
 if len(sys.argv) >= 2 and not sys.argv[1].startswith('-'):
@@ -33,7 +35,8 @@ def _filter_to_roster(result, roster_names):
     
     return result
 
-def parse_sprint_report(docx_path, output_json_path, students_json_path=None):
+def parse_sprint_report(docx_path, output_json_path, students_json_path=None, compact=None, gzip_output=None,
+                        team_id=None):
     """
     Parse sprint report docx file and save to JSON.
     
@@ -41,9 +44,11 @@ def parse_sprint_report(docx_path, output_json_path, students_json_path=None):
         docx_path: Path to the .docx file
         output_json_path: Path where JSON should be saved
         students_json_path: Optional path to students roster JSON for filtering
+        compact, gzip_output: Output format (defaults from PARSED_JSON_FORMAT)
+        team_id: Team the report belongs to, for the TEXT_REUSE_INDEX check
     """
-    # FIX: Call with positional argument, not keyword argument
-    result = parse_docx_with_metrics(docx_path, output_json_path)
+    student_parts = {}
+    result = parse_docx_with_metrics(docx_path, student_parts=student_parts)
     
     # Optional roster filter
     if students_json_path:
@@ -57,11 +62,10 @@ def parse_sprint_report(docx_path, output_json_path, students_json_path=None):
         
         if roster:
             result = _filter_to_roster(result, roster)
-            # Re-save with filtered data
-            with open(output_json_path, "w", encoding="utf-8") as f:
-                json.dump(result, f, indent=2, ensure_ascii=False)
             print(f"Filtered to {len(result.get('students', {}))} students from roster")
     
+    check_text_reuse(result, team_id)
+    write_parsed_json(result, output_json_path, student_parts, compact=compact, gzip_output=gzip_output)
     print(f"Sprint report parsed: {docx_path}")
     print(f"Metrics saved to: {output_json_path}")
     
@@ -72,6 +76,9 @@ if __name__ == "__main__":
     ap.add_argument("input_path", help="Path to the sprint report .docx file")
     ap.add_argument("output_path", nargs="?", help="Path for output JSON file")
     ap.add_argument("--students-json", default=None, help="Path to students roster JSON for filtering")
+    ap.add_argument("--compact", action="store_true", default=None, help="Write the compact output format")
+    ap.add_argument("--gzip", dest="gzip_output", action="store_true", default=None, help="Gzip the output")
+    ap.add_argument("--team-id", default=None, help="Team id to check for text reuse against other teams")
     
     args = ap.parse_args()
     
@@ -80,4 +87,4 @@ if __name__ == "__main__":
         Path(args.input_path).stem + "_summary.json"
     ))
     
-    parse_sprint_report(args.input_path, out_path, args.students_json)
\ No newline at end of file
+    parse_sprint_report(args.input_path, out_path, args.students_json, args.compact, args.gzip_output, args.team_id)
\ No newline at end of file
@@ -0,0 +1,307 @@
+import sys
+import json
+import argparse
+import numpy as np
+
+from parse_peer_review import CRITERIA, clean_name, is_number, names_match, read_peer_review_form
+
+# Modified z-score (Iglewicz & Hoaglin) above which a reviewer's total for a
+# reviewee is flagged as an outlier against the other reviewers of that person.
+OUTLIER_Z = 3.5
+# Totals are whole criterion points, so a spread below one point says nothing
+MIN_SCALE = 1.0
+
+
+def _nan_mean(values, axis):
+    # np.nanmean without the empty-slice warning; all-NaN slices stay NaN
+    counts = np.sum(~np.isnan(values), axis=axis)
+    sums = np.nansum(values, axis=axis)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+
+class RosterIndex:
+    """
+    Resolves free-text names from the forms to roster positions. Every
+    distinct spelling is resolved once and cached, so the first-name fallback
+    runs per name rather than per score row. The fallback is only meant for a
+    real roster: against names collected from the forms themselves it would
+    merge different students who share a first name.
+    """
+
+    def __init__(self, names, first_name_fallback=True):
+        self.names = list(names)
+        self.first_name_fallback = first_name_fallback
+        self._exact = {}
+        self._first_last = {}
+        first_counts = {}
+        for idx, name in enumerate(self.names):
+            clean = clean_name(name)
+            self._exact.setdefault(clean, idx)
+            words = clean.split()
+            if len(words) >= 2:
+                self._first_last.setdefault((words[0], words[-1]), idx)
+            if words:
+                first_counts.setdefault(words[0], []).append(idx)
+        # First names only resolve when they are unique within the team
+        self._first = {first: idxs[0] for first, idxs in first_counts.items() if len(idxs) == 1}
+        self._cache = {}
+
+    def resolve(self, name):
+        clean = clean_name(name)
+        if clean in self._cache:
+            return self._cache[clean]
+        idx = self._exact.get(clean, -1)
+        words = clean.split()
+        if idx == -1 and len(words) >= 2:
+            idx = self._first_last.get((words[0], words[-1]), -1)
+        if idx == -1 and words and self.first_name_fallback:
+            idx = self._first.get(words[0], -1)
+        self._cache[clean] = idx
+        return idx
+
+
+class TeamPeerReview:
+    """
+    All of a team's peer-review forms as one reviewer x reviewee x criterion
+    score tensor (NaN where a form left a cell blank or omitted a member).
+    """
+
+    def __init__(self, roster, reviewers, reviewer_idx, scores, self_mask):
+        self.roster = list(roster)
+        self.reviewers = list(reviewers)
+        self.reviewer_idx = reviewer_idx    # (R,) roster index of each reviewer, -1 if unknown
+        self.scores = scores                # (R, N, len(CRITERIA))
+        self.self_mask = self_mask          # (R, N) True where the reviewer scored themselves
+
+    @classmethod
+    def from_forms(cls, forms, roster=None):
+        """
+        forms: iterable of (reviewer_name, rows) as returned by
+        read_peer_review_form. Without a roster, reviewees are collected from
+        the forms in first-seen order.
+        """
+        forms = list(forms)
+        collected = roster is None
+        if collected:
+            roster = []
+            index = RosterIndex(roster, first_name_fallback=False)
+            for _, rows in forms:
+                for student_name, _ in rows:
+                    if index.resolve(student_name) == -1:
+                        roster.append(student_name)
+                        index = RosterIndex(roster, first_name_fallback=False)
+        index = RosterIndex(roster, first_name_fallback=not collected)
+
+        n_reviewers, n_members = len(forms), len(index.names)
+        scores = np.full((n_reviewers, n_members, len(CRITERIA)), np.nan)
+        self_mask = np.zeros((n_reviewers, n_members), dtype=bool)
+        reviewer_idx = np.full(n_reviewers, -1, dtype=np.intp)
+        reviewers = []
+
+        for r, (reviewer_name, rows) in enumerate(forms):
+            reviewers.append(reviewer_name)
+            if reviewer_name:
+                reviewer_idx[r] = index.resolve(reviewer_name)
+            reviewer_clean = clean_name(reviewer_name)
+            for student_name, score_cells in rows:
+                n = index.resolve(student_name)
+                if n == -1:
+                    continue
+                if not np.all(np.isnan(scores[r, n])):
+                    # Keep the first row; a second one for the same student is a form error
+                    print(f"Warning: {reviewer_name or 'A reviewer'} scored {index.names[n]} twice "
+                          f"(as {student_name!r}); keeping the first row")
+                    continue
+                scores[r, n] = [float(cell) if is_number(cell) else np.nan for cell in score_cells]
+                # Reviewers missing from the roster fall back to the per-form
+                # first-name check the single-form parser uses.
+                if reviewer_idx[r] == -1 and reviewer_clean and names_match(reviewer_clean, clean_name(student_name)):
+                    self_mask[r, n] = True
+
+        known = reviewer_idx >= 0
+        self_mask[known, reviewer_idx[known]] = True
+        return cls(index.names, reviewers, reviewer_idx, scores, self_mask)
+
+    @classmethod
+    def from_docx(cls, docx_paths, roster=None):
+        forms = []
+        for path in docx_paths:
+            reviewer_name, rows, found_table = read_peer_review_form(path)
+            if not found_table:
+                print(f"Warning: Could not find scoring table in {path}")
+            forms.append((reviewer_name, rows))
+        return cls.from_forms(forms, roster)
+
+    # ---------------- Array views ----------------
+
+    def valid(self):
+        # A row only counts when at least one criterion is positive
+        return np.any(self.scores > 0, axis=2)
+
+    def totals(self):
+        # Blank cells add nothing, matching the single-form parser's sum
+        return np.where(self.valid(), np.nansum(self.scores, axis=2), np.nan)
+
+    def received(self):
+        """(R, N) totals excluding self-assessment and invalid rows."""
+        return np.where(self.self_mask, np.nan, self.totals())
+
+    def outliers(self):
+        """(R, N) True where a total is far from the other reviewers' median."""
+        received = self.received()
+        counts = np.sum(~np.isnan(received), axis=0)
+        outliers = np.zeros(received.shape, dtype=bool)
+        usable = counts >= 3
+        if not usable.any():
+            return outliers
+        cols = received[:, usable]
+        median = np.nanmedian(cols, axis=0)
+        deviation = np.abs(cols - median)
+        mad = np.nanmedian(deviation, axis=0)
+        # When most reviewers agree exactly the MAD is 0; the mean absolute
+        # deviation (scaled to match it on normal data) takes over
+        scale = np.where(mad > 0, mad / 0.6745, 1.2533 * _nan_mean(deviation, axis=0))
+        z = (cols - median) / np.maximum(scale, MIN_SCALE)
+        outliers[:, usable] = np.abs(np.nan_to_num(z, nan=0.0)) > OUTLIER_Z
+        return outliers
+
+    # ---------------- Summaries ----------------
+
+    def summary(self):
+        received = self.received()
+        counts = np.sum(~np.isnan(received), axis=0)
+        means = _nan_mean(received, axis=0)
+        excluded = self.self_mask | ~self.valid()
+        criterion_means = _nan_mean(np.where(excluded[:, :, None], np.nan, self.scores), axis=0)
+        self_totals = np.where(self.self_mask, self.totals(), np.nan)
+        outliers = self.outliers()
+
+        students = {}
+        scores = {}
+        for n, name in enumerate(self.roster):
+            col = received[:, n]
+            given = col[~np.isnan(col)]
+            if given.size:
+                scores[clean_name(name)] = given.tolist()
+            own = self_totals[:, n][~np.isnan(self_totals[:, n])]
+            students[name] = {
+                "mean": round(float(means[n]), 2) if counts[n] else None,
+                "count": int(counts[n]),
+                "criteria_means": {
+                    letter: round(float(v), 2)
+                    for letter, v in zip(CRITERIA, criterion_means[n]) if not np.isnan(v)
+                },
+                "self_score": float(own[0]) if own.size else None,
+            }
+
+        flagged = [
+            {
+                "reviewer": self.reviewers[r],
+                "reviewee": self.roster[n],
+                "total": float(received[r, n]),
+            }
+            for r, n in zip(*np.nonzero(outliers))
+        ]
+
+        return {
+            "roster": self.roster,
+            "reviewers": self.reviewers,
+            "criteria": list(CRITERIA),
+            # Same {student: [totals]} shape the single-form parser emits
+            "scores": scores,
+            "students": students,
+            "outliers": flagged,
+        }
+
+
+def cohort_statistics(teams):
+    """
+    Cohort-wide peer statistics in one pass. `teams` maps a team key to a
+    TeamPeerReview; every team's received totals are flattened into one array
+    and reduced with bincount rather than per-student dict updates.
+    """
+    keys = list(teams)
+    team_ids, member_ids, values, names = [], [], [], []
+    offset = 0
+    for t, key in enumerate(keys):
+        received = teams[key].received()
+        r, n = np.nonzero(~np.isnan(received))
+        team_ids.append(np.full(r.size, t, dtype=np.intp))
+        member_ids.append(n + offset)
+        values.append(received[r, n])
+        names.extend((key, name) for name in teams[key].roster)
+        offset += len(teams[key].roster)
+
+    if not names:
+        return {"teams": {}, "students": [], "cohort": {"mean": None, "std": None, "count": 0}}
+
+    team_ids = np.concatenate(team_ids)
+    member_ids = np.concatenate(member_ids)
+    values = np.concatenate(values)
+
+    member_count = np.bincount(member_ids, minlength=offset)
+    member_sum = np.bincount(member_ids, weights=values, minlength=offset)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        member_mean = member_sum / member_count
+    team_count = np.bincount(team_ids, minlength=len(keys))
+    team_sum = np.bincount(team_ids, weights=values, minlength=len(keys))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        team_mean = team_sum / team_count
+
+    scored = ~np.isnan(member_mean)
+    # Percentile of each student's mean received score within the cohort
+    percentile = np.full(offset, np.nan)
+    if scored.any():
+        ranks = np.argsort(np.argsort(member_mean[scored], kind="stable"), kind="stable")
+        percentile[scored] = 100.0 * ranks / max(int(scored.sum()) - 1, 1)
+
+    def num(v, digits=2):
+        return None if np.isnan(v) else round(float(v), digits)
+
+    return {
+        "teams": {key: {"mean": num(team_mean[t]), "count": int(team_count[t])} for t, key in enumerate(keys)},
+        "students": [
+            {
+                "team": team,
+                "name": name,
+                "mean": num(member_mean[i]),
+                "count": int(member_count[i]),
+                "percentile": num(percentile[i], 1),
+            }
+            for i, (team, name) in enumerate(names)
+        ],
+        "cohort": {
+            "mean": num(values.mean()) if values.size else None,
+            "std": num(values.std()) if values.size else None,
+            "count": int(values.size),
+        },
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Aggregate all peer-review forms of a team")
+    ap.add_argument("docx_paths", nargs="+")
+    ap.add_argument("--output", required=True)
+    ap.add_argument("--students-json", default=None)
+    args = ap.parse_args()
+
+    roster = None
+    if args.students_json:
+        try:
+            with open(args.students_json, "r", encoding="utf-8") as f:
+                roster = [(s.get("name") or "").strip() for s in json.load(f) if (s.get("name") or "").strip()]
+        except Exception as e:
+            print(f"Warning: Could not load student roster: {e}", file=sys.stderr)
+
+    team = TeamPeerReview.from_docx(args.docx_paths, roster)
+    result = team.summary()
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+
+    print(f"Peer review aggregated: {len(team.reviewers)} forms, {len(result['scores'])} students scored")
+
+
+if __name__ == "__main__":
+    main()
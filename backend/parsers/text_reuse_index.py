@@ -0,0 +1,177 @@
+# Text reuse detection across every parsed submission.
+#
+# Each student's raw_text and each section is cut into word 5-gram shingles
+# and summarised by a MinHash signature of NUM_PERM values: the share of
+# equal values between two signatures estimates the Jaccard similarity of
+# their shingle sets. The signature is split into BANDS bands of ROWS values,
+# and texts whose band hashes agree in at least one band share an LSH bucket
+# (two texts at Jaccard s collide with probability 1 - (1 - s^ROWS)^BANDS,
+# about 0.5 at s = 0.42 and 0.99 at s = 0.7). A query only looks at its own
+# buckets, through an index, so it does not grow with the number of texts
+# stored. Everything lives in one SQLite file.
+import os
+import re
+import json
+import zlib
+import sqlite3
+import hashlib
+import argparse
+import numpy as np
+
+SHINGLE_WORDS = 5
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+MIN_WORDS = 40
+REUSE_THRESHOLD = 0.5
+
+# Deployment-wide index the parser CLIs check uploads against (unset: off)
+INDEX_ENV = "TEXT_REUSE_INDEX"
+
+# h(x) = (a * x + b) mod PRIME over 32-bit shingle hashes; with a, b below
+# 2^32 the product never leaves uint64
+PRIME = np.uint64(4294967311)
+_rng = np.random.RandomState(1)
+_A = _rng.randint(1, 2 ** 32, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.randint(0, 2 ** 32, size=NUM_PERM, dtype=np.uint64)
+
+WORD = re.compile(r"[a-z0-9]+")
+
+
+def shingles(text):
+    """32-bit hashes of the text's word 5-grams (lower-cased, punctuation dropped)."""
+    words = WORD.findall((text or "").lower())
+    grams = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+    return np.array([zlib.crc32(g.encode("utf-8")) for g in grams], dtype=np.uint64)
+
+
+def minhash(hashes):
+    """NUM_PERM-value MinHash signature of a set of shingle hashes."""
+    if not len(hashes):
+        return np.full(NUM_PERM, np.iinfo(np.uint64).max, dtype=np.uint64)
+    return ((_A[:, None] * hashes[None, :] + _B[:, None]) % PRIME).min(axis=1)
+
+
+def band_keys(signature):
+    """One signed 64-bit key per band, for the buckets table."""
+    return [
+        int.from_bytes(hashlib.blake2b(signature[b * ROWS:(b + 1) * ROWS].tobytes(), digest_size=8).digest(),
+                       "big", signed=True)
+        for b in range(BANDS)
+    ]
+
+
+def document_texts(result):
+    """(kind, name, text) of every student's raw_text and every section of a parser result."""
+    texts = [("student", name, details.get("raw_text", ""))
+             for name, details in (result.get("students") or {}).items()]
+    texts += [("section", title, text) for title, text in (result.get("sections") or {}).items()]
+    return [(kind, name, text) for kind, name, text in texts if len(WORD.findall((text or "").lower())) >= MIN_WORDS]
+
+
+class TextReuseIndex:
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS texts (
+                id INTEGER PRIMARY KEY, team TEXT, source TEXT, kind TEXT, name TEXT, signature BLOB);
+            CREATE TABLE IF NOT EXISTS buckets (band INTEGER, key INTEGER, text INTEGER);
+            CREATE INDEX IF NOT EXISTS buckets_key ON buckets (band, key);
+            CREATE INDEX IF NOT EXISTS buckets_text ON buckets (text);
+            CREATE INDEX IF NOT EXISTS texts_source ON texts (team, source);
+        """)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def query(self, signature, exclude_team=None, threshold=REUSE_THRESHOLD):
+        """Stored texts sharing a bucket with signature, from other teams, at estimated Jaccard >= threshold."""
+        keys = band_keys(signature)
+        candidates = set()
+        for band, key in enumerate(keys):
+            candidates.update(row[0] for row in self.db.execute(
+                "SELECT text FROM buckets WHERE band = ? AND key = ?", (band, key)))
+        matches = []
+        for text in candidates:
+            team, source, kind, name, stored = self.db.execute(
+                "SELECT team, source, kind, name, signature FROM texts WHERE id = ?", (text,)).fetchone()
+            if exclude_team is not None and team == exclude_team:
+                continue
+            similarity = float(np.mean(np.frombuffer(stored, dtype=np.uint64) == signature))
+            if similarity >= threshold:
+                matches.append({"team": team, "source": source, "kind": kind, "name": name,
+                                "similarity": round(similarity, 3)})
+        matches.sort(key=lambda m: (-m["similarity"], m["team"], m["source"], m["name"]))
+        return matches
+
+    def replace_document(self, team, source, signatures):
+        """Store [(kind, name, signature)] as team's document `source`, replacing an earlier upload of it."""
+        with self.db:
+            old = [row[0] for row in self.db.execute(
+                "SELECT id FROM texts WHERE team = ? AND source = ?", (team, source))]
+            self.db.executemany("DELETE FROM buckets WHERE text = ?", ((i,) for i in old))
+            self.db.execute("DELETE FROM texts WHERE team = ? AND source = ?", (team, source))
+            for kind, name, signature in signatures:
+                cursor = self.db.execute(
+                    "INSERT INTO texts (team, source, kind, name, signature) VALUES (?, ?, ?, ?, ?)",
+                    (team, source, kind, name, signature.tobytes()))
+                self.db.executemany("INSERT INTO buckets (band, key, text) VALUES (?, ?, ?)",
+                                    ((band, key, cursor.lastrowid) for band, key in enumerate(band_keys(signature))))
+
+    def check_document(self, result, team, source=None, threshold=REUSE_THRESHOLD):
+        """
+        Texts of a parser result that match other teams' stored texts, then
+        store the result's own texts. Returns [{"kind", "name", "matches"}].
+        """
+        source = source or result.get("source_file") or ""
+        signatures = [(kind, name, minhash(shingles(text))) for kind, name, text in document_texts(result)]
+        flagged = []
+        for kind, name, signature in signatures:
+            matches = self.query(signature, exclude_team=team, threshold=threshold)
+            if matches:
+                flagged.append({"kind": kind, "name": name, "matches": matches})
+        self.replace_document(team, source, signatures)
+        return flagged
+
+
+def check_text_reuse(result, team, index_path=None):
+    """
+    With an index (index_path or TEXT_REUSE_INDEX), record the result's
+    matches under "text_reuse" and add its texts; a no-op otherwise.
+    """
+    index_path = index_path or os.environ.get(INDEX_ENV)
+    if not index_path or not team:
+        return result
+    try:
+        with TextReuseIndex(index_path) as index:
+            result["text_reuse"] = index.check_document(result, team)
+    except Exception as e:
+        print(f"Warning: text reuse check skipped: {e}")
+        return result
+    if result["text_reuse"]:
+        print(f"Possible text reuse in {len(result['text_reuse'])} texts")
+    return result
+
+
+def main():
+    from compact_output import read_parsed_json
+    ap = argparse.ArgumentParser(description="Check a parsed document against the text reuse index and add it")
+    ap.add_argument("index", help="SQLite file of the index")
+    ap.add_argument("parsed_json", help="parser output (full, compact or gzipped)")
+    ap.add_argument("--team-id", dest="team_id", required=True)
+    ap.add_argument("--threshold", type=float, default=REUSE_THRESHOLD)
+    args = ap.parse_args()
+    result = read_parsed_json(args.parsed_json)
+    with TextReuseIndex(args.index) as index:
+        print(json.dumps(index.check_document(result, args.team_id, threshold=args.threshold), indent=2))
+
+
+if __name__ == "__main__":
+    main()
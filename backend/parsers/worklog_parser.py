@@ -30,88 +30,156 @@ def _is_number(s):
         return False
 
 
+# Paragraph classification. Every keyword the worklog layout cares about is one
+# branch of a single alternation, so each paragraph is scanned exactly once and
+# reduced to a bitmask of the features it contains.
+_WEEK = 1            # any "week" (bare, numbered header or TOTAL WEEKLY)
+_HEADER = 2          # "Week 3" / "Week #3"
+_TOTAL_WEEKLY = 4    # "TOTAL WEEKLY TIME SPENT"
+_HOURS = 8           # "Total hours" / "hours worked"
+_TASKS = 16          # "Key tasks done" / "things attended"
+_LEARNED = 32        # "Key things learned"
+_LITERATURE = 64     # "Any literature"
+_ISSUES = 128        # "Issues"
+_CHALLENGES = 256    # "Challenges"
+_PLAN = 512          # "Plan for next week"
+
+# The leading lookahead lets the scanner skip positions that cannot start any
+# keyword without trying every branch.
+_TOKEN_PATTERN = re.compile(
+    r"(?=[wtphkaic])(?:"
+    r"(?P<header>Week\s*#?\s*(?P<week_no>\d+))"
+    r"|(?P<total_weekly>TOTAL\s+WEEKLY\s+TIME\s+SPENT)"
+    # Only "plan for next " is consumed so the trailing "week" is still
+    # tokenised on its own (it may be a "Week N" header).
+    r"|(?P<plan>Plan for next (?=week))"
+    r"|(?P<week>Week)"
+    r"|(?P<hours>total\s*hours?|hours?\s*worked)"
+    r"|(?P<tasks>Key tasks done|things attended)"
+    r"|(?P<learned>Key things learned)"
+    r"|(?P<literature>Any literature)"
+    r"|(?P<issues>Issues)"
+    r"|(?P<challenges>Challenges))",
+    re.IGNORECASE,
+)
+_TOKEN_FLAGS = {
+    "header": _HEADER | _WEEK,
+    "total_weekly": _TOTAL_WEEKLY | _WEEK,
+    "plan": _PLAN,
+    "week": _WEEK,
+    "hours": _HOURS,
+    "tasks": _TASKS,
+    "learned": _LEARNED,
+    "literature": _LITERATURE,
+    "issues": _ISSUES,
+    "challenges": _CHALLENGES,
+}
+_HOURS_INLINE_PATTERN = re.compile(
+    r"(?:total\s*hours?|hours?\s*worked)[^\d]*(\d+\.?\d*)", re.IGNORECASE)
+
+# Section table: (record key, flags that open the section, flags that close it).
+# Order matters - it is the order the sections are tried in when a line could
+# open more than one of them.
+_SECTIONS = (
+    ("TasksDone", _TASKS, _LEARNED | _LITERATURE | _ISSUES | _PLAN),
+    ("KeyLearned", _LEARNED, _LITERATURE | _ISSUES | _PLAN),
+    ("Literature", _LITERATURE, _ISSUES | _PLAN),
+    ("Issues", _ISSUES | _CHALLENGES, _PLAN | _WEEK),
+)
+
+# Parser states besides the section indexes above
+_BODY = -1      # inside a week, not inside any section
+_TOTALS = -2    # reading the numbers that follow TOTAL WEEKLY TIME SPENT
+
+
+def _classify(text):
+    """Return (flags, week_number, hours_offset) for one paragraph."""
+    flags = 0
+    week_number = None
+    hours_offset = -1
+    for match in _TOKEN_PATTERN.finditer(text):
+        kind = match.lastgroup
+        flags |= _TOKEN_FLAGS[kind]
+        if kind == "header" and week_number is None:
+            week_number = int(match.group("week_no"))
+        elif kind == "hours" and hours_offset < 0:
+            hours_offset = match.start()
+    return flags, week_number, hours_offset
+
+
 def _parse_paragraphs(paragraphs, hours_data):
     weeks = []
     week_data = None
-    week_header_pattern = re.compile(r"Week\s*#?\s*(\d+)", re.IGNORECASE)
-    hours_inline_pattern = re.compile(r"(?:total\s*hours?|hours?\s*worked)[^\d]*(\d+\.?\d*)", re.IGNORECASE)
-    total_weekly_pattern = re.compile(r"TOTAL\s+WEEKLY\s+TIME\s+SPENT", re.IGNORECASE)
-
-    i = 0
-    while i < len(paragraphs):
-        text = paragraphs[i]
-
-        # Detect new week
-        match = week_header_pattern.search(text)
-        if match:
-            if week_data:  # Save prior week
-                weeks.append(week_data)
-            week_number = int(match.group(1))
-            week_data = {
-                "Week": week_number,
-                "TotalHours": hours_data.get(week_number),
-                "TasksDone": [],
-                "KeyLearned": [],
-                "Literature": [],
-                "Issues": []
-            }
-            i += 1
-            continue
-
-        if week_data:
-            # PDF format: "TOTAL WEEKLY TIME SPENT" followed by numbers on subsequent lines.
-            # The last consecutive number is the weekly total (preceding numbers are sub-totals).
-            if total_weekly_pattern.search(text):
-                i += 1
-                last_num = None
-                while i < len(paragraphs) and _is_number(paragraphs[i]):
-                    last_num = float(paragraphs[i])
-                    i += 1
+    state = _BODY
+    last_num = None
+
+    for text in paragraphs:
+        flags, week_number, hours_offset = _classify(text)
+
+        # Each iteration either consumes the paragraph in the current state or
+        # drops back to _BODY and re-dispatches it there.
+        while True:
+            if state >= 0:
+                key, _, closes = _SECTIONS[state]
+                if not flags & closes:
+                    week_data[key].append(text)
+                    break
+                state = _BODY
+                continue
+
+            if state == _TOTALS:
+                # The last consecutive number is the weekly total (preceding
+                # numbers are sub-totals).
+                if _is_number(text):
+                    last_num = float(text)
+                    break
                 if last_num is not None and week_data["TotalHours"] is None:
                     week_data["TotalHours"] = last_num
+                state = _BODY
                 continue
 
+            if flags & _HEADER:
+                if week_data:  # Save prior week
+                    weeks.append(week_data)
+                week_data = {
+                    "Week": week_number,
+                    "TotalHours": hours_data.get(week_number),
+                    "TasksDone": [],
+                    "KeyLearned": [],
+                    "Literature": [],
+                    "Issues": []
+                }
+                break
+
+            if not week_data:
+                break
+
+            # PDF format: "TOTAL WEEKLY TIME SPENT" followed by numbers on
+            # subsequent lines.
+            if flags & _TOTAL_WEEKLY:
+                state = _TOTALS
+                last_num = None
+                break
+
             # Inline hours line (common in PDF-exported worklogs)
-            hours_match = hours_inline_pattern.search(text)
-            if hours_match and week_data["TotalHours"] is None:
-                try:
-                    week_data["TotalHours"] = float(hours_match.group(1))
-                except ValueError:
-                    pass
-                i += 1
-                continue
+            if flags & _HOURS and week_data["TotalHours"] is None:
+                hours_match = _HOURS_INLINE_PATTERN.match(text, hours_offset)
+                if hours_match:
+                    try:
+                        week_data["TotalHours"] = float(hours_match.group(1))
+                    except ValueError:
+                        pass
+                    break
 
             # Key sections detection
-            if re.search(r"Key tasks done|things attended", text, re.IGNORECASE):
-                i += 1
-                while i < len(paragraphs) and not re.search(r"Key things learned|Any literature|Issues|Plan for next week", paragraphs[i], re.IGNORECASE):
-                    week_data["TasksDone"].append(paragraphs[i])
-                    i += 1
-                continue
-
-            if re.search(r"Key things learned", text, re.IGNORECASE):
-                i += 1
-                while i < len(paragraphs) and not re.search(r"Any literature|Issues|Plan for next week", paragraphs[i], re.IGNORECASE):
-                    week_data["KeyLearned"].append(paragraphs[i])
-                    i += 1
-                continue
-
-            if re.search(r"Any literature", text, re.IGNORECASE):
-                i += 1
-                while i < len(paragraphs) and not re.search(r"Issues|Plan for next week", paragraphs[i], re.IGNORECASE):
-                    week_data["Literature"].append(paragraphs[i])
-                    i += 1
-                continue
-
-            if re.search(r"Issues|Challenges", text, re.IGNORECASE):
-                i += 1
-                while i < len(paragraphs) and not re.search(r"Plan for next week|Week", paragraphs[i], re.IGNORECASE):
-                    week_data["Issues"].append(paragraphs[i])
-                    i += 1
-                continue
-
-        i += 1
-
+            for index, (_, opens, _) in enumerate(_SECTIONS):
+                if flags & opens:
+                    state = index
+                    break
+            break
+
+    if state == _TOTALS and last_num is not None and week_data["TotalHours"] is None:
+        week_data["TotalHours"] = last_num
     if week_data:
         weeks.append(week_data)
 
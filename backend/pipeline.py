@@ -0,0 +1,71 @@
+import time
+from instrumentation import span
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class Pipeline:
+    """
+    A small DAG of named stages. A stage starts on a worker thread as soon as
+    every stage it depends on has finished, and is called with their results
+    as keyword arguments. A failing stage is recorded in `errors` and the
+    stages downstream of it are skipped; the others carry on.
+
+    Threads suit this pipeline: the expensive work is git subprocesses
+    (clone, log, blame), which run outside the GIL.
+    """
+
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+        self.stages = {}
+        self.results = {}
+        self.errors = {}
+        self.timings = {}
+
+    def add(self, name, func, deps=()):
+        for dep in deps:
+            if dep not in self.stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dep}'")
+        self.stages[name] = (func, tuple(deps))
+        return self
+
+    def _run_stage(self, name, func, inputs):
+        started = time.monotonic()
+        usage = {}
+        try:
+            with span(name, profile=True) as usage:
+                return func(**inputs)
+        finally:
+            # span() has filled in CPU time, memory and git traffic by now
+            self.timings[name] = {
+                "start": round(started - self._started, 3),
+                "seconds": round(time.monotonic() - started, 3),
+                **{k: v for k, v in usage.items() if k != "wall_seconds"},
+            }
+
+    def run(self):
+        self._started = time.monotonic()
+        pending = dict(self.stages)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                for name, (func, deps) in list(pending.items()):
+                    failed = [d for d in deps if d in self.errors]
+                    if failed:
+                        self.errors[name] = f"skipped: {failed[0]} failed"
+                        del pending[name]
+                    elif all(d in self.results for d in deps):
+                        inputs = {d: self.results[d] for d in deps}
+                        running[pool.submit(self._run_stage, name, func, inputs)] = name
+                        del pending[name]
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        self.results[name] = future.result()
+                    except Exception as e:
+                        print(f"Error during {name}: {e}")
+                        self.errors[name] = str(e)
+        self.timings["total"] = {"start": 0.0, "seconds": round(time.monotonic() - self._started, 3)}
+        return self.results
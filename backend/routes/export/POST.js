@@ -5,8 +5,16 @@ const { aggregateTeamScores } = require("../../services/aggregator");
 const os = require("os");
 const fs = require("fs");
 const path = require("path");
-const { execFileSync } = require("child_process");
-const { pyBin } = require("../../utils/processUtils");
+const { runPython } = require("../../utils/processUtils");
+const db = require("../../utils/db");
+
+const REPORT_SCRIPT = path.join(ROOT_DIR, "exportReport.py");
+
+function reportArgs(jsonPath, outPath, includeCharts) {
+  const args = ["--input", jsonPath, "--output", outPath];
+  if (!includeCharts) args.push("--no-charts");
+  return args;
+}
 
 // GET /api/export?teamId=...
 router.post("/", async (req, res) => {
@@ -22,7 +30,6 @@ router.post("/", async (req, res) => {
     const tmpDir = os.tmpdir();
     const ts = Date.now();
     const outPath = path.join(tmpDir, `export_${teamId}_${ts}.xlsx`);
-    const scriptPath = path.join(tmpDir, `gen_${ts}.py`);
     const jsonPath = path.join(tmpDir, `data_${ts}.json`);
 
     // Filter to selected students if provided
@@ -35,122 +42,11 @@ router.post("/", async (req, res) => {
     const teamCode = payload.team?.name?.replace(/\s+/g, "_") || teamId;
 
     fs.writeFileSync(jsonPath, JSON.stringify(ranking));
-
-    const script = `
-import openpyxl
-from openpyxl import Workbook
-from openpyxl.chart import BarChart, PieChart, Reference
-import json
-
-with open(r"${jsonPath.replace(/\\/g, "\\\\")}") as f:
-    data = json.load(f)
-
-wb = Workbook()
-ws = wb.active
-ws.title = "Contribution Scores"
-
-headers = [
-    "Rank", "Name", "Email", "Overall Score (%)",
-    "Code Commits", "Work Hours", "Documents", "Meetings",
-    "Total Lines of Code (normalised)", "Total Edited Code (normalised)", "Total Commits (normalised)",
-    "Total Functions Written (normalised)", "Total Hotspots Contributed (normalised)", "Code Complexity (normalised)",
-    "Average Sentence Length (normalised)", "Sentence Complexity (normalised)",
-    "Word Count (normalised)", "Readability (normalised)",
-    "Total Lines of Code %", "Total Edited Code %", "Total Commits %",
-    "Total Functions Written %", "Total Hotspots Contributed %",
-    "Code Complexity (raw)", "Average Sentence Length (raw)", "Sentence Complexity (raw)",
-    "Word Count (raw)", "Readability Score (raw)", "Attendance %"
-]
-ws.append(headers)
-
-for i, s in enumerate(data, start=1):
-    b = s.get("breakdown", {})
-    r = s.get("raw", {})
-    ws.append([
-        i, s.get("name",""), s.get("email",""), round(s.get("score",0),1),
-        r.get("commits",0), r.get("hours",0), r.get("docCount",0), r.get("meetings",0),
-        round(b.get("loc",0)*100), round(b.get("editedCode",0)*100),
-        round(b.get("commits",0)*100), round(b.get("functions",0)*100),
-        round(b.get("hotspots",0)*100), round(b.get("codeComplexity",0)*100),
-        round(b.get("avgSentenceLength",0)*100), round(b.get("sentenceComplexity",0)*100),
-        round(b.get("wordCount",0)*100), round(b.get("readability",0)*100),
-        round(r.get("loc",0),2), round(r.get("editedCode",0),2),
-        round(r.get("commits",0),2), round(r.get("functions",0),2),
-        round(r.get("hotspots",0),2), round(r.get("codeComplexity",0),3),
-        round(r.get("avgSentenceLength",0),2), round(r.get("sentenceComplexity",0),3),
-        r.get("wordCount",0), round(r.get("readability",0),2),
-        round(r.get("attendance",0)*100,1),
-    ])
-
-for col in ws.columns:
-    max_len = max(len(str(cell.value)) if cell.value is not None else 0 for cell in col)
-    ws.column_dimensions[col[0].column_letter].width = min(max_len + 2, 40)
-
-num_students = len(data)
-names = Reference(ws, min_col=2, min_row=2, max_row=num_students+1)
-
-include_charts = ${includeCharts ? 'True' : 'False'}
-
-chart_start_row = num_students + 4
-
-if include_charts:
-    chart1 = PieChart()
-    chart1.title = "Overall Contribution Score"
-    chart1.style = 10
-    chart1.width = 25
-    chart1.height = 15
-    pie_data = Reference(ws, min_col=4, min_row=1, max_row=num_students+1)
-    chart1.add_data(pie_data, titles_from_data=True)
-    chart1.set_categories(names)
-    ws.add_chart(chart1, f"A{chart_start_row}")
-
-    chart2 = BarChart()
-    chart2.type = "col"
-    chart2.grouping = "clustered"
-    chart2.title = "Code Metrics (Normalised)"
-    chart2.y_axis.title = "Normalised Score (0-100)"
-    chart2.x_axis.title = "Student"
-    chart2.style = 10
-    chart2.width = 30
-    chart2.height = 15
-    chart2.x_axis.tickLblPos = "low"
-    chart2.x_axis.delete = False
-    chart2.y_axis.delete = False
-    chart2.x_axis.majorTickMark = "out"
-    chart2.y_axis.majorTickMark = "out"
-    for col in range(9, 15):
-        chart2.add_data(Reference(ws, min_col=col, min_row=1, max_row=num_students+1), titles_from_data=True)
-    cats2 = Reference(ws, min_col=2, min_row=2, max_row=num_students+1)
-    chart2.set_categories(cats2)
-    ws.add_chart(chart2, f"J{chart_start_row}")
-
-    chart3 = BarChart()
-    chart3.type = "col"
-    chart3.grouping = "clustered"
-    chart3.title = "Documentation Metrics (Normalised)"
-    chart3.y_axis.title = "Normalised Score (0-100)"
-    chart3.x_axis.title = "Student"
-    chart3.style = 10
-    chart3.width = 30
-    chart3.height = 15
-    chart3.x_axis.tickLblPos = "low"
-    chart3.x_axis.delete = False
-    chart3.y_axis.delete = False
-    chart3.x_axis.majorTickMark = "out"
-    chart3.y_axis.majorTickMark = "out"
-    for col in range(15, 19):
-        chart3.add_data(Reference(ws, min_col=col, min_row=1, max_row=num_students+1), titles_from_data=True)
-    cats3 = Reference(ws, min_col=2, min_row=2, max_row=num_students+1)
-    chart3.set_categories(cats3)
-    ws.add_chart(chart3, f"P{chart_start_row}")
-
-wb.save(r"${outPath.replace(/\\/g, "\\\\")}")
-`;
-
-    fs.writeFileSync(scriptPath, script);
-    execFileSync(pyBin(), [scriptPath]);
-    fs.unlinkSync(scriptPath);
-    fs.unlinkSync(jsonPath);
+    try {
+      await runPython(REPORT_SCRIPT, reportArgs(jsonPath, outPath, includeCharts));
+    } finally {
+      fs.unlinkSync(jsonPath);
+    }
 
     const filename = `contribution_report_${teamCode}_${new Date().toISOString().slice(0, 10)}.xlsx`;
     res.setHeader("Content-Type", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet");
@@ -164,4 +60,48 @@ wb.save(r"${outPath.replace(/\\/g, "\\\\")}")
   }
 });
 
+// POST /api/export/cohort  { teamIds?: [...], sections?: { charts } }
+// One workbook for many teams (all teams when teamIds is omitted), written by a
+// single Python invocation.
+router.post("/cohort", async (req, res) => {
+  try {
+    const { teamIds, sections: exportSections = {} } = req.body || {};
+    const includeCharts = exportSections.charts !== false;
+
+    const ids = Array.isArray(teamIds) && teamIds.length
+      ? teamIds
+      : (await db.query("SELECT id FROM teams ORDER BY id")).rows.map(r => r.id);
+
+    const teams = [];
+    for (const teamId of ids) {
+      const payload = await aggregateTeamScores({ teamId, rootDir: ROOT_DIR });
+      if (payload?.ranking?.length) {
+        teams.push({ name: payload.team?.name || String(teamId), ranking: payload.ranking });
+      }
+    }
+    if (!teams.length) return res.status(404).json({ error: "No data found for the selected teams" });
+
+    const ts = Date.now();
+    const outPath = path.join(os.tmpdir(), `export_cohort_${ts}.xlsx`);
+    const jsonPath = path.join(os.tmpdir(), `data_cohort_${ts}.json`);
+
+    fs.writeFileSync(jsonPath, JSON.stringify({ teams }));
+    try {
+      await runPython(REPORT_SCRIPT, reportArgs(jsonPath, outPath, includeCharts));
+    } finally {
+      fs.unlinkSync(jsonPath);
+    }
+
+    const filename = `contribution_report_cohort_${new Date().toISOString().slice(0, 10)}.xlsx`;
+    res.setHeader("Content-Type", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet");
+    res.setHeader("Content-Disposition", `attachment; filename="${filename}"`);
+    res.send(fs.readFileSync(outPath));
+    fs.unlinkSync(outPath);
+
+  } catch (error) {
+    console.error("Cohort export error:", error);
+    res.status(500).json({ error: error.message || "Export failed" });
+  }
+});
+
 module.exports = router;
\ No newline at end of file
@@ -4,6 +4,7 @@ const path = require("path");
 const router = require("express").Router();
 const { DATA_DIR, ANALYSES_DIR } = require("../../utils/config");
 const { safeReadJson } = require("../../utils/fileUtils");
+const { listOwnershipFiles, readFileOwnership } = require("../../utils/ownershipIndex");
 
 // GET /api/github/status?teamId=
 router.get("/status", (req, res) => {
@@ -31,4 +32,24 @@ router.get("/status", (req, res) => {
   res.json(out);
 });
 
+// GET /api/github/ownership?teamId=[&path=]
+// Line owners of one file from the analysis' ownership index, or the list of indexed files
+router.get("/ownership", (req, res) => {
+  const teamId = String(req.query.teamId || "").trim();
+  if (!teamId) return res.status(400).json({ error: "teamId is required." });
+  const indexPath = path.join(ANALYSES_DIR, `overall_${teamId}_stats.ownership.idx`);
+  if (!fs.existsSync(indexPath)) return res.status(404).json({ error: "No ownership index for this team." });
+
+  try {
+    const relPath = String(req.query.path || "").trim();
+    if (!relPath) return res.json({ files: listOwnershipFiles(indexPath) });
+    const ownership = readFileOwnership(indexPath, relPath);
+    if (!ownership) return res.status(404).json({ error: "File not in the ownership index." });
+    res.json({ path: relPath, ...ownership });
+  } catch (e) {
+    console.error("ownership error:", e);
+    res.status(500).json({ error: e.message || "Failed to read ownership index" });
+  }
+});
+
 module.exports = router;
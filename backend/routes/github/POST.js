@@ -1,8 +1,8 @@
 // backend/routes/github/POST.js
 const path = require("path");
 const router = require("express").Router();
-const { ROOT_DIR, ANALYSES_DIR } = require("../../utils/config");
-const { writeJson, ensureDir } = require("../../utils/fileUtils");
+const { ROOT_DIR, ANALYSES_DIR, ANALYSIS_TIME_BUDGET, ANALYSIS_BARE_CLONE } = require("../../utils/config");
+const { writeJson, safeReadJson, ensureDir } = require("../../utils/fileUtils");
 const { pyBin, runFile } = require("../../utils/processUtils");
 const db = require("../../utils/db");
 
@@ -43,6 +43,7 @@ router.post("/analyze", async (req, res) => {
     ensureDir(ANALYSES_DIR);
     const outputPath = path.join(ANALYSES_DIR, `overall_${teamId}_stats.json`);
     const statusPath = path.join(ANALYSES_DIR, `overall_${teamId}_status.json`);
+    const summaryPath = path.join(ANALYSES_DIR, `overall_${teamId}_stats.summary.json`);
 
     writeJson(statusPath, { status: "running", startedAt: new Date().toISOString() });
 
@@ -55,8 +56,19 @@ router.post("/analyze", async (req, res) => {
           path.join(ROOT_DIR, "main.py"),
           "--repo-url", url,
           "--output", outputPath,
+          // Per-file line owners for per-file views
+          "--ownership-index",
+          ...(ANALYSIS_TIME_BUDGET > 0 ? ["--time-budget", String(ANALYSIS_TIME_BUDGET)] : []),
+          ...(ANALYSIS_BARE_CLONE ? ["--bare"] : []),
         ], { cwd: ROOT_DIR });
-        writeJson(statusPath, { status: "complete", completedAt: new Date().toISOString() });
+        // Partial when the time budget ran out before blame finished
+        const summary = safeReadJson(summaryPath, {});
+        writeJson(statusPath, {
+          status: summary.complete === false ? "partial" : "complete",
+          completedAt: new Date().toISOString(),
+          completeness: summary.completeness || null,
+          errors: summary.errors || {},
+        });
       } catch (e) {
         console.error("Background analysis error:", e.message);
         writeJson(statusPath, { status: "error", error: e.message });
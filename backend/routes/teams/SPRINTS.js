@@ -201,9 +201,6 @@ router.post("/:id/sprints/:sprintId/analyze", async (req, res) => {
 
     if (!team.repo_url) return res.status(400).json({ error: "Team has no repo URL configured" });
 
-    const baseUrl = team.repo_url.replace(/\/tree\/[^/]+$/, "");
-    const repoUrl = sprint.branch ? `${baseUrl}/tree/${sprint.branch}` : team.repo_url;
-
     const { ROOT_DIR, ANALYSES_DIR } = require("../../utils/config");
     const { pyBin, runFile } = require("../../utils/processUtils");
     const { writeJson } = require("../../utils/fileUtils");
@@ -222,10 +219,13 @@ router.post("/:id/sprints/:sprintId/analyze", async (req, res) => {
       try {
         const { stderr } = await runFile(pyBin(), [
           path.join(ROOT_DIR, "main.py"),
-          "--repo-url", repoUrl,
+          // main.py splits a /tree/<branch>/<path> URL itself (branches may
+          // contain "/"); a sprint branch replaces the branch, keeping the path
+          "--repo-url", team.repo_url,
           "--start-date", startDate,
           "--end-date", endDate,
           "--output", outputPath,
+          ...(sprint.branch ? ["--branch", sprint.branch] : []),
         ], { cwd: ROOT_DIR });
         if (stderr) console.warn("Sprint analysis warning:", stderr?.slice(-200));
         writeJson(statusPath, { status: "complete", completedAt: new Date().toISOString() });
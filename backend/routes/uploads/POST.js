@@ -130,12 +130,14 @@ router.post("/confirm", async (req, res) => {
       script: path.join(ROOT_DIR, "parsers", "parse_sprint_report_docx.py"),
       label: "Sprint report",
       combineAfter: true,
+      reuseCheck: true,
     },
     project_plan: {
       extensions: [".docx"],
       script: path.join(ROOT_DIR, "parsers", "parse_project_plan_docx.py"),
       label: "Project Plan",
       combineAfter: true,
+      reuseCheck: true,
     },
     peer_review: {
       extensions: [".docx"],
@@ -157,7 +159,11 @@ router.post("/confirm", async (req, res) => {
     // Download the original file from S3 to a temp location for the parser
     await downloadToFile(entry.s3_key, tempInputPath);
 
-    execFile(pyBin(), [parser.script, tempInputPath, tempOutputPath], { cwd: ROOT_DIR }, async (execError, _stdout, stderr) => {
+    // Document parsers check their text against other teams' uploads (TEXT_REUSE_INDEX)
+    const args = [parser.script, tempInputPath, tempOutputPath];
+    if (parser.reuseCheck && entry.team_id) args.push("--team-id", String(entry.team_id));
+
+    execFile(pyBin(), args, { cwd: ROOT_DIR }, async (execError, _stdout, stderr) => {
       if (execError) {
         return finish({ userType: finalType, status: "parse_failed", message: `${parser.label} parse failed: ${stderr || execError.message}` });
       }
@@ -20,11 +20,11 @@ function detectTypeFromName(filename, userGuess) {
 }
 
 const PARSERS = {
-  attendance:    { extensions: [".xlsx", ".xls"], script: path.join(ROOT_DIR, "parsers", "attendance.py"),               label: "Attendance",    combineAfter: false },
-  worklog:       { extensions: [".docx", ".pdf"], script: path.join(ROOT_DIR, "parsers", "worklog_parser.py"),            label: "Worklog",       combineAfter: false },
-  sprint_report: { extensions: [".docx"],         script: path.join(ROOT_DIR, "parsers", "parse_sprint_report_docx.py"), label: "Sprint Report", combineAfter: true  },
-  project_plan:  { extensions: [".docx"],         script: path.join(ROOT_DIR, "parsers", "parse_project_plan_docx.py"),  label: "Project Plan",  combineAfter: true  },
-  peer_review:   { extensions: [".docx"],         script: path.join(ROOT_DIR, "parsers", "parse_peer_review.py"),        label: "Peer Review",   combineAfter: false },
+  attendance:    { extensions: [".xlsx", ".xls"], script: path.join(ROOT_DIR, "parsers", "attendance.py"),               label: "Attendance",    combineAfter: false, reuseCheck: false },
+  worklog:       { extensions: [".docx", ".pdf"], script: path.join(ROOT_DIR, "parsers", "worklog_parser.py"),            label: "Worklog",       combineAfter: false, reuseCheck: false },
+  sprint_report: { extensions: [".docx"],         script: path.join(ROOT_DIR, "parsers", "parse_sprint_report_docx.py"), label: "Sprint Report", combineAfter: true,  reuseCheck: true  },
+  project_plan:  { extensions: [".docx"],         script: path.join(ROOT_DIR, "parsers", "parse_project_plan_docx.py"),  label: "Project Plan",  combineAfter: true,  reuseCheck: true  },
+  peer_review:   { extensions: [".docx"],         script: path.join(ROOT_DIR, "parsers", "parse_peer_review.py"),        label: "Peer Review",   combineAfter: false, reuseCheck: false },
 };
 
 const TEAM_LEVEL_TYPES = ["attendance", "sprint_report", "project_plan"];
@@ -56,7 +56,9 @@ async function parseEntry(entry) {
   }
 
   await new Promise((resolve) => {
-    execFile(pyBin(), [parser.script, tempInputPath, tempOutputPath], { cwd: ROOT_DIR }, async (err, _stdout, stderr) => {
+    const args = [parser.script, tempInputPath, tempOutputPath];
+    if (parser.reuseCheck && entry.team_id) args.push("--team-id", String(entry.team_id));
+    execFile(pyBin(), args, { cwd: ROOT_DIR }, async (err, _stdout, stderr) => {
       if (err) {
         await db.query("UPDATE file_registry SET status = $1, parse_message = $2 WHERE id = $3",
           ["parse_failed", `${parser.label} parse failed: ${stderr || err.message}`, entry.id]);
@@ -0,0 +1,203 @@
+import json
+import math
+import argparse
+import numpy as np
+from collections import defaultdict
+from git import Repo
+from fileClassifier import classify_files
+from gitUtils import blame_ranges
+
+# Approximate %LOC from a sample of line ranges.
+#
+# Every counted file is cut into blocks of BLOCK_LINES lines. Blocks are
+# grouped into strata by the length of their file (short files, long files
+# and everything between can own code very differently) and drawn uniformly
+# within each stratum, so long files are sampled in proportion to their
+# length. Only the drawn blocks are blamed, with one `git blame -L ... -L ...`
+# per file. Shares are ratio estimates over the weighted blocks; their
+# standard errors come from the usual stratified cluster-sample variance,
+# and the sample grows until the widest interval is within the target.
+
+BLOCK_LINES = 10
+INITIAL_BLOCKS = 200
+MAX_ROUNDS = 6
+# Upper bounds (in lines) of the file-length strata
+STRATA_BOUNDS = (100, 400, 1600)
+Z_SCORES = {0.9: 1.645, 0.95: 1.96, 0.99: 2.576}
+
+
+class BlockFrame:
+    """All blocks of the counted files: owning file, first line and length."""
+
+    def __init__(self, paths, line_counts):
+        files, starts, sizes, strata = [], [], [], []
+        for f, path in enumerate(paths):
+            n = line_counts.get(path, 0)
+            stratum = next((i for i, bound in enumerate(STRATA_BOUNDS) if n <= bound), len(STRATA_BOUNDS))
+            for start in range(1, n + 1, BLOCK_LINES):
+                files.append(f)
+                starts.append(start)
+                sizes.append(min(BLOCK_LINES, n - start + 1))
+                strata.append(stratum)
+        self.paths = list(paths)
+        self.file = np.array(files, dtype=np.intp)
+        self.start = np.array(starts, dtype=np.int64)
+        self.size = np.array(sizes, dtype=np.int64)
+        self.stratum = np.array(strata, dtype=np.intp)
+        self.n_strata = len(STRATA_BOUNDS) + 1
+
+    def __len__(self):
+        return len(self.file)
+
+
+def _blame_blocks(repo, frame, blocks, authors, counts):
+    """Blame the given block indexes, one git call per file, adding to counts[block][author]."""
+    by_file = defaultdict(list)
+    for b in blocks:
+        by_file[frame.file[b]].append(b)
+    for f, file_blocks in by_file.items():
+        spans = []
+        line_to_block = {}
+        for b in sorted(file_blocks, key=lambda b: frame.start[b]):
+            start, size = int(frame.start[b]), int(frame.size[b])
+            # Adjacent blocks go to blame as one range
+            if spans and spans[-1][1] + 1 == start:
+                spans[-1][1] = start + size - 1
+            else:
+                spans.append([start, start + size - 1])
+            for line in range(start, start + size):
+                line_to_block[line] = b
+        ranges = [arg for first, last in spans for arg in ("-L", f"{first},{last}")]
+        try:
+            runs = sorted(blame_ranges(repo, frame.paths[f], *ranges), key=lambda run: run[1])
+        except Exception:
+            continue
+        for author, first, count in runs:
+            a = authors.setdefault(author, len(authors))
+            for line in range(first, first + count):
+                b = line_to_block.get(line)
+                if b is not None:
+                    counts[b][a] = counts[b].get(a, 0) + 1
+
+
+def _estimate(frame, sampled, authors, counts, z):
+    """Stratified ratio estimate of each author's share with its half-width."""
+    sampled = np.array(sorted(sampled), dtype=np.intp)
+    y = np.zeros((len(sampled), len(authors)))
+    for i, b in enumerate(sampled):
+        for a, n in counts.get(b, {}).items():
+            y[i, a] = n
+    x = frame.size[sampled].astype(float)
+    strata = frame.stratum[sampled]
+
+    population = np.bincount(frame.stratum, minlength=frame.n_strata).astype(float)
+    drawn = np.bincount(strata, minlength=frame.n_strata).astype(float)
+    weight = population[strata] / np.maximum(drawn[strata], 1)
+
+    total_x = float((weight * x).sum()) or 1.0
+    share = (weight[:, None] * y).sum(axis=0) / total_x
+
+    # Linearised residuals of the ratio, per stratum
+    d = y - share[None, :] * x[:, None]
+    variance = np.zeros(len(authors))
+    for h in range(frame.n_strata):
+        rows = strata == h
+        n_h, N_h = drawn[h], population[h]
+        if n_h < 2 or n_h >= N_h:
+            continue
+        s2 = d[rows].var(axis=0, ddof=1)
+        variance += N_h ** 2 * (1 - n_h / N_h) * s2 / n_h
+    half_width = z * np.sqrt(variance) / total_x
+    return share, half_width
+
+
+def estimate_LOC(repo, files=None, line_counts=None, target_error=0.02, confidence=0.95,
+                 initial_blocks=INITIAL_BLOCKS, seed=None):
+    """
+    Estimate each author's share of the lines in `files` to within
+    +-target_error (absolute, as a fraction) at the given confidence.
+    Returns {"percentages", "intervals", "sampled_lines", "total_lines", ...}.
+    """
+    if files is None or line_counts is None:
+        classification = classify_files(repo)
+        files = classification.included if files is None else files
+        line_counts = classification.lines if line_counts is None else line_counts
+
+    frame = BlockFrame(files, line_counts)
+    z = Z_SCORES.get(confidence, 1.96)
+    rng = np.random.default_rng(seed)
+    authors, counts = {}, defaultdict(dict)
+    sampled = set()
+
+    # Per-stratum random order, so each round just takes the next blocks
+    order = {h: list(rng.permutation(np.nonzero(frame.stratum == h)[0])) for h in range(frame.n_strata)}
+    lines_per_stratum = np.bincount(frame.stratum, weights=frame.size, minlength=frame.n_strata)
+    want = min(initial_blocks, len(frame))
+    if len(files) <= initial_blocks:
+        # The first round would touch nearly every file anyway; blame is per
+        # file, so blaming everything costs about the same and is exact
+        want = len(frame)
+
+    share = half_width = np.zeros(0)
+    for _ in range(MAX_ROUNDS):
+        # Allocate the new blocks to strata in proportion to their lines
+        new = []
+        extra = max(want - len(sampled), 0)
+        total_lines = lines_per_stratum.sum() or 1
+        for h in range(frame.n_strata):
+            take = max(math.ceil(extra * lines_per_stratum[h] / total_lines), 2 if order[h] else 0)
+            new += order[h][:take]
+            order[h] = order[h][take:]
+        _blame_blocks(repo, frame, new, authors, counts)
+        sampled.update(new)
+
+        share, half_width = _estimate(frame, sampled, authors, counts, z)
+        widest = float(half_width.max()) if half_width.size else 0.0
+        if widest <= target_error or len(sampled) >= len(frame):
+            break
+        # Error shrinks with sqrt(n): scale the sample to reach the target
+        want = min(len(frame), math.ceil(len(sampled) * (widest / target_error) ** 2 * 1.1))
+
+    names = sorted(authors, key=authors.get)
+    exact = len(sampled) >= len(frame)
+    return {
+        "percentages": {a: round(float(share[i]) * 100, 2) for i, a in enumerate(names)},
+        "intervals": {
+            a: [round(max(float(share[i] - half_width[i]), 0.0) * 100, 2),
+                round(min(float(share[i] + half_width[i]), 1.0) * 100, 2)]
+            for i, a in enumerate(names)
+        },
+        "confidence": confidence,
+        "target_error": target_error,
+        "sampled_lines": int(frame.size[list(sampled)].sum()) if sampled else 0,
+        "total_lines": int(frame.size.sum()),
+        "sampled_files": len({int(frame.file[b]) for b in sampled}),
+        "total_files": len(files),
+        "exact": exact,
+    }
+
+
+def main():
+    p = argparse.ArgumentParser(description="Quick sampled estimate of %LOC per author")
+    p.add_argument("repo_path")
+    p.add_argument("--target-error", dest="target_error", type=float, default=0.02,
+                   help="widest acceptable interval half-width, as a fraction (default 0.02)")
+    p.add_argument("--confidence", type=float, default=0.95, choices=sorted(Z_SCORES))
+    p.add_argument("--seed", type=int, default=None)
+    p.add_argument("--json", action="store_true")
+    args = p.parse_args()
+
+    result = estimate_LOC(Repo(args.repo_path), target_error=args.target_error,
+                          confidence=args.confidence, seed=args.seed)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"Sampled {result['sampled_lines']}/{result['total_lines']} lines "
+          f"in {result['sampled_files']}/{result['total_files']} files")
+    for author, pct in sorted(result["percentages"].items(), key=lambda kv: -kv[1]):
+        lo, hi = result["intervals"][author]
+        print(f"{author}: {pct}% ({lo}-{hi}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
 // Combines GitHub + docs + attendance (+ peer review later) into per-student scores for a selected team.
+const fs = require("fs");
 const path = require("path");
 const { safeReadJson } = require("../utils/fileUtils");
 const { combineDocsInMemory } = require("./dataLoaders");
 const { getObjectAsJson } = require("../utils/s3");
+const { safeReadParsedJson } = require("../utils/parsedJson");
 
 // Alias for backwards-compatibility within this file
 const safeReadJSON = safeReadJson;
@@ -18,7 +20,7 @@ async function readParsedJson({ s3ParsedKey, jsonPath, rootDir }) {
     if (data) return data;
   }
   if (jsonPath) {
-    return safeReadJSON(path.join(rootDir, jsonPath), null);
+    return safeReadParsedJson(path.join(rootDir, jsonPath), null);
   }
   return null;
 }
@@ -113,6 +115,12 @@ function pickNumber(n, def = 0) {
   return Number.isFinite(v) ? v : def;
 }
 
+// [low, high] of a sampled estimate, or null when the stats are exact
+function pickInterval(v) {
+  if (!Array.isArray(v) || v.length !== 2) return null;
+  return [pickNumber(v[0]), pickNumber(v[1])];
+}
+
 function extractAttendanceMetrics(json) {
   const out = {};
   if (!json) return out;
@@ -162,12 +170,31 @@ function extractAttendanceMetrics(json) {
   return out;
 }
 
+function mtimeMs(filePath) {
+  try {
+    return fs.statSync(filePath).mtimeMs;
+  } catch {
+    return null;
+  }
+}
+
+// Per-author stats scored across the whole cohort by cohortScoring.py, or null
+// when they are missing or older than the team's latest analysis.
+function loadScoredCohortStats(analysesDir, teamId) {
+  const scoredPath = path.join(analysesDir, "cohort", `scored_${teamId}_stats.json`);
+  const scoredAt = mtimeMs(scoredPath);
+  const analysedAt = mtimeMs(path.join(analysesDir, `overall_${teamId}_stats.json`));
+  if (scoredAt === null || (analysedAt !== null && scoredAt < analysedAt)) return null;
+  return safeReadJSON(scoredPath, null);
+}
+
 // ---------- main aggregation ----------
 function loadGitHubMetrics(dataDir, teamId) {
   if (!teamId) return {};
   const analysesDir = path.join(dataDir, "analyses");
   const statsPath = path.join(analysesDir, `overall_${teamId}_stats.json`);
-  const finalStats = safeReadJSON(statsPath, {});
+  // Precomputed cohort scores first; the raw stats are the fallback
+  const finalStats = loadScoredCohortStats(analysesDir, teamId) || safeReadJSON(statsPath, {});
   const authors = {};
   Object.entries(finalStats).forEach(([author, s]) => {
     authors[author] = {
@@ -175,11 +202,13 @@ function loadGitHubMetrics(dataDir, teamId) {
       pctFunctions: pickNumber(s.percentage_of_functions_written),
       pctHotspots: pickNumber(s.percentage_of_hotspots),
       pctLOC: pickNumber(s.percentage_of_LOC),
+      pctLOCInterval: pickInterval(s.percentage_of_LOC_interval),
       commits: pickNumber(s.commits),
       additions: pickNumber(s.additions),
       deletions: pickNumber(s.deletions),
       commitPct: pickNumber(s.commit_percentage),
       editPct: pickNumber(s.edit_percentage),
+      cohortPercentile: s.cohort_percentile || null,
     };
   });
   return authors;
@@ -209,6 +238,7 @@ function aggregateForTeam(team, rootDir, combinedDocsOverride = null, attendance
         pctFunctions:  pickNumber(s.percentage_of_functions_written),
         pctHotspots:   pickNumber(s.percentage_of_hotspots),
         pctLOC:        pickNumber(s.percentage_of_LOC),
+        pctLOCInterval: pickInterval(s.percentage_of_LOC_interval),
         commits:       pickNumber(s.commits),
         additions:     pickNumber(s.additions),
         deletions:     pickNumber(s.deletions),
@@ -229,9 +259,21 @@ function aggregateForTeam(team, rootDir, combinedDocsOverride = null, attendance
     c.pctFunctions += m.pctFunctions;
     c.pctHotspots += m.pctHotspots;
     c.pctLOC += m.pctLOC;
+    // Sampled %LOC: aliases of one student add up their bounds too
+    if (m.pctLOCInterval) {
+      c.pctLOCInterval = c.pctLOCInterval
+        ? [c.pctLOCInterval[0] + m.pctLOCInterval[0], Math.min(c.pctLOCInterval[1] + m.pctLOCInterval[1], 100)]
+        : m.pctLOCInterval;
+    }
     c.commitPct += m.commitPct;
     c.editPct += m.editPct;
     c.commits = (c.commits || 0) + m.commits;
+    // Cohort percentiles do not add up across aliases; keep the highest
+    if (m.cohortPercentile) {
+      c.cohortPercentile = c.cohortPercentile
+        ? Object.fromEntries(Object.entries(m.cohortPercentile).map(([k, v]) => [k, Math.max(v, c.cohortPercentile[k] || 0)]))
+        : m.cohortPercentile;
+    }
   });
 
   // ---------- Attendance
@@ -440,6 +482,7 @@ function scoreStudents(students, rules = null) {
       breakdown: Object.fromEntries(metricNames.map(metric => [metric, +(normalisedScores[metric][i] || 0).toFixed(4)])),
       score: percentScores[i],
       raw: rawValues[i],
+      cohortPercentile: student.code.cohortPercentile || null,
     }))
     .sort((a, b) => b.score - a.score)
     .map((r, idx) => ({ rank: idx + 1, ...r }));
@@ -571,6 +614,8 @@ async function aggregateTeamScores({ teamId, rootDir, usePeerReview = false, spr
 }
 
   scored.peerReviewApplied = usePeerReview;
+  // Cohort-wide quartiles from the last cohortScoring.py run (overall scores only)
+  scored.cohort = sprintStats ? null : safeReadJSON(path.join(rootDir, "data", "analyses", "cohort", "cohort_summary.json"), null);
 
   return {
     team: { id: team.id, name: team.name, repo_url: team.repo_url },
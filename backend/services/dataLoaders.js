@@ -4,7 +4,7 @@
 const path = require("path");
 const { GetObjectCommand } = require("@aws-sdk/client-s3");
 const { s3 } = require("../utils/s3");
-const { safeReadJson } = require("../utils/fileUtils");
+const { decodeParsedJson, safeReadParsedJson } = require("../utils/parsedJson");
 const db = require("../utils/db");
 const { pickNumber } = require("./scoring");
 
@@ -19,8 +19,7 @@ async function downloadJsonFromS3(key) {
     chunks.push(chunk);
   }
 
-  const text = Buffer.concat(chunks).toString("utf-8");
-  return JSON.parse(text);
+  return decodeParsedJson(Buffer.concat(chunks));
 }
 
 // Returns the average of a specific field across an array of metric objects
@@ -120,7 +119,7 @@ async function loadParsedArtifacts(rootDir, teamId) {
 
     // Fall back to reading the local file if S3 failed or this is an older entry without an S3 key
     if (!parsedData && entry.parseInfo?.jsonPath) {
-      parsedData = safeReadJson(path.join(rootDir, entry.parseInfo.jsonPath), null);
+      parsedData = safeReadParsedJson(path.join(rootDir, entry.parseInfo.jsonPath), null);
     }
 
     if (!parsedData) continue;
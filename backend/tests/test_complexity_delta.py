@@ -0,0 +1,54 @@
+import os
+import sys
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lizard
+from git import Repo
+from analyser import function_complexity
+from complexityDelta import diff_hunks, complexity_delta
+
+SIMPLE = "def f(x):\n    return x\n"
+BRANCHY = "def f(x):\n    if x:\n        return 1\n    elif x > 2:\n        return 2\n    return x\n"
+
+
+def _commit(repo_dir, files, date, author="Ann"):
+    for path, text in files.items():
+        full = os.path.join(repo_dir, path)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, "w", encoding="utf-8") as f:
+            f.write(text)
+    env = dict(os.environ, GIT_AUTHOR_DATE=date, GIT_COMMITTER_DATE=date)
+    subprocess.run(["git", "add", "-A"], cwd=repo_dir, check=True)
+    subprocess.run(["git", "-c", f"user.name={author}", "-c", "user.email=a@example.com",
+                    "commit", "-q", "-m", date], cwd=repo_dir, check=True, env=env)
+
+
+def _repo(tmp_path):
+    repo_dir = str(tmp_path / "repo")
+    os.makedirs(repo_dir)
+    subprocess.run(["git", "init", "-q"], cwd=repo_dir, check=True)
+    _commit(repo_dir, {"src/my file.py": SIMPLE, 'src/"q".py': SIMPLE}, "2025-03-01T12:00:00Z")
+    _commit(repo_dir, {"src/my file.py": BRANCHY, 'src/"q".py': BRANCHY}, "2025-03-10T12:00:00Z", author="Bob")
+    return repo_dir
+
+
+def test_diff_hunks_paths_with_spaces_and_quotes(tmp_path):
+    repo = Repo(_repo(tmp_path))
+    files = diff_hunks(repo, "HEAD~1", "HEAD")
+    assert sorted((old, new) for old, new, _ in files) == [
+        ('src/"q".py', 'src/"q".py'),
+        ("src/my file.py", "src/my file.py"),
+    ]
+
+
+def test_complexity_delta_counts_files_with_spaces(tmp_path):
+    repo_dir = _repo(tmp_path)
+    progress = {}
+    delta = complexity_delta(repo_dir, "2025-03-05", "2025-03-12", progress=progress)
+    before, after = (function_complexity(lizard.analyze_file.analyze_source_code("a.py", text).function_list[0])
+                     for text in (SIMPLE, BRANCHY))
+    # Both files' f changed, wholly by Bob
+    assert delta == {"Bob": {"complexity_contributed": round(2 * (after - before), 2)}}
+    assert progress["completeness"] == 1.0
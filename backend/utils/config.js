@@ -13,6 +13,10 @@ const UPLOAD_DIR = path.join(ROOT_DIR, process.env.UPLOADS_DIR || "uploads");
 const PARSED_DIR = path.join(DATA_DIR, process.env.PARSED_DIR || "parsed");
 const ANALYSES_DIR = path.join(DATA_DIR, process.env.ANALYSES_DIR || "analyses");
 const GITHUB_TOKEN = process.env.GITHUB_TOKEN || "";
+// Seconds main.py may spend before returning partial results (0 = no limit)
+const ANALYSIS_TIME_BUDGET = parseInt(process.env.ANALYSIS_TIME_BUDGET || "0", 10);
+// Analyse a bare clone read through git instead of a checked-out worktree
+const ANALYSIS_BARE_CLONE = process.env.ANALYSIS_BARE_CLONE === "1";
 
 module.exports = {
   PORT,
@@ -22,4 +26,6 @@ module.exports = {
   PARSED_DIR,
   ANALYSES_DIR,
   GITHUB_TOKEN,
+  ANALYSIS_TIME_BUDGET,
+  ANALYSIS_BARE_CLONE,
 };
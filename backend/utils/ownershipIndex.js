@@ -0,0 +1,46 @@
+// backend/utils/ownershipIndex.js
+// Reads the per-file line owners main.py --ownership-index writes (see ownershipIndex.py):
+// a header with the table's offset, one gzip member per file, and the table itself.
+const fs = require("fs");
+const zlib = require("zlib");
+
+const MAGIC = "OWNIDX1\n";
+const HEADER_SIZE = 24;
+
+function readAt(fd, offset, length) {
+  const buf = Buffer.alloc(length);
+  fs.readSync(fd, buf, 0, length, offset);
+  return JSON.parse(zlib.gunzipSync(buf).toString("utf-8"));
+}
+
+function withIndex(indexPath, fn) {
+  const fd = fs.openSync(indexPath, "r");
+  try {
+    const header = Buffer.alloc(HEADER_SIZE);
+    fs.readSync(fd, header, 0, HEADER_SIZE, 0);
+    if (header.toString("latin1", 0, 8) !== MAGIC) throw new Error(`${indexPath} is not an ownership index`);
+    const table = readAt(fd, Number(header.readBigUInt64LE(8)), Number(header.readBigUInt64LE(16)));
+    return fn(fd, table);
+  } finally {
+    fs.closeSync(fd);
+  }
+}
+
+// Paths in the index
+function listOwnershipFiles(indexPath) {
+  return withIndex(indexPath, (fd, table) => Object.keys(table.files));
+}
+
+// { lines: {author: n}, runs: [[author, firstLine, count], ...] } of one file, or null
+function readFileOwnership(indexPath, relPath) {
+  return withIndex(indexPath, (fd, table) => {
+    // Own keys only: a path like "constructor" must not hit Object.prototype
+    if (!Object.prototype.hasOwnProperty.call(table.files, relPath)) return null;
+    const entry = table.files[relPath];
+    const record = readAt(fd, entry[0], entry[1]);
+    record.runs = record.runs.map(([a, first, count]) => [table.authors[a], first, count]);
+    return record;
+  });
+}
+
+module.exports = { listOwnershipFiles, readFileOwnership };
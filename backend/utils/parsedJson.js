@@ -0,0 +1,72 @@
+// backend/utils/parsedJson.js
+// Decodes parser output in any of the formats written by parsers/compact_output.py:
+// plain JSON, compact JSON (shared text pool + references), or either of those gzipped.
+// Callers always get back the full schema, so nothing downstream needs to know.
+const fs = require("fs");
+const zlib = require("zlib");
+
+const COMPACT_FORMAT = "compact-v1";
+
+function isGzip(buf) {
+  return buf.length >= 2 && buf[0] === 0x1f && buf[1] === 0x8b;
+}
+
+// Rebuilds sections / students[].raw_text / tables[].rows from the text pool.
+function expandCompact(data, { includeRawText = true } = {}) {
+  if (!data || typeof data !== "object" || data.format !== COMPACT_FORMAT) return data;
+
+  const texts = data.texts || [];
+  const out = {};
+  for (const [key, value] of Object.entries(data)) {
+    if (key === "format" || key === "texts") continue;
+
+    if (key === "sections") {
+      out.sections = Object.fromEntries(Object.entries(value).map(([title, idx]) => [title, texts[idx]]));
+    } else if (key === "students") {
+      out.students = {};
+      for (const [name, details] of Object.entries(value)) {
+        const student = { sections_written: details.sections_written || [] };
+        if (includeRawText) {
+          student.raw_text = (details.parts || []).map(idx => texts[idx]).join("\n\n").trim();
+        }
+        student.metrics = details.metrics || {};
+        out.students[name] = student;
+      }
+    } else if (key === "tables") {
+      out.tables = {};
+      for (const [tableKey, table] of Object.entries(value)) {
+        const columns = table.columns || [];
+        out.tables[tableKey] = {
+          include_in_metrics: table.include_in_metrics,
+          rows: (table.rows || []).map(row => {
+            const obj = {};
+            row.forEach((idx, i) => { if (idx >= 0) obj[columns[i]] = texts[idx]; });
+            return obj;
+          }),
+        };
+      }
+    } else {
+      out[key] = value;
+    }
+  }
+  return out;
+}
+
+// Buffer (or string) of any supported format -> full-schema object.
+function decodeParsedJson(body, opts) {
+  let buf = Buffer.isBuffer(body) ? body : Buffer.from(body);
+  if (isGzip(buf)) buf = zlib.gunzipSync(buf);
+  return expandCompact(JSON.parse(buf.toString("utf-8")), opts);
+}
+
+// Returns fallback instead of throwing when the file is missing or malformed.
+function safeReadParsedJson(filePath, fallback = null) {
+  try {
+    if (!fs.existsSync(filePath)) return fallback;
+    return decodeParsedJson(fs.readFileSync(filePath));
+  } catch {
+    return fallback;
+  }
+}
+
+module.exports = { COMPACT_FORMAT, expandCompact, decodeParsedJson, safeReadParsedJson };
@@ -1,6 +1,7 @@
 // backend/utils/s3.js
 const { S3Client, PutObjectCommand, GetObjectCommand, DeleteObjectCommand } = require("@aws-sdk/client-s3");
 const { getSignedUrl } = require("@aws-sdk/s3-request-presigner");
+const { decodeParsedJson } = require("./parsedJson");
 
 const s3 = new S3Client({
   region: process.env.AWS_REGION,
@@ -64,15 +65,15 @@ async function deleteFile(key) {
   return s3.send(command);
 }
 
-// Fetch an S3 object directly into memory and parse it as JSON.
-// Returns the parsed value, or null if the key is missing / unreadable.
+// Fetch an S3 object directly into memory and parse it as JSON (plain, compact or
+// gzipped parser output). Returns the parsed value, or null if the key is missing / unreadable.
 async function getObjectAsJson(key) {
   if (!key) return null;
   try {
     const command  = new GetObjectCommand({ Bucket: BUCKET, Key: key });
     const response = await s3.send(command);
-    const body     = await response.Body.transformToString();
-    return JSON.parse(body);
+    const body     = await response.Body.transformToByteArray();
+    return decodeParsedJson(Buffer.from(body));
   } catch {
     return null;
   }